@@ -76,4 +76,16 @@ admin.site.register(AIRequestLog)
 admin.site.register(Project)
 admin.site.register(Task)
 admin.site.register(TaskComment)
-admin.site.register(Testimonial)
\ No newline at end of file
+admin.site.register(Testimonial)
+
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name',)
+
+@admin.register(SkillAlias)
+class SkillAliasAdmin(admin.ModelAdmin):
+    list_display = ('alias', 'skill')
+    search_fields = ('alias', 'skill__name')
+    autocomplete_fields = ('skill',)
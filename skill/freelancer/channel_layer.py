@@ -0,0 +1,384 @@
+# channel_layer.py
+"""
+Channel layer shared by several worker processes on one host, without Redis.
+
+Messages and group memberships live in a small SQLite database in WAL mode
+(its own file, not the Django database). Every process that touches the
+layer sees the same groups, so a chat message sent by one daphne worker
+reaches sockets held by the others.
+
+Each process receives on its own "specific" channels through a single
+poller task, which reads everything new addressed to the process in one
+statement and hands messages to per-channel queues; an idle poll is a
+plain read that never takes the write lock. Rows stay in the database
+until receive() takes them (the poller deletes them in its next poll),
+so ``capacity`` counts a slow consumer's whole backlog and
+channels nobody reads any more expire out of their groups. Sends to the
+same process wake the poller immediately; other processes pick messages
+up within ``poll_interval`` seconds.
+
+Enable it with ``CHANNEL_LAYER = 'sqlite'`` in settings::
+
+    "BACKEND": "freelancer.channel_layer.SQLiteChannelLayer",
+    "CONFIG": {"path": BASE_DIR / "channels.sqlite3", "capacity": 100, "expiry": 60},
+"""
+import asyncio
+import base64
+import json
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+# Stay well under SQLite's limit on ? parameters per statement
+_IN_CHUNK = 500
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS channel_messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel TEXT NOT NULL,
+        process TEXT,
+        body TEXT NOT NULL,
+        expires REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS channel_messages_channel_idx ON channel_messages (channel, id)",
+    "CREATE INDEX IF NOT EXISTS channel_messages_process_idx ON channel_messages (process, id)",
+    "CREATE INDEX IF NOT EXISTS channel_messages_expires_idx ON channel_messages (expires)",
+    """CREATE TABLE IF NOT EXISTS channel_groups (
+        group_name TEXT NOT NULL,
+        channel TEXT NOT NULL,
+        joined REAL NOT NULL,
+        PRIMARY KEY (group_name, channel)
+    )""",
+    "CREATE INDEX IF NOT EXISTS channel_groups_channel_idx ON channel_groups (channel)",
+)
+
+
+def _process_of(channel):
+    """The receiving process of a specific channel ("prefix.<process>!local"), else None."""
+    if '!' not in channel:
+        return None
+    return channel[:channel.index('!')].rsplit('.', 1)[-1]
+
+
+def _encode(message):
+    return json.dumps(message, default=_encode_bytes)
+
+
+def _encode_bytes(value):
+    if isinstance(value, (bytes, bytearray)):
+        return {'__bytes__': base64.b64encode(value).decode()}
+    raise TypeError(f"{type(value).__name__} is not serializable for the channel layer")
+
+
+def _decode(body):
+    return json.loads(body, object_hook=_decode_bytes)
+
+
+def _decode_bytes(value):
+    if len(value) == 1 and '__bytes__' in value:
+        return base64.b64decode(value['__bytes__'])
+    return value
+
+
+class SQLiteChannelLayer(BaseChannelLayer):
+    extensions = ['groups', 'flush']
+
+    def __init__(
+        self,
+        path='channels.sqlite3',
+        expiry=60,
+        group_expiry=86400,
+        capacity=100,
+        channel_capacity=None,
+        poll_interval=0.05,
+        batch_size=200,
+        **kwargs,
+    ):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(self.channel_capacity)
+        self.path = str(path)
+        self.group_expiry = group_expiry
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._pid = None
+
+    # ---------------- Per-process state ---------------- #
+
+    def _process_state(self):
+        """(Re)create the DB thread and receive state, e.g. after a fork."""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='channel-layer')
+        self._connection = None
+        self.client_prefix = uuid.uuid4().hex[:12]
+        self._buffers = {}
+        self._newest_expiry = {}  # channel -> expiry of the newest message in its buffer
+        self._last_id = 0  # newest row the poller has buffered
+        self._received = []  # ids taken by receive(), deleted by the poller
+        self._poller = None
+        self._poll_loop = None
+        self._wakeup = None
+        self._last_cleanup = 0.0
+
+    async def _run(self, func, *args):
+        self._process_state()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _db(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._connection = connection
+        return self._connection
+
+    def _transaction(self, work, *args):
+        """Run ``work(db, *args)`` inside BEGIN IMMEDIATE so writers queue instead of deadlocking."""
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            result = work(db, *args)
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return result
+
+    # ---------------- Channel layer API ---------------- #
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        assert '__asgi_channel__' not in message
+        body = _encode(message)
+        await self._run(self._transaction, self._send, channel, body)
+        self._wake_if_local([channel])
+
+    def _send(self, db, channel, body):
+        now = time.time()
+        queued = db.execute(
+            'SELECT COUNT(*) FROM channel_messages WHERE channel = ? AND expires > ?', (channel, now)
+        ).fetchone()[0]
+        if queued >= self.get_capacity(channel):
+            raise ChannelFull(channel)
+        db.execute(
+            'INSERT INTO channel_messages (channel, process, body, expires) VALUES (?, ?, ?, ?)',
+            (channel, _process_of(channel), body, now + self.expiry),
+        )
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        self._process_state()
+        if '!' not in channel:
+            return await self._receive_direct(channel)
+
+        self._ensure_poller()
+        queue = self._buffers.get(channel)
+        if queue is None:
+            queue = self._buffers[channel] = asyncio.Queue()
+        try:
+            while True:
+                expires, row_id, message = await queue.get()
+                self._received.append(row_id)
+                if expires > time.time():
+                    return message
+        finally:
+            if queue.empty() and self._buffers.get(channel) is queue:
+                del self._buffers[channel]
+                self._newest_expiry.pop(channel, None)
+
+    async def _receive_direct(self, channel):
+        """Plain (non process-specific) channels are polled one at a time."""
+        delay = 0.001
+        while True:
+            rows = await self._run(self._transaction, self._take, channel)
+            if rows:
+                return _decode(rows[0][1])
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.poll_interval)
+
+    async def new_channel(self, prefix='specific.'):
+        self._process_state()
+        return f"{prefix}.{self.client_prefix}!{uuid.uuid4().hex[:12]}"
+
+    # ---------------- Process-specific receive ---------------- #
+
+    def _wake_if_local(self, channels):
+        if self._wakeup is not None and any(_process_of(channel) == self.client_prefix for channel in channels):
+            self._wakeup.set()
+
+    def _ensure_poller(self):
+        loop = asyncio.get_running_loop()
+        if self._poller is not None and not self._poller.done() and self._poll_loop is loop:
+            return
+        # A new event loop (e.g. tests) gets fresh queues bound to it.
+        if self._poll_loop is not loop:
+            self._buffers = {}
+            self._newest_expiry = {}
+        self._poll_loop = loop
+        self._wakeup = asyncio.Event()
+        self._poller = loop.create_task(self._poll())
+
+    async def _poll(self):
+        delay = 0.001
+        while True:
+            received, self._received = self._received, []
+            if received:
+                rows = await self._run(self._transaction, self._take_local, self.batch_size, received)
+            else:
+                # Nothing to delete: a plain read, so idle polls never take the write lock
+                rows = await self._run(lambda: self._read_local(self._db(), self.batch_size))
+            for row_id, channel, body, expires in rows:
+                queue = self._buffers.get(channel)
+                if queue is None:
+                    queue = self._buffers[channel] = asyncio.Queue()
+                queue.put_nowait((expires, row_id, _decode(body)))
+                self._newest_expiry[channel] = expires
+                self._last_id = row_id
+
+            if time.time() - self._last_cleanup > self.expiry / 2:
+                self._last_cleanup = time.time()
+                await self._run(self._transaction, self._clean_expired)
+                self._drop_dead_buffers()
+
+            if len(rows) >= self.batch_size:
+                continue
+            if rows:
+                delay = 0.001
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                delay = 0.001
+            except asyncio.TimeoutError:
+                delay = min(delay * 2, self.poll_interval)
+            self._wakeup.clear()
+
+    def _take_local(self, db, batch_size, received):
+        """Delete the rows receive() has taken, then read what arrived since the last poll."""
+        db.executemany('DELETE FROM channel_messages WHERE id = ?', [(row_id,) for row_id in received])
+        return self._read_local(db, batch_size)
+
+    def _read_local(self, db, batch_size):
+        """
+        Messages for this process that arrived since the last poll. Writers
+        are serialized by BEGIN IMMEDIATE, so ids become visible in order.
+        """
+        return db.execute(
+            'SELECT id, channel, body, expires FROM channel_messages WHERE process = ? AND id > ? '
+            'ORDER BY id LIMIT ?',
+            (self.client_prefix, self._last_id, batch_size),
+        ).fetchall()
+
+    def _take(self, db, channel):
+        row = db.execute(
+            'SELECT id, body FROM channel_messages WHERE channel = ? AND expires > ? ORDER BY id LIMIT 1',
+            (channel, time.time()),
+        ).fetchone()
+        if row is None:
+            return []
+        db.execute('DELETE FROM channel_messages WHERE id = ?', (row[0],))
+        return [row]
+
+    def _drop_dead_buffers(self):
+        now = time.time()
+        for channel, queue in list(self._buffers.items()):
+            if not queue.empty() and self._newest_expiry.get(channel, now) < now:
+                del self._buffers[channel]
+                del self._newest_expiry[channel]
+
+    # ---------------- Expiry ---------------- #
+
+    def _clean_expired(self, db):
+        """
+        Drop expired messages, and remove their channels from every group:
+        a channel that stopped reading is gone. Stale memberships expire too.
+        """
+        now = time.time()
+        dead = [
+            row[0] for row in db.execute(
+                'SELECT DISTINCT channel FROM channel_messages WHERE expires < ?', (now,)
+            )
+        ]
+        if dead:
+            db.executemany('DELETE FROM channel_groups WHERE channel = ?', [(channel,) for channel in dead])
+            db.execute('DELETE FROM channel_messages WHERE expires < ?', (now,))
+        db.execute('DELETE FROM channel_groups WHERE joined < ?', (now - self.group_expiry,))
+
+    # ---------------- Groups extension ---------------- #
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        await self._run(
+            self._transaction,
+            lambda db: db.execute(
+                'INSERT OR REPLACE INTO channel_groups (group_name, channel, joined) VALUES (?, ?, ?)',
+                (group, channel, time.time()),
+            ),
+        )
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        await self._run(
+            self._transaction,
+            lambda db: db.execute(
+                'DELETE FROM channel_groups WHERE group_name = ? AND channel = ?', (group, channel)
+            ),
+        )
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        self.require_valid_group_name(group)
+        body = _encode(message)
+        channels = await self._run(self._transaction, self._group_send, group, body)
+        self._wake_if_local(channels)
+
+    def _group_send(self, db, group, body):
+        """Fan out to every member in one transaction; full channels are skipped."""
+        now = time.time()
+        channels = [
+            row[0] for row in db.execute(
+                'SELECT channel FROM channel_groups WHERE group_name = ? AND joined > ?',
+                (group, now - self.group_expiry),
+            )
+        ]
+        if not channels:
+            return []
+        queued = {}
+        for start in range(0, len(channels), _IN_CHUNK):
+            chunk = channels[start:start + _IN_CHUNK]
+            queued.update(db.execute(
+                f"SELECT channel, COUNT(*) FROM channel_messages WHERE channel IN ({','.join('?' * len(chunk))}) "
+                'AND expires > ? GROUP BY channel',
+                (*chunk, now),
+            ).fetchall())
+        targets = [channel for channel in channels if queued.get(channel, 0) < self.get_capacity(channel)]
+        db.executemany(
+            'INSERT INTO channel_messages (channel, process, body, expires) VALUES (?, ?, ?, ?)',
+            [(channel, _process_of(channel), body, now + self.expiry) for channel in targets],
+        )
+        return targets
+
+    # ---------------- Flush extension ---------------- #
+
+    async def flush(self):
+        def clear(db):
+            db.execute('DELETE FROM channel_messages')
+            db.execute('DELETE FROM channel_groups')
+        await self._run(self._transaction, clear)
+        self._buffers = {}
+        self._newest_expiry = {}
+        self._received = []
+
+    async def close(self):
+        if getattr(self, '_poller', None) is not None:
+            self._poller.cancel()
+            self._poller = None
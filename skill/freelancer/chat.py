@@ -0,0 +1,234 @@
+# chat.py
+"""
+Chat room message history.
+
+ChatConsumer sends only the newest CHAT_HISTORY_PAGE_SIZE messages when a
+socket connects; the client walks further back with ``load_older``
+commands carrying the cursor from the previous page. Cursors are the
+(timestamp, id) of the oldest message already sent, so each page is a
+range scan on the Message(chat_room, timestamp, id) index.
+
+Reconnecting clients pass the id of the last message they saw
+(``?last_id=``) and receive only what they missed; when more than
+CHAT_RESUME_MAX_MESSAGES were missed the server sends a ``gap`` marker and
+the client falls back to the newest page plus ``load_older``.
+
+Unread counters are only ever changed through ``post_message`` and
+``mark_room_read``: single UPDATE statements with F() expressions, so
+concurrent senders never lose an increment and the rest of the row is
+left alone.
+
+Every DB helper has an ``a``-prefixed twin for ChatConsumer. Reads use
+Django's async ORM directly; ``apost_message`` needs a transaction, so it
+runs ``post_message`` in a thread.
+"""
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+from .models import ChatRoom, Message
+from .search import decode_cursor, encode_cursor
+
+DEFAULT_CHAT_HISTORY_PAGE_SIZE = 50
+DEFAULT_CHAT_RESUME_MAX_MESSAGES = 200
+MAX_CHAT_HISTORY_PAGE_SIZE = 200
+
+
+def history_page_size(requested=None):
+    default = getattr(settings, 'CHAT_HISTORY_PAGE_SIZE', DEFAULT_CHAT_HISTORY_PAGE_SIZE)
+    try:
+        size = int(requested) if requested else default
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, MAX_CHAT_HISTORY_PAGE_SIZE))
+
+
+MESSAGE_FIELDS = ('id', 'sender__username', 'content', 'timestamp')
+
+
+def serialize_message(message):
+    return {
+        'id': message['id'],
+        'sender': message['sender__username'],
+        'message': message['content'],
+        'timestamp': message['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def _history_query(room_id, cursor, limit):
+    queryset = Message.objects.filter(chat_room_id=room_id)
+    position = decode_cursor(cursor, (str, int))
+    if position:
+        try:
+            timestamp, last_id = parse_datetime(position[0]), int(position[1])
+        except (TypeError, ValueError, IndexError):
+            timestamp = None
+        if timestamp:
+            queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=last_id))
+    return queryset.order_by('-timestamp', '-id').values(*MESSAGE_FIELDS)[:limit + 1]
+
+
+def _history_result(rows, limit):
+    older_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        older_cursor = encode_cursor([rows[-1]['timestamp'].isoformat(), rows[-1]['id']])
+    rows.reverse()
+    return {'messages': [serialize_message(row) for row in rows], 'older_cursor': older_cursor}
+
+
+def history_page(room_id, cursor=None, limit=None):
+    """
+    Messages of ``room_id`` older than ``cursor`` (the newest ones when no
+    cursor is given), returned oldest first as ``{'messages', 'older_cursor'}``.
+    ``older_cursor`` is None once the start of the room has been reached.
+    """
+    limit = history_page_size(limit)
+    return _history_result(list(_history_query(room_id, cursor, limit)), limit)
+
+
+async def ahistory_page(room_id, cursor=None, limit=None):
+    limit = history_page_size(limit)
+    return _history_result([row async for row in _history_query(room_id, cursor, limit)], limit)
+
+
+def last_seen_id(query_string):
+    """The ``last_id`` a reconnecting client sent in its socket URL, if any."""
+    values = parse_qs(query_string.decode() if isinstance(query_string, bytes) else query_string).get('last_id')
+    try:
+        last_id = int(values[0]) if values else None
+    except ValueError:
+        return None
+    return last_id if last_id and last_id > 0 else None
+
+
+def _since_query(room_id, last_id):
+    limit = getattr(settings, 'CHAT_RESUME_MAX_MESSAGES', DEFAULT_CHAT_RESUME_MAX_MESSAGES)
+    queryset = (
+        Message.objects.filter(chat_room_id=room_id, id__gt=last_id)
+        .order_by('timestamp', 'id')
+        .values(*MESSAGE_FIELDS)[:limit + 1]
+    )
+    return queryset, limit
+
+
+def _since_result(rows, limit):
+    if len(rows) > limit:
+        return {'messages': [], 'gap': True}
+    return {'messages': [serialize_message(row) for row in rows], 'gap': False}
+
+
+def messages_since(room_id, last_id):
+    """
+    Messages of ``room_id`` posted after ``last_id``, oldest first, as
+    ``{'messages', 'gap'}``. ``gap`` is True (and ``messages`` empty) when
+    more than CHAT_RESUME_MAX_MESSAGES were missed.
+    """
+    queryset, limit = _since_query(room_id, last_id)
+    return _since_result(list(queryset), limit)
+
+
+async def amessages_since(room_id, last_id):
+    queryset, limit = _since_query(room_id, last_id)
+    return _since_result([row async for row in queryset], limit)
+
+
+# ---------------------------------------------
+# 🔢 Unread counters
+# ---------------------------------------------
+class RoomParticipants:
+    """
+    Who is in a chat room, resolved once when a socket connects so that
+    per-message work needs no further lookups. Exposes the same ``id``,
+    ``recruiter_id`` and ``freelancer_id`` as ChatRoom, so either can be
+    passed to ``post_message`` and ``mark_room_read``.
+    """
+    __slots__ = ('id', 'recruiter_id', 'freelancer_id', 'recruiter_username', 'freelancer_username')
+
+    def __init__(self, id, recruiter_id, freelancer_id, recruiter_username, freelancer_username):
+        self.id = id
+        self.recruiter_id = recruiter_id
+        self.freelancer_id = freelancer_id
+        self.recruiter_username = recruiter_username
+        self.freelancer_username = freelancer_username
+
+    def __contains__(self, user_id):
+        return user_id in (self.recruiter_id, self.freelancer_id)
+
+    def username(self, user_id):
+        return self.recruiter_username if user_id == self.recruiter_id else self.freelancer_username
+
+
+def _participants_query(room_id):
+    return ChatRoom.objects.filter(id=room_id).values_list(
+        'id', 'recruiter_id', 'freelancer_id', 'recruiter__username', 'freelancer__username'
+    )
+
+
+def load_participants(room_id):
+    """RoomParticipants for ``room_id`` in a single query, or None if the room doesn't exist."""
+    row = _participants_query(room_id).first()
+    return RoomParticipants(*row) if row else None
+
+
+async def aload_participants(room_id):
+    row = await _participants_query(room_id).afirst()
+    return RoomParticipants(*row) if row else None
+
+
+def _recipient_counter(chat_room, sender_id):
+    """(recipient's counter, recipient) for a message in ``chat_room``."""
+    if sender_id == chat_room.recruiter_id:
+        return 'freelancer_unread_count', chat_room.freelancer_id
+    return 'recruiter_unread_count', chat_room.recruiter_id
+
+
+def post_message(chat_room, sender_id, content, preview=None):
+    """
+    Store a message from ``sender_id`` and bump the other participant's
+    unread counter. ``chat_room`` is a ChatRoom or RoomParticipants.
+    Returns ``(message, recipient_id, recipient_unread_count)``.
+    The sender's own counter is left alone; opening the room clears it.
+    """
+    recipient_field, recipient_id = _recipient_counter(chat_room, sender_id)
+    # One commit for the INSERT and the counter UPDATE; the read-back sees our own increment
+    with transaction.atomic():
+        message = Message.objects.create(chat_room_id=chat_room.id, sender_id=sender_id, content=content)
+        ChatRoom.objects.filter(id=chat_room.id).update(
+            last_message=preview if preview is not None else content,
+            last_updated=message.timestamp,
+            **{recipient_field: F(recipient_field) + 1},
+        )
+        unread = ChatRoom.objects.filter(id=chat_room.id).values_list(recipient_field, flat=True).first()
+    return message, recipient_id, unread or 0
+
+
+async def apost_message(chat_room, sender_id, content, preview=None):
+    """
+    ``post_message`` from async code. The async ORM can't open transactions,
+    so this runs the sync version in a thread to keep the INSERT and the
+    counter UPDATE in one commit.
+    """
+    return await database_sync_to_async(post_message)(chat_room, sender_id, content, preview)
+
+
+def _read_query(chat_room, user_id):
+    if user_id not in (chat_room.recruiter_id, chat_room.freelancer_id):
+        return None, None
+    field = 'recruiter_unread_count' if user_id == chat_room.recruiter_id else 'freelancer_unread_count'
+    return ChatRoom.objects.filter(id=chat_room.id, **{f'{field}__gt': 0}), {field: 0}
+
+
+def mark_room_read(chat_room, user_id):
+    """Clear ``user_id``'s unread counter in the room; no write when it is already zero."""
+    queryset, values = _read_query(chat_room, user_id)
+    return queryset.update(**values) if queryset is not None else 0
+
+
+async def amark_room_read(chat_room, user_id):
+    queryset, values = _read_query(chat_room, user_id)
+    return await queryset.aupdate(**values) if queryset is not None else 0
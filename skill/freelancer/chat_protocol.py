@@ -0,0 +1,79 @@
+# chat_protocol.py
+"""
+Wire formats for chat sockets. Each socket picks one with a websocket
+subprotocol (``new WebSocket(url, ['chat.msgpack', 'chat.compact'])``):
+
+* no subprotocol (the default): JSON text frames, one ``new_message``
+  frame per message with the sender's username and a formatted time;
+* ``chat.compact``: live messages that reach the socket within
+  CHAT_COALESCE_WINDOW seconds of each other go out as a single
+  ``{"type": "messages", "messages": [[id, sender_id, epoch_seconds, text], ...]}``
+  frame. A ``participants`` frame (``[[user_id, username], ...]``) comes
+  before a room's history, so the client can map sender ids to names;
+* ``chat.msgpack``: the compact frames encoded as MessagePack binary frames.
+  This is only offered when the msgpack package is installed.
+
+Room frames use the chosen encoding; notification and heartbeat frames
+are always JSON text. Clients send JSON text commands; on ``chat.msgpack``
+they may also send them as MessagePack binary frames. Any other frame
+closes the socket with UNSUPPORTED_FRAME_CLOSE_CODE. permessage-deflate is negotiated by the server, not
+by the consumer; see freelancer/daphne_server.py.
+"""
+import json
+
+try:
+    import msgpack
+except ImportError:  # the binary mode is simply not offered
+    msgpack = None
+
+SUBPROTOCOL_COMPACT = 'chat.compact'
+SUBPROTOCOL_MSGPACK = 'chat.msgpack'
+# Close code for frames the socket can't decode (1003 is reserved to the server)
+UNSUPPORTED_FRAME_CLOSE_CODE = 4003
+
+
+def supported_subprotocols():
+    return (SUBPROTOCOL_MSGPACK, SUBPROTOCOL_COMPACT) if msgpack is not None else (SUBPROTOCOL_COMPACT,)
+
+
+def choose_subprotocol(offered):
+    """The first subprotocol the client offered that we speak, else None (plain JSON)."""
+    supported = supported_subprotocols()
+    for subprotocol in offered or ():
+        if subprotocol in supported:
+            return subprotocol
+    return None
+
+
+def encode_frame(subprotocol, payload):
+    """Keyword arguments for AsyncWebsocketConsumer.send()."""
+    if subprotocol == SUBPROTOCOL_MSGPACK:
+        return {'bytes_data': msgpack.packb(payload)}
+    if subprotocol == SUBPROTOCOL_COMPACT:
+        return {'text_data': json.dumps(payload, separators=(',', ':'))}
+    return {'text_data': json.dumps(payload)}
+
+
+def decode_command(subprotocol, text_data=None, bytes_data=None):
+    """A client frame as a dict, or None if this socket doesn't accept it."""
+    try:
+        if text_data is not None:
+            data = json.loads(text_data)
+        elif subprotocol == SUBPROTOCOL_MSGPACK:
+            data = msgpack.unpackb(bytes_data)
+        else:
+            return None
+    except ValueError:  # msgpack's unpack errors are ValueErrors too
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def decode_frame(frame):
+    """Client side of encode_frame (used by the load test and benchmarks)."""
+    if isinstance(frame, bytes):
+        return msgpack.unpackb(frame)
+    return json.loads(frame)
+
+
+def compact_row(event):
+    return [event['id'], event['sender_id'], event['ts'], event['message']]
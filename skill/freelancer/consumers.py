@@ -1,184 +1,439 @@
+import asyncio
 import json
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
-from django.contrib.auth.models import User
-from .models import ChatRoom, Message
-from asgiref.sync import async_to_sync
+from django.conf import settings
+from .chat_protocol import UNSUPPORTED_FRAME_CLOSE_CODE, choose_subprotocol, compact_row, decode_command, encode_frame
+from .chat import ahistory_page, aload_participants, amark_room_read, amessages_since, apost_message, last_seen_id
+from .message_buffer import get_buffer, write_behind_enabled
+from .notifications import bind_socket_loop, notification_group
+from .presence import IDLE_CLOSE_CODE, get_presence
 
-class ChatConsumer(AsyncWebsocketConsumer):
-    async def connect(self):
-        self.room_id = self.scope['url_route']['kwargs']['room_id']
-        self.room_group_name = f'chat_{self.room_id}'
-        self.user = self.scope['user']
 
-        # Check if user is allowed in this chat
-        if self.user.is_authenticated and await self.is_user_in_room():
-            await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-            await self.accept()
+def chat_group(room_id):
+    return f'chat_{room_id}'
 
-            # 🟢 Send existing chat history on connection
-            history = await self.get_chat_history()
-            await self.send(text_data=json.dumps({
-                'type': 'history',
-                'messages': history
-            }))
-            await self.mark_as_read()
+
+class ChatRoomMixin:
+    """
+    Room handling shared by ChatConsumer (one socket per room) and
+    UserSocketConsumer (one socket per user, rooms picked by message).
+    ``room_frame`` lets the multiplexed socket tag frames with their room.
+    """
+    # Negotiated wire format (see chat_protocol.py); None is plain JSON
+    protocol = None
+    _coalesced = None
+    _coalesce_task = None
+    # {room_id: keys of buffered messages open_room already sent}
+    _served_pending = None
+
+    def negotiate_protocol(self):
+        """Pick the subprotocol to accept() with and reset the coalescing state."""
+        self.protocol = choose_subprotocol(self.scope.get('subprotocols'))
+        self._coalesced = {}
+        self._coalesce_task = None
+        self._served_pending = {}
+        return self.protocol
+
+    def room_frame(self, room_id, payload):
+        return payload
+
+    async def send_room_frame(self, room_id, payload):
+        if self._coalesced:
+            await self.flush_coalesced()  # keep frames in order
+        await self.send(**encode_frame(self.protocol, self.room_frame(room_id, payload)))
+
+    async def flush_coalesced(self):
+        pending, self._coalesced = self._coalesced, {}
+        for room_id, rows in pending.items():
+            await self.send(**encode_frame(
+                self.protocol, self.room_frame(room_id, {'type': 'messages', 'messages': rows})
+            ))
+
+    async def _flush_coalesced_after(self, window):
+        await asyncio.sleep(window)
+        self._coalesce_task = None
+        await self.flush_coalesced()
+
+    def drop_coalesced(self):
+        if self._coalesce_task is not None:
+            self._coalesce_task.cancel()
+            self._coalesce_task = None
+        self._coalesced = {}
+
+    async def start_buffer(self):
+        # First socket in the process starts the buffer (and replays crashed journals)
+        self.buffer = await sync_to_async(get_buffer)() if write_behind_enabled() else None
+
+    async def open_room(self, room, last_id=None):
+        if self.protocol is not None:
+            # Compact frames carry sender ids; say once who they are
+            await self.send_room_frame(room.id, {
+                'type': 'participants',
+                'users': [[room.recruiter_id, room.recruiter_username], [room.freelancer_id, room.freelancer_username]],
+            })
+        # Write-behind: look at the buffer before the database, so a message
+        # stored in between is found in one or the other
+        pending = self.buffer.pending_for(room.id) if self.buffer is not None else []
+
+        # 🔁 Reconnecting clients only get what they missed
+        missed = await amessages_since(room.id, last_id) if last_id else None
+        if missed and not missed['gap']:
+            sent = missed['messages']
+            await self.send_room_frame(room.id, {
+                'type': 'resume',
+                'messages': sent,
+            })
         else:
-            await self.close()
+            if missed:
+                # Too much was missed; the client drops its copy and pages instead
+                await self.send_room_frame(room.id, {'type': 'gap', 'last_id': last_id})
 
-    async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+            # 🟢 Send the newest page of chat history
+            page = await ahistory_page(room.id)
+            sent = page['messages']
+            await self.send_room_frame(room.id, {
+                'type': 'history',
+                'messages': sent,
+                'older_cursor': page['older_cursor'],
+            })
+        if pending:
+            await self.send_unstored(room, pending, sent[-1]['id'] if sent else last_id or 0)
+        # Reset unread counter when user opens chat
+        await amark_room_read(room, self.user.id)
 
-    async def receive(self, text_data):
-        data = json.loads(text_data)
-        message_content = data.get('message', '').strip()
+    async def send_unstored(self, room, pending, newest_id):
+        """Send buffered messages the database didn't have yet, as a resume frame."""
+        unstored = [entry for entry in pending if entry.id is None or entry.id > newest_id]
+        if not unstored:
+            return
+        # Their live broadcasts may still be queued for this socket; chat_message skips those
+        self._served_pending.setdefault(room.id, set()).update(entry.key for entry in unstored)
+        await self.send_room_frame(room.id, {
+            'type': 'resume',
+            'messages': [
+                {
+                    'id': entry.id,
+                    'sender': entry.sender,
+                    'message': entry.content,
+                    'timestamp': entry.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                }
+                for entry in unstored
+            ],
+        })
 
-        if not message_content:
-            return  # Ignore empty messages
+    async def load_older(self, room, cursor, limit=None):
+        # 📜 Page backwards through older messages
+        if not cursor:
+            return  # nothing older than the first page was announced
+        page = await ahistory_page(room.id, cursor, limit)
+        await self.send_room_frame(room.id, {
+            'type': 'older_messages',
+            'messages': page['messages'],
+            'older_cursor': page['older_cursor'],
+        })
 
-        sender = self.user
-        if not sender.is_authenticated:
+    async def post_to_room(self, room, message_content):
+        if self.buffer is not None:
+            # ✍️ Write-behind: broadcast now, the buffer persists it (and notifies the recipient) shortly
+            entry = self.buffer.add(room, self.user.id, message_content)
+            await self.channel_layer.group_send(
+                chat_group(room.id),
+                {
+                    'type': 'chat_message',
+                    'room_id': room.id,
+                    'id': None,
+                    'key': entry.key,
+                    'message': entry.content,
+                    'sender': entry.sender,
+                    'sender_id': self.user.id,
+                    'timestamp': entry.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                    'ts': int(entry.timestamp.timestamp()),
+                },
+            )
             return
 
-        # Save to DB and broadcast
-        new_message = await self.save_message(message_content, sender.id)
+        # Save to DB: one INSERT plus one atomic counter UPDATE, participants are already known
+        message, recipient_id, unread_count = await apost_message(room, self.user.id, message_content)
+        sender = room.username(self.user.id)
 
+        # Notify recipient via their notification channel
         await self.channel_layer.group_send(
-            self.room_group_name,
+            notification_group(recipient_id),
+            {
+                "type": "notify_new_message",
+                "room_id": room.id,
+                "sender": sender,
+                "message": message.content,
+                "unread_count": unread_count,
+            }
+        )
+
+        await self.channel_layer.group_send(
+            chat_group(room.id),
             {
                 'type': 'chat_message',
-                'message': new_message['content'],
-                'sender': new_message['sender'],
-                'timestamp': new_message['timestamp'],
+                'room_id': room.id,
+                'id': message.id,
+                'message': message.content,
+                'sender': sender,
+                'sender_id': self.user.id,
+                'timestamp': message.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                'ts': int(message.timestamp.timestamp()),
             },
         )
 
     async def chat_message(self, event):
-        # Send new message to WebSocket
+        served = self._served_pending.get(event.get('room_id'))
+        if served and event.get('key') in served:
+            served.discard(event['key'])
+            return  # open_room sent it from the buffer already
+
+        if self.protocol is None:
+            # Send new message to WebSocket
+            await self.send_room_frame(event.get('room_id'), {
+                'type': 'new_message',
+                'id': event['id'],
+                'message': event['message'],
+                'sender': event['sender'],
+                'timestamp': event['timestamp'],
+            })
+            return
+
+        # ⚡ Compact protocols: rows arriving within the window share one frame
+        self._coalesced.setdefault(event.get('room_id'), []).append(compact_row(event))
+        window = getattr(settings, 'CHAT_COALESCE_WINDOW', 0.005)
+        if not window:
+            await self.flush_coalesced()
+        elif self._coalesce_task is None:
+            self._coalesce_task = asyncio.create_task(self._flush_coalesced_after(window))
+
+    async def chat_persisted(self, event):
+        # Write-behind flushed this room up to last_id; clients resume from there
+        await self.send_room_frame(event.get('room_id'), {
+            'type': 'persisted',
+            'last_id': event['last_id'],
+        })
+
+
+class NotificationEventsMixin:
+    """Handlers for events sent to notification_group(user_id)."""
+
+    async def notify_new_message(self, event):
         await self.send(text_data=json.dumps({
-            'type': 'new_message',
-            'message': event['message'],
+            'type': 'notification',
+            'room_id': event['room_id'],
             'sender': event['sender'],
-            'timestamp': event['timestamp'],
+            'message': event['message'],
+            'unread_count': event['unread_count'],
         }))
 
-    # ---------------- Helper DB functions ---------------- #
+    async def notify_notifications(self, event):
+        # One frame per coalescing window; "count" can exceed the items sent.
+        await self.send(text_data=json.dumps({
+            'type': 'notifications',
+            'notifications': event['notifications'],
+            'count': event['count'],
+            'unread_delta': event['unread_delta'],
+        }))
 
-    @database_sync_to_async
-    def is_user_in_room(self):
-        try:
-            room = ChatRoom.objects.get(id=self.room_id)
-            return self.user in [room.recruiter, room.freelancer]
-        except ChatRoom.DoesNotExist:
+
+class PresenceMixin:
+    """
+    Registers the socket with presence (see presence.py). Every frame counts
+    as activity; ``{"command": "heartbeat"}`` is answered with
+    ``{"type": "heartbeat"}`` so clients can tell the server is alive.
+    """
+
+    def presence_connect(self):
+        self.presence = get_presence()
+        self.presence.connected(self.user.id, self.channel_name)
+
+    def presence_disconnect(self):
+        self.presence.disconnected(self.channel_name)
+
+    async def touch(self, data):
+        """Record activity; True when ``data`` was only a heartbeat."""
+        self.presence.seen(self.channel_name)
+        if data.get('command') != 'heartbeat':
             return False
+        await self.send(text_data=json.dumps({'type': 'heartbeat'}))
+        return True
 
-    @database_sync_to_async
-    def save_message(self, message_content, sender_id):
-        sender = User.objects.get(id=sender_id)
-        chat_room = ChatRoom.objects.get(id=self.room_id)
+    async def presence_reap(self, event):
+        # Silent for longer than PRESENCE_IDLE_TIMEOUT
+        await self.close(code=IDLE_CLOSE_CODE)
 
-        message = Message.objects.create(
-            chat_room=chat_room,
-            sender=sender,
-            content=message_content
-        )
 
-        # Update chat room last message
-        chat_room.last_message = message_content
-        chat_room.last_updated = message.timestamp
+class ChatConsumer(ChatRoomMixin, AsyncWebsocketConsumer):
+    async def connect(self):
+        self.room_id = self.scope['url_route']['kwargs']['room_id']
+        self.room_group_name = chat_group(self.room_id)
+        self.user = self.scope['user']
+        self.room = None
+        self.buffer = None
 
-        # Update unread count
-        if sender == chat_room.recruiter:
-            chat_room.freelancer_unread_count += 1
+        # Check if user is allowed in this chat; participants are kept for the connection
+        if self.user.is_authenticated:
+            self.room = await aload_participants(self.room_id)
+        if self.room and self.user.id in self.room:
+            await self.start_buffer()
+            await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+            await self.accept(subprotocol=self.negotiate_protocol())
+            await self.open_room(self.room, last_seen_id(self.scope.get('query_string', b'')))
         else:
-            chat_room.recruiter_unread_count += 1
+            self.room = None
+            await self.close()
 
-        chat_room.save()
+    async def disconnect(self, close_code):
+        self.drop_coalesced()
+        await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
 
-        # Identify recipient
-        recipient = chat_room.freelancer if sender == chat_room.recruiter else chat_room.recruiter
+    async def receive(self, text_data=None, bytes_data=None):
+        data = decode_command(self.protocol, text_data, bytes_data)
+        if data is None:
+            await self.close(code=UNSUPPORTED_FRAME_CLOSE_CODE)
+            return
 
-        # Notify recipient via their notification channel
-        async_to_sync(self.channel_layer.group_send)(
-            f"user_{recipient.id}_notifications",
-            {
-                "type": "notify_new_message",
-                "room_id": chat_room.id,
-                "sender": sender.username,
-                "message": message.content,
-                "unread_count": (
-                    chat_room.freelancer_unread_count if recipient == chat_room.freelancer 
-                    else chat_room.recruiter_unread_count
-                ),
-            }
-        )
+        if data.get('command') == 'load_older':
+            await self.load_older(self.room, data.get('cursor'), data.get('limit'))
+            return
 
-        return {
-            'content': message.content,
-            'sender': sender.username,
-            'timestamp': message.timestamp.strftime('%Y-%m-%d %H:%M:%S')
-        }
-
-
-    @database_sync_to_async
-    def get_chat_history(self):
-        """
-        Returns the last 50 messages in this chat room.
-        """
-        messages = (
-            Message.objects.filter(chat_room_id=self.room_id)
-            .order_by("timestamp")
-            .values("sender__username", "content", "timestamp")
-        )
-        return [
-            {
-                "sender": msg["sender__username"],
-                "message": msg["content"],
-                "timestamp": msg["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
-            }
-            for msg in messages
-        ]
+        message_content = data.get('message', '').strip()
 
-    @database_sync_to_async
-    def mark_as_read(self):
-        """Reset unread counter when user opens chat."""
-        try:
-            room = ChatRoom.objects.get(id=self.room_id)
-            if self.user == room.recruiter:
-                room.recruiter_unread_count = 0
-            elif self.user == room.freelancer:
-                room.freelancer_unread_count = 0
-            room.save()
-        except ChatRoom.DoesNotExist:
-            pass
-
-class NotificationConsumer(AsyncWebsocketConsumer):
+        if not message_content:
+            return  # Ignore empty messages
+
+        if self.room is None:
+            return
+
+        await self.post_to_room(self.room, message_content)
+
+
+class NotificationConsumer(PresenceMixin, NotificationEventsMixin, AsyncWebsocketConsumer):
     async def connect(self):
         self.user = self.scope['user']
         if not self.user.is_authenticated:
             await self.close()
             return
-        
-        self.group_name = f"user_{self.user.id}_notifications"
+
+        self.group_name = notification_group(self.user.id)
 
         await self.channel_layer.group_add(
             self.group_name,
             self.channel_name
         )
         await self.accept()
+        bind_socket_loop()
+        self.presence_connect()
 
     async def disconnect(self, close_code):
+        if not hasattr(self, 'group_name'):
+            return
+        self.presence_disconnect()
         await self.channel_layer.group_discard(
             self.group_name,
             self.channel_name
         )
 
-    async def notify_new_message(self, event):
-        await self.send(text_data=json.dumps({
-            'type': 'notification',
-            'room_id': event['room_id'],
-            'sender': event['sender'],
-            'message': event['message'],
-            'unread_count': event['unread_count'],
-        }))
+    async def receive(self, text_data=None, bytes_data=None):
+        data = decode_command(None, text_data, bytes_data)  # JSON only
+        if data is None:
+            await self.close(code=UNSUPPORTED_FRAME_CLOSE_CODE)
+            return
+        await self.touch(data)
+
+
+class UserSocketConsumer(PresenceMixin, ChatRoomMixin, NotificationEventsMixin, AsyncWebsocketConsumer):
+    """
+    One socket per user for notifications and every open chat room.
+
+    Commands (JSON text, or MessagePack binary frames on chat.msgpack):
+        {"command": "subscribe", "room": 12, "last_id": 345}   last_id optional
+        {"command": "unsubscribe", "room": 12}
+        {"command": "load_older", "room": 12, "cursor": "..."}
+        {"command": "send", "room": 12, "message": "hi"}
+
+    Room frames are ChatConsumer's frames (in the negotiated encoding, see
+    chat_protocol.py) with a "room" key added; failed commands answer
+    {"type": "error", "room": .., "error": ..}.
+    Notification and heartbeat frames are NotificationConsumer's.
+    """
+
+    async def connect(self):
+        self.user = self.scope['user']
+        self.rooms = {}
+        self.buffer = None
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+
+        self.group_name = notification_group(self.user.id)
+        await self.start_buffer()
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept(subprotocol=self.negotiate_protocol())
+        bind_socket_loop()
+        self.presence_connect()
+
+    async def disconnect(self, close_code):
+        if not hasattr(self, 'group_name'):
+            return
+        self.presence_disconnect()
+        self.drop_coalesced()
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        for room_id in self.rooms:
+            await self.channel_layer.group_discard(chat_group(room_id), self.channel_name)
+        self.rooms = {}
+
+    def room_frame(self, room_id, payload):
+        payload['room'] = int(room_id)
+        return payload
+
+    async def receive(self, text_data=None, bytes_data=None):
+        data = decode_command(self.protocol, text_data, bytes_data)
+        if data is None:
+            await self.close(code=UNSUPPORTED_FRAME_CLOSE_CODE)
+            return
+        if await self.touch(data):
+            return
+        command = data.get('command')
+        try:
+            room_id = int(data.get('room'))
+        except (TypeError, ValueError):
+            return  # every command names a room
 
+        if command == 'subscribe':
+            await self.subscribe(room_id, data.get('last_id'))
+            return
+
+        room = self.rooms.get(room_id)
+        if room is None:
+            await self.send_room_frame(room_id, {'type': 'error', 'error': 'not_subscribed'})
+        elif command == 'unsubscribe':
+            del self.rooms[room_id]
+            await self.channel_layer.group_discard(chat_group(room_id), self.channel_name)
+        elif command == 'load_older':
+            await self.load_older(room, data.get('cursor'), data.get('limit'))
+        elif command == 'send':
+            message_content = str(data.get('message') or '').strip()
+            if message_content:
+                await self.post_to_room(room, message_content)
+
+    async def subscribe(self, room_id, last_id=None):
+        room = self.rooms.get(room_id)
+        if room is None:
+            if len(self.rooms) >= getattr(settings, 'SOCKET_MAX_ROOMS', 50):
+                await self.send_room_frame(room_id, {'type': 'error', 'error': 'too_many_rooms'})
+                return
+            # Check if user is allowed in this chat; participants are kept while subscribed
+            room = await aload_participants(room_id)
+            if room is None or self.user.id not in room:
+                await self.send_room_frame(room_id, {'type': 'error', 'error': 'forbidden'})
+                return
+            self.rooms[room_id] = room
+            await self.channel_layer.group_add(chat_group(room_id), self.channel_name)
+        try:
+            last_id = int(last_id) if last_id else None
+        except (TypeError, ValueError):
+            last_id = None
+        await self.open_room(room, last_id)
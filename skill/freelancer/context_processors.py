@@ -0,0 +1,20 @@
+# context_processors.py
+from django.utils.functional import SimpleLazyObject
+
+from .notifications import navbar_notifications
+
+
+def notifications(request):
+    """
+    Navbar bell for every template: ``notifications`` (latest few) and
+    ``unread_notifications_count``. Nothing is loaded unless a template
+    actually uses them.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    data = SimpleLazyObject(lambda: navbar_notifications(user.id))
+    return {
+        'notifications': SimpleLazyObject(lambda: data['latest']),
+        'unread_notifications_count': SimpleLazyObject(lambda: data['unread']),
+    }
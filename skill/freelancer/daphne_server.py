@@ -0,0 +1,42 @@
+# daphne_server.py
+"""
+Daphne with permessage-deflate. Stock daphne never accepts the
+compression extension browsers offer. This entrypoint takes the same
+arguments as the ``daphne`` command::
+
+    python -m freelancer.daphne_server -b 0.0.0.0 -p 8000 skill.asgi:application
+
+Compression is negotiated per connection, so clients that don't offer it
+are unaffected. The server keeps its compression context across messages,
+which suits the repetitive chat frames.
+"""
+from autobahn.websocket.compress import PerMessageDeflateOffer, PerMessageDeflateOfferAccept
+from daphne.cli import CommandLineInterface
+from daphne.server import Server
+
+
+def accept_deflate(offers):
+    for offer in offers:
+        if isinstance(offer, PerMessageDeflateOffer):
+            return PerMessageDeflateOfferAccept(offer)
+    return None
+
+
+class DeflateServer(Server):
+    def __init__(self, *args, ready_callable=None, **kwargs):
+        # run() builds the websocket factory, then calls ready_callable before serving
+        self._ready_callable = ready_callable
+        super().__init__(*args, ready_callable=self._enable_deflate, **kwargs)
+
+    def _enable_deflate(self):
+        self.ws_factory.setProtocolOptions(perMessageCompressionAccept=accept_deflate)
+        if self._ready_callable:
+            self._ready_callable()
+
+
+class DeflateCommandLineInterface(CommandLineInterface):
+    server_class = DeflateServer
+
+
+if __name__ == '__main__':
+    DeflateCommandLineInterface.entrypoint()
@@ -0,0 +1,115 @@
+import asyncio
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from freelancer.channel_layer import SQLiteChannelLayer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark SQLiteChannelLayer across worker processes: every worker holds "
+        "--sockets channels spread over --rooms groups and group_sends --messages "
+        "chat messages; reports deliveries/s and end-to-end latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, nargs='+', default=[4, 8, 16])
+        parser.add_argument('--sockets', type=int, default=25, help='Channels per worker process.')
+        parser.add_argument('--rooms', type=int, default=50)
+        parser.add_argument('--messages', type=int, default=200, help='group_send calls per worker.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'workers':>7} {'sockets':>7} {'sent':>6} {'delivered':>9} {'time':>7} "
+                          f"{'deliveries/s':>12} {'p50 ms':>7} {'p99 ms':>7}")
+        for workers in options['workers']:
+            with tempfile.TemporaryDirectory() as directory:
+                result = run(workers, options['sockets'], options['rooms'], options['messages'],
+                             os.path.join(directory, 'channels.sqlite3'))
+            self.stdout.write(
+                f"{workers:>7} {workers * options['sockets']:>7} {result['sent']:>6} {result['delivered']:>9} "
+                f"{result['elapsed']:>6.2f}s {result['delivered'] / result['elapsed']:>12.0f} "
+                f"{result['p50']:>7.1f} {result['p99']:>7.1f}"
+            )
+
+
+def run(workers, sockets, rooms, messages, path):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(index, workers, sockets, rooms, messages, path, barrier, results))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    barrier.wait()  # every channel has joined its group
+    start = time.perf_counter()
+    barrier.wait()  # go
+    collected = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+    latencies = sorted(latency for worker in collected for latency in worker['latencies'])
+    return {
+        'sent': workers * messages,
+        'delivered': len(latencies),
+        'elapsed': elapsed,
+        'p50': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def _room_members(workers, sockets, rooms):
+    members = {}
+    for socket in range(workers * sockets):
+        members.setdefault(socket % rooms, []).append(socket)
+    return members
+
+
+def _worker(index, workers, sockets, rooms, messages, path, barrier, results):
+    asyncio.run(_worker_main(index, workers, sockets, rooms, messages, path, barrier, results))
+
+
+async def _worker_main(index, workers, sockets, rooms, messages, path, barrier, results):
+    layer = SQLiteChannelLayer(path=path, capacity=100000, expiry=300)
+    loop = asyncio.get_running_loop()
+    local = range(index * sockets, (index + 1) * sockets)
+    channels = {socket: await layer.new_channel() for socket in local}
+    for socket, channel in channels.items():
+        await layer.group_add(f"room_{socket % rooms}", channel)
+
+    # Deliveries to expect: one per local member of each room a message goes to.
+    members = _room_members(workers, sockets, rooms)
+    expected = {socket: 0 for socket in local}
+    for sender in range(workers):
+        for number in range(messages):
+            for socket in members.get((sender * messages + number) % rooms, ()):
+                if socket in expected:
+                    expected[socket] += 1
+
+    await loop.run_in_executor(None, barrier.wait)
+    await loop.run_in_executor(None, barrier.wait)
+
+    latencies = []
+
+    async def receive(socket):
+        for _ in range(expected[socket]):
+            try:
+                message = await asyncio.wait_for(layer.receive(channels[socket]), timeout=30)
+            except asyncio.TimeoutError:
+                return
+            latencies.append(time.time() - message['sent'])
+
+    async def send():
+        for number in range(messages):
+            room = (index * messages + number) % rooms
+            await layer.group_send(f"room_{room}", {'type': 'chat.message', 'sent': time.time()})
+
+    await asyncio.gather(send(), *(receive(socket) for socket in local))
+    await layer.close()
+    results.put({'latencies': latencies})
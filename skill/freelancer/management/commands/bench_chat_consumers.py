@@ -0,0 +1,104 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from freelancer.chat import post_message
+from freelancer.consumers import ChatConsumer
+from freelancer.models import ChatRoom, Message
+
+
+class ThreadHopChatConsumer(ChatConsumer):
+    """The pre-async-ORM shape: DB work and the notification send inside a sync_to_async thread."""
+
+    async def receive(self, text_data):
+        content = json.loads(text_data).get('message', '').strip()
+        if content and self.room is not None:
+            event = await self._save(content)
+            await self.channel_layer.group_send(self.room_group_name, event)
+
+    @database_sync_to_async
+    def _save(self, content):
+        message, recipient_id, unread_count = post_message(self.room, self.user.id, content)
+        sender = self.room.username(self.user.id)
+        async_to_sync(self.channel_layer.group_send)(
+            f"user_{recipient_id}_notifications",
+            {'type': 'notify_new_message', 'room_id': self.room.id, 'sender': sender,
+             'message': message.content, 'unread_count': unread_count},
+        )
+        return {'type': 'chat_message', 'room_id': self.room.id, 'id': message.id, 'message': message.content, 'sender': sender,
+                'timestamp': message.timestamp.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive many concurrent ChatConsumer sockets in one room and report messages/s and "
+        "peak thread count, for the async ORM consumer and the old thread-hopping shape."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sockets', type=int, default=50)
+        parser.add_argument('--messages', type=int, default=20, help='Messages per socket.')
+
+    def handle(self, *args, **options):
+        for label, consumer in (('sync_to_async + async_to_sync', ThreadHopChatConsumer),
+                                ('async ORM', ChatConsumer)):
+            tag = uuid.uuid4().hex[:8]
+            recruiter = User.objects.create_user(f'bench-recruiter-{tag}')
+            freelancer = User.objects.create_user(f'bench-freelancer-{tag}')
+            room = ChatRoom.objects.create(recruiter=recruiter, freelancer=freelancer)
+            try:
+                result = asyncio.run(self._drive(consumer, room, freelancer, options['sockets'], options['messages']))
+            finally:
+                recruiter.delete()
+                freelancer.delete()
+            self.stdout.write(
+                f"{label:<30} {result['rate']:8.0f} msg/s  peak threads {result['peak_threads']:>3} "
+                f"({result['baseline_threads']} before)"
+            )
+
+    async def _drive(self, consumer, room, sender, sockets, per_socket):
+        baseline = threading.active_count()
+        peak = baseline
+        sampling = True
+
+        async def sample():
+            nonlocal peak
+            while sampling:
+                peak = max(peak, threading.active_count())
+                await asyncio.sleep(0.002)
+
+        sampler = asyncio.create_task(sample())
+        communicators = []
+        for _ in range(sockets):
+            communicator = WebsocketCommunicator(consumer.as_asgi(), f"/ws/chat/{room.id}/")
+            communicator.scope['user'] = sender
+            communicator.scope['url_route'] = {'kwargs': {'room_id': str(room.id)}}
+            await communicator.connect()
+            await communicator.receive_from()  # history frame
+            communicators.append(communicator)
+
+        async def send(communicator):
+            for i in range(per_socket):
+                await communicator.send_to(text_data=json.dumps({'message': f'ping {i}'}))
+
+        total = sockets * per_socket
+        stored = database_sync_to_async(Message.objects.filter(chat_room=room).count)
+        start = time.perf_counter()
+        await asyncio.gather(*(send(communicator) for communicator in communicators))
+        while await stored() < total:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+
+        sampling = False
+        await sampler
+        for communicator in communicators:
+            await communicator.disconnect()
+        return {'rate': total / elapsed, 'peak_threads': peak, 'baseline_threads': baseline}
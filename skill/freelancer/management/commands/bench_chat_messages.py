@@ -0,0 +1,66 @@
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from freelancer.chat import load_participants, post_message
+from freelancer.models import ChatRoom, Message
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure messages per second for one chat room: the old per-message path "
+        "(re-fetch sender and room, read-modify-write counters, full save) against "
+        "post_message with participants resolved once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        recruiter = User.objects.create_user(f'bench-recruiter-{tag}')
+        freelancer = User.objects.create_user(f'bench-freelancer-{tag}')
+        room = ChatRoom.objects.create(recruiter=recruiter, freelancer=freelancer)
+        count = options['messages']
+        try:
+            self._report('before (refetch + save)', count, lambda i: self._legacy_save(room.id, freelancer.id, f'ping {i}'))
+            participants = load_participants(room.id)
+            self._report('after (participants)', count, lambda i: post_message(participants, freelancer.id, f'ping {i}'))
+        finally:
+            recruiter.delete()
+            freelancer.delete()
+
+    def _report(self, label, count, send):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            start = time.perf_counter()
+            for i in range(count):
+                send(i)
+            elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<24} {count / elapsed:8.0f} msg/s  {queries / count:.1f} queries/message"
+        )
+
+    def _legacy_save(self, room_id, sender_id, content):
+        """ChatConsumer.save_message as it was before participants were cached."""
+        sender = User.objects.get(id=sender_id)
+        chat_room = ChatRoom.objects.get(id=room_id)
+        message = Message.objects.create(chat_room=chat_room, sender=sender, content=content)
+        chat_room.last_message = content
+        chat_room.last_updated = message.timestamp
+        if sender == chat_room.recruiter:
+            chat_room.freelancer_unread_count += 1
+        else:
+            chat_room.recruiter_unread_count += 1
+        chat_room.save()
+        recipient = chat_room.freelancer if sender == chat_room.recruiter else chat_room.recruiter
+        return recipient.id
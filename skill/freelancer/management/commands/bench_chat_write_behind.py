@@ -0,0 +1,81 @@
+import asyncio
+import json
+import time
+import uuid
+
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from freelancer import message_buffer
+from freelancer.consumers import ChatConsumer
+from freelancer.models import ChatRoom, Message
+
+
+class Command(BaseCommand):
+    help = (
+        "Chat ingest throughput across many rooms: every message persisted on its own "
+        "(CHAT_WRITE_BEHIND off) against the write-behind buffer. Time runs until every "
+        "message is stored."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=20)
+        parser.add_argument('--messages', type=int, default=50, help='Messages per room.')
+
+    def handle(self, *args, **options):
+        for label, write_behind in (('per-message commit', False), ('write-behind buffer', True)):
+            tag = uuid.uuid4().hex[:8]
+            users = []
+            rooms = []
+            for i in range(options['rooms']):
+                recruiter = User.objects.create_user(f'bench-recruiter-{tag}-{i}')
+                freelancer = User.objects.create_user(f'bench-freelancer-{tag}-{i}')
+                users += [recruiter, freelancer]
+                rooms.append((ChatRoom.objects.create(recruiter=recruiter, freelancer=freelancer), recruiter))
+            try:
+                with override_settings(CHAT_WRITE_BEHIND=write_behind, CHAT_WRITE_BEHIND_JOURNAL=None):
+                    message_buffer._buffer = None
+                    elapsed = asyncio.run(self._drive(rooms, options['messages']))
+                counts = [
+                    (room.recruiter_unread_count, room.freelancer_unread_count)
+                    for room in ChatRoom.objects.filter(id__in=[room.id for room, _ in rooms])
+                ]
+            finally:
+                for user in users:
+                    user.delete()
+            total = len(rooms) * options['messages']
+            exact = all(count == (0, options['messages']) for count in counts)
+            self.stdout.write(
+                f"{label:<20} {total / elapsed:8.0f} msg/s  ({total} messages, {len(rooms)} rooms, "
+                f"counters {'exact' if exact else 'WRONG'})"
+            )
+
+    async def _drive(self, rooms, per_room):
+        communicators = []
+        for room, sender in rooms:
+            communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/{room.id}/")
+            communicator.scope['user'] = sender
+            communicator.scope['url_route'] = {'kwargs': {'room_id': str(room.id)}}
+            await communicator.connect()
+            await communicator.receive_from()  # history frame
+            communicators.append(communicator)
+
+        async def send(communicator):
+            for i in range(per_room):
+                await communicator.send_to(text_data=json.dumps({'message': f'ping {i}'}))
+
+        total = len(rooms) * per_room
+        stored = database_sync_to_async(
+            Message.objects.filter(chat_room_id__in=[room.id for room, _ in rooms]).count
+        )
+        start = time.perf_counter()
+        await asyncio.gather(*(send(communicator) for communicator in communicators))
+        while await stored() < total:
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        for communicator in communicators:
+            await communicator.disconnect()
+        return elapsed
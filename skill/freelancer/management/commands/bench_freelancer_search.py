@@ -0,0 +1,84 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from freelancer.models import FreelancerProfile, FreelancerSkill, Skill
+from freelancer.search import freelancer_facets, search_freelancers
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure p50/p95 latency of the recruiter freelancer search (hits + facets). "
+        "Synthetic profiles are created inside a transaction that is always rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=200_000)
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._populate(options['profiles'])
+            rng = random.Random(7)
+            filter_sets = [
+                {},
+                {'experience_level': 'expert'},
+                {'availability_status': 'available', 'city': 'pune'},
+                {'skills': 'skill3'},
+                {'skills': 'skill3, skill17', 'experience_level': 'entry'},
+                {'q': 'designer'},
+            ]
+            for label, clear in (('cold cache', True), ('warm cache', False)):
+                samples = []
+                for _ in range(options['requests']):
+                    filters = rng.choice(filter_sets)
+                    if clear:
+                        cache.clear()
+                    start = time.perf_counter()
+                    search_freelancers(filters, limit=20)
+                    freelancer_facets(filters)
+                    samples.append(time.perf_counter() - start)
+                samples.sort()
+                p95 = samples[int(len(samples) * 0.95) - 1]
+                self.stdout.write(
+                    f"{label:<10} p50={statistics.median(samples) * 1000:7.2f} ms  p95={p95 * 1000:7.2f} ms"
+                )
+            transaction.set_rollback(True)
+
+    def _populate(self, size):
+        rng = random.Random(size)
+        cities = ['pune', 'mumbai', 'delhi', 'chennai', 'kochi', 'london', 'berlin', 'austin']
+        levels = ['entry', 'intermediate', 'expert']
+        statuses = ['available', 'busy', 'offline']
+        titles = ['developer', 'designer', 'data analyst', 'devops engineer', 'writer']
+        skill_names = [f'skill{i}' for i in range(300)]
+        Skill.objects.bulk_create([Skill(name=n) for n in skill_names], ignore_conflicts=True)
+        skill_ids = list(Skill.objects.filter(name__in=skill_names).values_list('id', flat=True))
+
+        start = time.perf_counter()
+        batch = 5000
+        for offset in range(0, size, batch):
+            users = User.objects.bulk_create([
+                User(username=f'bench-freelancer-{i}') for i in range(offset, min(offset + batch, size))
+            ])
+            profiles = FreelancerProfile.objects.bulk_create([
+                FreelancerProfile(
+                    user=user,
+                    full_name=f'Bench {user.username}',
+                    professional_title=rng.choice(titles),
+                    city=rng.choice(cities),
+                    experience_level=rng.choice(levels),
+                    availability_status=rng.choice(statuses),
+                )
+                for user in users
+            ])
+            FreelancerSkill.objects.bulk_create([
+                FreelancerSkill(freelancer_id=profile.id, skill_id=skill_id)
+                for profile in profiles for skill_id in rng.sample(skill_ids, 5)
+            ])
+        self.stdout.write(f"created {size} profiles in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,111 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from freelancer.search import BM25_WEIGHTS, JOB_FTS_CREATE_SQL, JOB_FTS_TABLE, sqlite_supports_fts5
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark FTS5/BM25 job search against icontains (LIKE) scans on a "
+        "throwaway SQLite database with synthetic jobs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--path', help='Database file to build (default: a temp file, removed afterwards).')
+
+    def handle(self, *args, **options):
+        path = options['path'] or tempfile.mktemp(suffix='.sqlite3', prefix='bench_job_search_')
+        db = sqlite3.connect(path)
+        try:
+            if not sqlite_supports_fts5(db.cursor()):
+                raise CommandError("This SQLite build has no FTS5 support.")
+            self._populate(db, options['jobs'])
+            self._report(db, options['repeat'])
+        finally:
+            db.close()
+            if not options['path']:
+                os.remove(path)
+
+    def _populate(self, db, size):
+        rng = random.Random(42)
+        words = [f'w{i:04d}' for i in range(5000)]
+        skills = [f'skill{i}' for i in range(200)]
+        rare_rows = set(rng.sample(range(size), min(100, size)))
+
+        db.execute("""
+            CREATE TABLE freelancer_job (
+                id INTEGER PRIMARY KEY, title TEXT, description TEXT,
+                skills_required TEXT, status TEXT
+            )
+        """)
+        start = time.perf_counter()
+        batch = []
+        for i in range(size):
+            description = ' '.join(rng.choices(words, k=40))
+            if i in rare_rows:
+                description += ' quasar'
+            batch.append((
+                i + 1,
+                ' '.join(rng.choices(words[:500], k=3)) + ' developer',
+                description,
+                ', '.join(rng.sample(skills, 3)),
+                'Open',
+            ))
+            if len(batch) == 20000:
+                db.executemany("INSERT INTO freelancer_job VALUES (?, ?, ?, ?, ?)", batch)
+                batch = []
+        db.executemany("INSERT INTO freelancer_job VALUES (?, ?, ?, ?, ?)", batch)
+        db.commit()
+        self.stdout.write(f"inserted {size} jobs in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        for statement in JOB_FTS_CREATE_SQL:
+            db.execute(statement)
+        db.commit()
+        self.stdout.write(f"built FTS5 index in {time.perf_counter() - start:.1f}s")
+
+    def _report(self, db, repeat):
+        weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+        fts_sql = f"""
+            SELECT m.id FROM (
+                SELECT rowid AS id, bm25({JOB_FTS_TABLE}, {weights}) AS rank
+                FROM {JOB_FTS_TABLE} WHERE {JOB_FTS_TABLE} MATCH ?
+            ) AS m JOIN freelancer_job AS j ON j.id = m.id
+            WHERE j.status = 'Open' ORDER BY m.rank, m.id LIMIT 20
+        """
+        like_sql = """
+            SELECT id FROM freelancer_job
+            WHERE status = 'Open'
+              AND (title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\'
+                   OR skills_required LIKE ? ESCAPE '\\')
+            ORDER BY id DESC LIMIT 20
+        """
+        cases = [
+            ('rare term', 'quasar'),
+            ('common term', 'w0007'),
+            ('skill', 'skill42'),
+        ]
+        for label, term in cases:
+            fts = self._time(repeat, lambda: db.execute(fts_sql, [f'"{term}"']).fetchall())
+            like = self._time(repeat, lambda: db.execute(like_sql, [f'%{term}%'] * 3).fetchall())
+            self.stdout.write(
+                f"{label:<12} fts5+bm25={fts * 1000:9.2f} ms  icontains={like * 1000:9.2f} ms  "
+                f"speedup={like / fts if fts else float('inf'):7.1f}x"
+            )
+
+    def _time(self, repeat, fn):
+        fn()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples)
@@ -0,0 +1,60 @@
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from freelancer.skill_extractor import SkillAutomaton
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure skill extraction throughput (MB/s) of the Aho-Corasick automaton "
+        "against one whole-word regex per skill, on synthetic text."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skills', type=int, default=2000)
+        parser.add_argument('--megabytes', type=float, default=5.0)
+        parser.add_argument('--regex-skills', type=int, default=200,
+                            help='Vocabulary size for the per-skill regex baseline (it is slow).')
+
+    def handle(self, *args, **options):
+        rng = random.Random(3)
+        vocabulary = ['python', 'django', 'go', 'c++', 'c#', 'node.js', 'react native', 'machine learning']
+        vocabulary += [f'skill{i}' for i in range(options['skills'])]
+        filler = [f'word{i}' for i in range(3000)] + ['the', 'and', 'with', 'experience', 'javascript', 'golang']
+
+        words = []
+        size = 0
+        target = int(options['megabytes'] * 1024 * 1024)
+        while size < target:
+            word = rng.choice(vocabulary) if rng.random() < 0.02 else rng.choice(filler)
+            words.append(word)
+            size += len(word) + 1
+        text = ' '.join(words)
+        megabytes = len(text.encode()) / (1024 * 1024)
+
+        start = time.perf_counter()
+        automaton = SkillAutomaton(vocabulary)
+        self.stdout.write(
+            f"built automaton: {len(automaton.patterns)} skills, {len(automaton.goto)} states "
+            f"in {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
+
+        start = time.perf_counter()
+        found = automaton.extract(text)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"aho-corasick      {megabytes / elapsed:7.2f} MB/s  ({len(found)} distinct skills, {len(vocabulary)} patterns)"
+        )
+
+        subset = vocabulary[:options['regex_skills']]
+        patterns = [re.compile(r'(?<!\w)' + re.escape(name) + r'(?!\w)') for name in subset]
+        lowered = text.lower()
+        start = time.perf_counter()
+        regex_found = [name for name, pattern in zip(subset, patterns) if pattern.search(lowered)]
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"regex per skill   {megabytes / elapsed:7.2f} MB/s  ({len(regex_found)} distinct skills, {len(subset)} patterns)"
+        )
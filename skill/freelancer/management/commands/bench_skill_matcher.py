@@ -0,0 +1,93 @@
+import random
+import re
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from freelancer.matching import SkillMatcher
+from freelancer.models import Job, JobSkill, RecruiterProfile, Skill
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark SkillMatcher against the legacy skills_required__iregex scan. "
+        "Synthetic rows are created inside a transaction that is always rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help='Comma-separated open-job table sizes to test.')
+        parser.add_argument('--postings', type=int, default=50,
+                            help='Jobs tagged with the probe skill at every size.')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        results = []
+        for size in sizes:
+            with transaction.atomic():
+                self._populate(size, options['postings'])
+                legacy = self._time(options['repeat'], lambda: Job.objects.filter(
+                    status='Open',
+                    skills_required__iregex=r'(' + re.escape('probe skill') + ')',
+                ).count())
+                indexed = self._time(options['repeat'], lambda: len(
+                    SkillMatcher.job_ids_for_skills(['probe skill'])
+                ))
+                transaction.set_rollback(True)
+            results.append((size, legacy, indexed))
+            self.stdout.write(
+                f"jobs={size:>8}  iregex={legacy * 1000:8.2f} ms  matcher={indexed * 1000:8.2f} ms"
+            )
+
+        if len(results) > 1:
+            first, last = results[0], results[-1]
+            growth = last[0] / first[0]
+            self.stdout.write(
+                f"table grew {growth:.0f}x: iregex {last[1] / first[1]:.1f}x slower, "
+                f"matcher {last[2] / first[2]:.1f}x slower"
+            )
+
+    def _time(self, repeat, fn):
+        fn()  # warm up
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples)
+
+    def _populate(self, size, postings):
+        user = User.objects.create(username=f'bench-recruiter-{size}')
+        recruiter = RecruiterProfile.objects.create(user=user, company_name='Bench Co')
+
+        vocabulary = [f'filler {i}' for i in range(200)]
+        Skill.objects.bulk_create(
+            [Skill(name=name) for name in vocabulary + ['probe skill']], ignore_conflicts=True
+        )
+        skill_ids = dict(Skill.objects.filter(
+            name__in=vocabulary + ['probe skill']
+        ).values_list('name', 'id'))
+
+        rng = random.Random(size)
+        probe_jobs = set(rng.sample(range(size), min(postings, size)))
+        deadline = time.strftime('%Y-%m-%d')
+
+        batch = 5000
+        for offset in range(0, size, batch):
+            chunk = range(offset, min(offset + batch, size))
+            tags = {i: rng.sample(vocabulary, 3) + (['probe skill'] if i in probe_jobs else [])
+                    for i in chunk}
+            jobs = Job.objects.bulk_create([
+                Job(recruiter=recruiter, title=f'Bench job {i}', description='benchmark',
+                    skills_required=', '.join(tags[i]), experience_level='Fresher',
+                    deadline=deadline)
+                for i in chunk
+            ])
+            JobSkill.objects.bulk_create([
+                JobSkill(job_id=job.id, skill_id=skill_ids[name])
+                for i, job in zip(chunk, jobs) for name in tags[i]
+            ])
@@ -0,0 +1,99 @@
+import asyncio
+import gc
+import tracemalloc
+import uuid
+
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from freelancer.consumers import ChatConsumer, NotificationConsumer, UserSocketConsumer
+from freelancer.models import ChatRoom
+
+
+class Command(BaseCommand):
+    help = (
+        "Memory held by open sockets: one notification socket plus one ChatConsumer per open "
+        "room for each user, against one multiplexed UserSocketConsumer per user subscribed to "
+        "the same rooms. Reports connections and traced memory, extrapolated to 10k users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--rooms', type=int, default=3, help='Chat rooms each user has open.')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create([
+            User(username=f'bench-user-{tag}-{i}') for i in range(options['users'])
+        ])
+        partners = User.objects.bulk_create([
+            User(username=f'bench-partner-{tag}-{i}') for i in range(options['rooms'])
+        ])
+        ChatRoom.objects.bulk_create([
+            ChatRoom(recruiter=user, freelancer=partner) for user in users for partner in partners
+        ])
+        rooms = {}
+        for room_id, user_id in ChatRoom.objects.filter(recruiter__in=users).values_list('id', 'recruiter_id'):
+            rooms.setdefault(user_id, []).append(room_id)
+        sockets = [(user, rooms[user.id]) for user in users]
+
+        self.stdout.write(f"{'layout':<28} {'connections':>11} {'memory':>10} {'per user':>10} {'per 10k users':>14}")
+        try:
+            for label, drive in (('socket per room', self._per_room), ('multiplexed socket per user', self._multiplexed)):
+                connections, used = asyncio.run(self._measure(drive, sockets))
+                per_user = used / len(sockets)
+                self.stdout.write(
+                    f"{label:<28} {connections:>11} {used / 2**20:>8.1f}MB {per_user / 2**10:>8.1f}KB "
+                    f"{per_user * 10000 / 2**20:>12.0f}MB"
+                )
+        finally:
+            User.objects.filter(id__in=[user.id for user in users + partners]).delete()
+
+    async def _measure(self, drive, sockets):
+        # Warm up first so import and query caches aren't counted against the first layout
+        get_channel_layer()
+        for communicator in await drive(sockets[:10]):
+            await communicator.disconnect()
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        communicators = await drive(sockets)
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        for communicator in communicators:
+            await communicator.disconnect()
+        return len(communicators), used
+
+    async def _connect(self, consumer, path, user, **scope):
+        communicator = WebsocketCommunicator(consumer.as_asgi(), path)
+        communicator.scope['user'] = user
+        communicator.scope.update(scope)
+        connected, _ = await communicator.connect()
+        assert connected, path
+        return communicator
+
+    async def _per_room(self, sockets):
+        communicators = []
+        for user, room_ids in sockets:
+            communicators.append(await self._connect(NotificationConsumer, f"/ws/notifications/{user.id}/", user))
+            for room_id in room_ids:
+                communicator = await self._connect(
+                    ChatConsumer, f"/ws/chat/{room_id}/", user,
+                    url_route={'kwargs': {'room_id': str(room_id)}},
+                )
+                await communicator.receive_from()  # history frame
+                communicators.append(communicator)
+        return communicators
+
+    async def _multiplexed(self, sockets):
+        communicators = []
+        for user, room_ids in sockets:
+            communicator = await self._connect(UserSocketConsumer, "/ws/socket/", user)
+            for room_id in room_ids:
+                await communicator.send_json_to({'command': 'subscribe', 'room': room_id})
+                await communicator.receive_from()  # history frame
+            communicators.append(communicator)
+        return communicators
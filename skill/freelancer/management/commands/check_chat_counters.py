@@ -0,0 +1,99 @@
+import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from freelancer.chat import mark_room_read, post_message
+from freelancer.consumers import ChatConsumer
+from freelancer.models import ChatRoom, Message
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one throwaway chat room with concurrent senders (ChatConsumer sockets "
+        "and raw worker threads) and verify the unread counters are exact."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumers', type=int, default=20)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--messages', type=int, default=25, help='Messages per consumer / thread.')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        recruiter = User.objects.create_user(f'counter-recruiter-{tag}')
+        freelancer = User.objects.create_user(f'counter-freelancer-{tag}')
+        room = ChatRoom.objects.create(recruiter=recruiter, freelancer=freelancer)
+        per_sender = options['messages']
+        try:
+            start = time.perf_counter()
+            asyncio.run(self._hammer_consumers(room, freelancer, options['consumers'], per_sender))
+            self._check(room, options['consumers'] * per_sender, 'consumers', start)
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                list(pool.map(lambda _: self._send_from_thread(room, freelancer, per_sender), range(options['threads'])))
+            expected = options['consumers'] * per_sender + options['threads'] * per_sender
+            self._check(room, expected, 'threads', start)
+
+            mark_room_read(room, recruiter.id)
+            room.refresh_from_db()
+            if room.recruiter_unread_count != 0:
+                raise CommandError(f"mark_room_read left {room.recruiter_unread_count} unread")
+            self.stdout.write(self.style.SUCCESS("unread counters exact under concurrency"))
+        finally:
+            recruiter.delete()
+            freelancer.delete()
+
+    async def _hammer_consumers(self, room, sender, consumers, per_sender):
+        sockets = []
+        for _ in range(consumers):
+            communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/{room.id}/")
+            communicator.scope['user'] = sender
+            communicator.scope['url_route'] = {'kwargs': {'room_id': str(room.id)}}
+            connected, _ = await communicator.connect()
+            if not connected:
+                raise CommandError("ChatConsumer refused the connection")
+            await communicator.receive_from()  # history frame
+            sockets.append(communicator)
+
+        async def send(communicator):
+            for i in range(per_sender):
+                await communicator.send_to(text_data=json.dumps({'message': f'ping {i}'}))
+
+        await asyncio.gather(*(send(communicator) for communicator in sockets))
+        # send_to only queues the frame; wait until every message is stored.
+        total = consumers * per_sender
+        stored = database_sync_to_async(Message.objects.filter(chat_room=room).count)
+        deadline = time.monotonic() + 60
+        while await stored() < total:
+            if time.monotonic() > deadline:
+                raise CommandError(f"only {await stored()} of {total} messages were stored")
+            await asyncio.sleep(0.05)
+        for communicator in sockets:
+            await communicator.disconnect()
+        await database_sync_to_async(close_old_connections)()
+
+    def _send_from_thread(self, room, sender, count):
+        close_old_connections()
+        try:
+            for i in range(count):
+                post_message(room, sender.id, f'thread ping {i}')
+        finally:
+            close_old_connections()
+
+    def _check(self, room, expected, label, start):
+        room.refresh_from_db()
+        self.stdout.write(
+            f"{label:<10} recruiter_unread_count={room.recruiter_unread_count} expected={expected} "
+            f"({time.perf_counter() - start:.2f}s)"
+        )
+        if room.recruiter_unread_count != expected:
+            raise CommandError(f"lost {expected - room.recruiter_unread_count} increments")
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from freelancer.recommendations import compute_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the job <-> freelancer recommendation table from TF-IDF vectors. "
+        "Meant to run periodically (e.g. hourly from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=10)
+        parser.add_argument('--min-score', type=float, default=0.05)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stats = compute_recommendations(
+            top_k_count=options['top_k'],
+            min_score=options['min_score'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['recommendations']} recommendations for {stats['jobs']} open jobs and "
+            f"{stats['freelancers']} freelancers in {time.perf_counter() - start:.2f}s"
+        ))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from freelancer.matching import refresh_scores_for_freelancer, refresh_scores_for_job
+from freelancer.models import FreelancerProfile, Job
+from freelancer.skill_extractor import get_automaton
+from freelancer.skills import sync_freelancer_skills, sync_job_skills
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-run skill extraction over every job description and freelancer bio, "
+        "e.g. after the skill vocabulary has grown."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        automaton = get_automaton()
+        self.stdout.write(f"vocabulary: {len(automaton.patterns)} skills, {len(automaton.goto)} states")
+
+        changed_jobs = 0
+        for job in Job.objects.only('id', 'skills_required', 'description').iterator(chunk_size=options['chunk_size']):
+            if sync_job_skills(job):
+                refresh_scores_for_job(job)
+                changed_jobs += 1
+
+        changed_profiles = 0
+        for profile in FreelancerProfile.objects.only('id', 'skills', 'bio').iterator(chunk_size=options['chunk_size']):
+            if sync_freelancer_skills(profile):
+                refresh_scores_for_freelancer(profile)
+                changed_profiles += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"updated {changed_jobs} jobs and {changed_profiles} profiles in {time.perf_counter() - start:.2f}s"
+        ))
@@ -0,0 +1,571 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from importlib.metadata import version
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+
+from freelancer.chat_protocol import SUBPROTOCOL_COMPACT, SUBPROTOCOL_MSGPACK, decode_frame
+from freelancer.models import ChatRoom, Message
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+SUBPROTOCOLS = {'json': None, 'compact': SUBPROTOCOL_COMPACT, 'msgpack': SUBPROTOCOL_MSGPACK}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test ChatConsumer: --rooms rooms with --clients sockets each (the room's two users "
+        "alternate), every client sending --rate messages/s for --duration seconds. Reports connect "
+        "latency, fan-out latency percentiles, messages/s, RSS and DB writes/s, and writes the "
+        "results as JSON. --mode communicator runs skill.asgi in this process; --mode raw speaks "
+        "RFC 6455 over TCP to a running server (--url), which must use the same database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['communicator', 'raw'], default='communicator')
+        parser.add_argument('--url', default='ws://127.0.0.1:8000', help='Server for --mode raw.')
+        parser.add_argument('--server-pid', type=int, help='Server process whose RSS is sampled (--mode raw).')
+        parser.add_argument('--protocol', choices=list(SUBPROTOCOLS), default='json',
+                            help='Chat wire format (see freelancer/chat_protocol.py).')
+        parser.add_argument('--deflate', action='store_true',
+                            help='Offer permessage-deflate (--mode raw; see freelancer/daphne_server.py).')
+        parser.add_argument('--rooms', type=int, default=10)
+        parser.add_argument('--clients', type=int, default=4, help='Sockets per room.')
+        parser.add_argument('--rate', type=float, default=1.0, help='Messages per second per client.')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds of sending.')
+        parser.add_argument('--drain', type=float, default=10.0, help='Seconds to wait for late deliveries.')
+        parser.add_argument('--connect-concurrency', type=int, default=50)
+        parser.add_argument('--output', help='Write the JSON results here (default: stdout).')
+
+    def handle(self, *args, **options):
+        if options['rooms'] < 1 or options['clients'] < 1 or options['rate'] <= 0:
+            raise CommandError("--rooms, --clients and --rate must be positive.")
+        fixture = self._create_fixture(options['rooms'])
+        try:
+            results = LoadTest(fixture, options).run()
+        finally:
+            Session.objects.filter(session_key__in=fixture['sessions'].values()).delete()
+            User.objects.filter(id__in=fixture['sessions']).delete()
+
+        report = {'meta': _meta(options['mode']), 'config': _config(options), 'results': results}
+        self._summary(results)
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(payload + '\n')
+            self.stdout.write(f"results written to {options['output']}")
+        else:
+            self.stdout.write(payload)
+
+    def _create_fixture(self, rooms):
+        """Users, rooms and logged-in sessions so clients go through AuthMiddlewareStack."""
+        from django.contrib.sessions.backends.db import SessionStore
+
+        tag = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create([User(username=f'loadtest-{tag}-{i}') for i in range(rooms * 2)])
+        chat_rooms = ChatRoom.objects.bulk_create([
+            ChatRoom(recruiter=users[2 * i], freelancer=users[2 * i + 1]) for i in range(rooms)
+        ])
+        sessions = {}
+        for user in users:
+            session = SessionStore()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            sessions[user.id] = session.session_key
+        return {
+            'rooms': [(room.id, room.recruiter_id, room.freelancer_id) for room in chat_rooms],
+            'sessions': sessions,
+        }
+
+    def _summary(self, results):
+        connect, fanout = results['connect_ms'], results['fanout_ms']
+        self.stdout.write(
+            f"connected {results['connected']}/{results['clients']} sockets  "
+            f"connect p50 {connect['p50']:.1f}ms p99 {connect['p99']:.1f}ms"
+        )
+        self.stdout.write(
+            f"sent {results['messages_sent']} ({results['messages_per_s']:.0f} msg/s), "
+            f"delivered {results['deliveries']}/{results['deliveries_expected']} "
+            f"({results['deliveries_per_s']:.0f}/s)  fan-out p50 {fanout['p50']:.1f}ms "
+            f"p90 {fanout['p90']:.1f}ms p99 {fanout['p99']:.1f}ms"
+        )
+        wire = results['wire']
+        self.stdout.write(
+            f"received {wire['frames']} frames, {wire['bytes']} bytes ({wire['bytes_per_delivery']:.0f} per delivery"
+            f"{', permessage-deflate' if wire['deflate'] else ''})"
+        )
+        db = results['db']
+        writes = f", {db['write_statements_per_s']:.0f} write statements/s" if db['write_statements'] is not None else ''
+        self.stdout.write(f"stored {db['messages_stored']} messages ({db['messages_stored_per_s']:.0f}/s){writes}")
+        for label, rss in results['rss_mb'].items():
+            if rss:
+                self.stdout.write(f"{label} RSS start {rss['start']:.0f}MB peak {rss['peak']:.0f}MB end {rss['end']:.0f}MB")
+
+
+class LoadTest:
+    def __init__(self, fixture, options):
+        self.fixture = fixture
+        self.options = options
+        self.connect_latencies = []
+        self.connect_failures = []
+        self.fanout_latencies = []
+        self.frames_received = 0
+        self.sent = 0
+        self.sent_per_room = {}
+        self.write_statements = 0
+        self.counting_writes = False
+
+    def run(self):
+        if self.options['mode'] == 'communicator':
+            connection_created.connect(self._install_write_counter)
+            for alias in connections:
+                if connections[alias].connection is not None:
+                    self._install_write_counter(connection=connections[alias])
+        try:
+            return asyncio.run(self._run())
+        finally:
+            connection_created.disconnect(self._install_write_counter)
+
+    # ---------------- DB writes ---------------- #
+
+    def _install_write_counter(self, sender=None, connection=None, **kwargs):
+        if self._count_writes not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self._count_writes)
+
+    def _count_writes(self, execute, sql, params, many, context):
+        if self.counting_writes and sql.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            self.write_statements += 1
+        return execute(sql, params, many, context)
+
+    # ---------------- Clients ---------------- #
+
+    def _clients(self):
+        for room_id, recruiter_id, freelancer_id in self.fixture['rooms']:
+            for index in range(self.options['clients']):
+                yield room_id, recruiter_id if index % 2 == 0 else freelancer_id
+
+    async def _open(self, room_id, user_id):
+        path = f"/ws/chat/{room_id}/"
+        cookie = f"{settings.SESSION_COOKIE_NAME}={self.fixture['sessions'][user_id]}"
+        subprotocol = SUBPROTOCOLS[self.options['protocol']]
+        if self.options['mode'] == 'raw':
+            headers = {'Cookie': cookie}
+            if subprotocol:
+                headers['Sec-WebSocket-Protocol'] = subprotocol
+            if self.options['deflate']:
+                headers['Sec-WebSocket-Extensions'] = 'permessage-deflate'
+            return await RawWebSocket.connect(self.options['url'].rstrip('/') + path, headers)
+        return await CommunicatorSocket.connect(
+            self.application, path, [(b'cookie', cookie.encode())], [subprotocol] if subprotocol else None,
+        )
+
+    async def _connect(self, room_id, user_id, semaphore):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                socket = await self._open(room_id, user_id)
+                await asyncio.wait_for(self._history(socket), timeout=30)
+            except Exception as error:
+                self.connect_failures.append(repr(error))
+                return None
+            self.connect_latencies.append(time.perf_counter() - start)
+            return room_id, socket
+
+    async def _history(self, socket):
+        # Compact protocols send a participants frame first
+        while True:
+            frame = await socket.recv()
+            if frame is None:
+                raise ConnectionError("closed before the history frame")
+            if decode_frame(frame).get('type') == 'history':
+                return
+
+    async def _receive(self, socket):
+        while True:
+            frame = await socket.recv()
+            if frame is None:
+                return
+            self.frames_received += 1
+            data = decode_frame(frame)
+            if data.get('type') == 'new_message':
+                contents = [data.get('message', '')]
+            elif data.get('type') == 'messages':
+                contents = [row[3] for row in data['messages']]  # [id, sender_id, ts, text]
+            else:
+                continue
+            now = time.time()
+            for content in contents:
+                sent_at = _sent_at(content)
+                if sent_at is not None:
+                    self.fanout_latencies.append(now - sent_at)
+
+    async def _send(self, socket, room_id, client, stop_at):
+        interval = 1 / self.options['rate']
+        await asyncio.sleep(random.uniform(0, interval))  # spread clients across the interval
+        next_send = time.perf_counter()
+        sequence = 0
+        while time.perf_counter() < stop_at:
+            await socket.send(json.dumps({'message': f"loadtest {client} {sequence} {time.time():.6f}"}))
+            self.sent += 1
+            self.sent_per_room[room_id] = self.sent_per_room.get(room_id, 0) + 1
+            sequence += 1
+            next_send += interval
+            await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+
+    # ---------------- Run ---------------- #
+
+    async def _run(self):
+        if self.options['mode'] == 'communicator':
+            from skill.asgi import application
+            self.application = application
+        rss = RSSSampler(self.options.get('server_pid') if self.options['mode'] == 'raw' else None)
+        rss.sample()
+        sampler = asyncio.create_task(rss.run())
+
+        semaphore = asyncio.Semaphore(self.options['connect_concurrency'])
+        clients = list(self._clients())
+        opened = await asyncio.gather(*(self._connect(room_id, user_id, semaphore) for room_id, user_id in clients))
+        sockets = [entry for entry in opened if entry is not None]
+        per_room = {}
+        for room_id, _ in sockets:
+            per_room[room_id] = per_room.get(room_id, 0) + 1
+        receivers = [asyncio.create_task(self._receive(socket)) for _, socket in sockets]
+
+        room_ids = [room_id for room_id, _, _ in self.fixture['rooms']]
+        stored_before = await _stored(room_ids)
+        self.counting_writes = True
+        start = time.perf_counter()
+        stop_at = start + self.options['duration']
+        senders = [
+            asyncio.create_task(self._send(socket, room_id, client, stop_at))
+            for client, (room_id, socket) in enumerate(sockets)
+        ]
+        await asyncio.gather(*senders)
+        send_elapsed = time.perf_counter() - start
+
+        # Everything sent in a room reaches every socket in it, the sender's included.
+        expected = sum(per_room[room_id] * sends for room_id, sends in self.sent_per_room.items())
+        deadline = time.perf_counter() + self.options['drain']
+        while len(self.fanout_latencies) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        stored = await _stored(room_ids) - stored_before
+        # Write-behind or a remote server may still be storing; give them the drain window too
+        while stored < self.sent and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+            stored = await _stored(room_ids) - stored_before
+        db_elapsed = time.perf_counter() - start
+        self.counting_writes = False
+
+        wire_bytes = sum(socket.bytes_received for _, socket in sockets)
+        for task in receivers:
+            task.cancel()
+        await asyncio.gather(*receivers, return_exceptions=True)
+        for _, socket in sockets:
+            await socket.close()
+        rss.stop = True
+        await sampler
+        rss.sample()
+
+        return {
+            'clients': len(clients),
+            'connected': len(sockets),
+            'connect_failures': len(self.connect_failures),
+            'connect_errors': sorted(set(self.connect_failures))[:5],
+            'connect_ms': _percentiles(self.connect_latencies),
+            'messages_sent': self.sent,
+            'messages_per_s': round(self.sent / send_elapsed, 2),
+            'deliveries': len(self.fanout_latencies),
+            'deliveries_expected': expected,
+            'deliveries_per_s': round(len(self.fanout_latencies) / elapsed, 2),
+            'fanout_ms': _percentiles(self.fanout_latencies),
+            'elapsed_s': round(elapsed, 2),
+            'wire': {
+                'frames': self.frames_received,
+                'bytes': wire_bytes,
+                'bytes_per_delivery': round(wire_bytes / max(1, len(self.fanout_latencies)), 1),
+                'deflate': any(getattr(socket, 'deflate', False) for _, socket in sockets),
+            },
+            'rss_mb': rss.report(),
+            'db': {
+                'messages_stored': stored,
+                'messages_stored_per_s': round(stored / db_elapsed, 2),
+                'write_statements': self.write_statements if self.options['mode'] == 'communicator' else None,
+                'write_statements_per_s': (
+                    round(self.write_statements / db_elapsed, 2) if self.options['mode'] == 'communicator' else None
+                ),
+            },
+        }
+
+
+class CommunicatorSocket:
+    """A WebsocketCommunicator against the in-process ASGI application; counts payload bytes."""
+
+    def __init__(self, communicator):
+        self.communicator = communicator
+        self.bytes_received = 0
+
+    @classmethod
+    async def connect(cls, application, path, headers, subprotocols=None):
+        communicator = WebsocketCommunicator(application, path, headers=headers, subprotocols=subprotocols)
+        connected, code = await communicator.connect(timeout=30)
+        if not connected:
+            raise ConnectionError(f"{path} rejected ({code})")
+        return cls(communicator)
+
+    async def send(self, text):
+        await self.communicator.send_to(text_data=text)
+
+    async def recv(self):
+        # Read the queue directly: receive_from() cancels the consumer when it times out
+        message = await self.communicator.output_queue.get()
+        if message['type'] != 'websocket.send':
+            return None
+        frame = message.get('text') or message.get('bytes')
+        self.bytes_received += len(frame.encode() if isinstance(frame, str) else frame)
+        return frame
+
+    async def close(self):
+        await self.communicator.disconnect()
+
+
+class RawWebSocket:
+    """
+    Just enough RFC 6455 for a load generator: masked frames out, ping/pong,
+    close, and permessage-deflate on received messages. Counts wire bytes.
+    """
+
+    def __init__(self, reader, writer, extensions=''):
+        self.reader = reader
+        self.writer = writer
+        self.bytes_received = 0
+        self.deflate = 'permessage-deflate' in extensions
+        self.reset_inflater = 'server_no_context_takeover' in extensions
+        self.inflater = zlib.decompressobj(-zlib.MAX_WBITS) if self.deflate else None
+
+    @classmethod
+    async def connect(cls, url, headers):
+        parts = urlsplit(url)
+        secure = parts.scheme == 'wss'
+        reader, writer = await asyncio.open_connection(
+            parts.hostname, parts.port or (443 if secure else 80), ssl=secure or None
+        )
+        key = base64.b64encode(os.urandom(16)).decode()
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+        lines = [
+            f'GET {path} HTTP/1.1',
+            f'Host: {parts.netloc}',
+            'Upgrade: websocket',
+            'Connection: Upgrade',
+            f'Sec-WebSocket-Key: {key}',
+            'Sec-WebSocket-Version: 13',
+            f"Origin: {'https' if secure else 'http'}://{parts.netloc}",
+            *(f'{name}: {value}' for name, value in headers.items()),
+        ]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+        response = await reader.readuntil(b'\r\n\r\n')
+        status = response.split(b' ', 2)[1]
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest())
+        if status != b'101' or accept not in response:
+            writer.close()
+            raise ConnectionError(f"{path} handshake failed ({status.decode()})")
+        extensions = ''
+        for line in response.decode('latin-1').split('\r\n'):
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'sec-websocket-extensions':
+                extensions = value.strip()
+        return cls(reader, writer, extensions)
+
+    def _write_frame(self, opcode, payload):
+        mask = os.urandom(4)
+        length = len(payload)
+        if length < 126:
+            header = bytes([0x80 | opcode, 0x80 | length])
+        elif length < 1 << 16:
+            header = bytes([0x80 | opcode, 0x80 | 126]) + length.to_bytes(2, 'big')
+        else:
+            header = bytes([0x80 | opcode, 0x80 | 127]) + length.to_bytes(8, 'big')
+        self.writer.write(header + mask + _mask(payload, mask))
+
+    async def send(self, text):
+        self._write_frame(0x1, text.encode())
+        await self.writer.drain()
+
+    async def recv(self):
+        """Next text (str) or binary (bytes) message; None once the server closes."""
+        chunks = []
+        kind = None
+        compressed = False
+        while True:
+            try:
+                first, second = await self.reader.readexactly(2)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return None
+            opcode = first & 0x0F
+            length = second & 0x7F
+            header = 2
+            if length == 126:
+                length = int.from_bytes(await self.reader.readexactly(2), 'big')
+                header += 2
+            elif length == 127:
+                length = int.from_bytes(await self.reader.readexactly(8), 'big')
+                header += 8
+            mask = await self.reader.readexactly(4) if second & 0x80 else None
+            payload = await self.reader.readexactly(length)
+            self.bytes_received += header + (4 if mask else 0) + length
+            if mask:
+                payload = _mask(payload, mask)
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                self._write_frame(0xA, payload)
+                continue
+            if opcode == 0xA:
+                continue
+            if opcode:
+                kind = opcode
+                compressed = bool(first & 0x40)  # RSV1: permessage-deflate
+            chunks.append(payload)
+            if first & 0x80:
+                message = b''.join(chunks)
+                if compressed:
+                    message = self.inflater.decompress(message + b'\x00\x00\xff\xff')
+                    if self.reset_inflater:
+                        self.inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+                return message.decode() if kind == 0x1 else message
+
+    async def close(self):
+        try:
+            self._write_frame(0x8, (1000).to_bytes(2, 'big'))
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+
+class RSSSampler:
+    """
+    Resident memory of this process ("local": the clients, plus the server in
+    communicator mode) and optionally of a separate server process.
+    """
+
+    def __init__(self, server_pid=None, interval=0.5):
+        self.server_pid = server_pid
+        self.interval = interval
+        self.stop = False
+        self.samples = {'local': [], 'server': []}
+
+    def sample(self):
+        self.samples['local'].append(_rss_mb(os.getpid()))
+        if self.server_pid:
+            self.samples['server'].append(_rss_mb(self.server_pid))
+
+    async def run(self):
+        while not self.stop:
+            await asyncio.sleep(self.interval)
+            self.sample()
+
+    def report(self):
+        report = {}
+        for label, values in self.samples.items():
+            values = [value for value in values if value is not None]
+            report[label] = {'start': values[0], 'peak': max(values), 'end': values[-1]} if values else None
+        report['local']['peak_lifetime'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return report
+
+
+def _mask(payload, mask):
+    length = len(payload)
+    key = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+
+
+def _rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status', encoding='ascii') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _sent_at(content):
+    parts = content.split()
+    if len(parts) != 4 or parts[0] != 'loadtest':
+        return None
+    try:
+        return float(parts[3])
+    except ValueError:
+        return None
+
+
+def _percentiles(seconds):
+    if not seconds:
+        return {'count': 0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+    values = sorted(value * 1000 for value in seconds)
+
+    def at(fraction):
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+
+    return {
+        'count': len(values),
+        'p50': round(at(0.50), 2), 'p90': round(at(0.90), 2), 'p99': round(at(0.99), 2), 'max': round(values[-1], 2),
+    }
+
+
+@sync_to_async
+def _stored(room_ids):
+    return Message.objects.filter(chat_room_id__in=room_ids).count()
+
+
+def _meta(mode):
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR,
+        ).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        'mode': mode,
+        'started': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': revision,
+        'python': platform.python_version(),
+        'django': version('django'),
+        'channels': version('channels'),
+        'database': connection.vendor,
+        'channel_layer': settings.CHANNEL_LAYERS['default']['BACKEND'],
+        'chat_write_behind': getattr(settings, 'CHAT_WRITE_BEHIND', False),
+        'cpus': os.cpu_count(),
+    }
+
+
+def _config(options):
+    keys = ('protocol', 'rooms', 'clients', 'rate', 'duration', 'drain', 'connect_concurrency')
+    config = {key: options[key] for key in keys}
+    if options['mode'] == 'raw':
+        config['url'] = options['url']
+        config['deflate'] = options['deflate']
+    return config
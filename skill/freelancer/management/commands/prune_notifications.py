@@ -0,0 +1,59 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from freelancer.models import Notification
+from freelancer.retention import database_size, prune_notifications, retention_days, vacuum
+
+
+class Command(BaseCommand):
+    help = (
+        "Enforce per-type notification retention (NOTIFICATION_RETENTION_DAYS): collapse old "
+        "read new_job alerts into per-user summaries, archive the rest, then VACUUM. "
+        "Meant to run daily (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches to let other writers in.')
+        parser.add_argument('--archive-file',
+                            help='Append archived rows to this JSONL file (.gz to compress) '
+                                 'instead of the NotificationArchive table.')
+        parser.add_argument('--no-vacuum', action='store_true')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be removed.')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            now = timezone.now()
+            for notification_type, days in retention_days().items():
+                if days is None:
+                    continue
+                count = Notification.objects.filter(
+                    notification_type=notification_type, created_at__lt=now - timedelta(days=days)
+                ).count()
+                self.stdout.write(f"{notification_type}: {count} rows older than {days} days")
+            return
+
+        size_before = database_size()
+        start = time.perf_counter()
+        stats = prune_notifications(
+            batch_size=options['batch_size'],
+            archive_file=options['archive_file'],
+            pause=options['pause'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(
+            f"removed {stats['collapsed'] + stats['archived']} notifications "
+            f"({stats['collapsed']} collapsed into {stats['summaries']} summaries, {stats['archived']} archived) "
+            f"in {stats['batches']} batches, {time.perf_counter() - start:.2f}s"
+        )
+
+        if not options['no_vacuum'] and vacuum():
+            size_after = database_size()
+            self.stdout.write(self.style.SUCCESS(
+                f"VACUUM: {size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB "
+                f"(reclaimed {(size_before - size_after) / 1e6:.1f} MB)"
+            ))
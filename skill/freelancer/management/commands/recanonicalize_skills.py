@@ -0,0 +1,100 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from freelancer.matching import refresh_scores_for_freelancer, refresh_scores_for_job
+from freelancer.models import FreelancerProfile, FreelancerSkill, Job, JobSkill, Skill
+from freelancer.skills import canonical_skill_name, clear_alias_cache, normalize_skill_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite skill text fields to canonical names and merge Skill rows that are "
+        "now aliases into their canonical skill. Rows are streamed in id-ordered chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        clear_alias_cache()
+        chunk_size = options['chunk_size']
+
+        profiles = self._rewrite(FreelancerProfile, 'skills', ('bio',), chunk_size)
+        jobs = self._rewrite(Job, 'skills_required', ('description',), chunk_size)
+        merged = self._merge_alias_skills()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"rewrote {profiles} profiles and {jobs} jobs, merged {merged} alias skills "
+            f"in {time.perf_counter() - start:.2f}s"
+        ))
+
+    def _rewrite(self, model, field, extra_fields, chunk_size):
+        changed = 0
+        last_id = 0
+        while True:
+            rows = list(
+                model.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', field, *extra_fields)[:chunk_size]
+            )
+            if not rows:
+                return changed
+            last_id = rows[-1].id
+            with transaction.atomic():
+                for obj in rows:
+                    text = getattr(obj, field)
+                    rewritten = self._canonical_text(text)
+                    if rewritten != text:
+                        setattr(obj, field, rewritten)
+                        # post_save re-syncs the skill links and match scores.
+                        obj.save(update_fields=[field])
+                        changed += 1
+
+    def _canonical_text(self, text):
+        """Replace aliased entries, keep every other entry exactly as typed."""
+        if not text:
+            return text
+        entries = []
+        seen = set()
+        dirty = False
+        for raw in text.split(','):
+            if not raw.strip():
+                continue
+            canonical = canonical_skill_name(raw)
+            if canonical in seen:
+                dirty = True
+                continue
+            seen.add(canonical)
+            if canonical == normalize_skill_name(raw):
+                entries.append(raw.strip())
+            else:
+                entries.append(canonical)
+                dirty = True
+        return ', '.join(entries) if dirty else text
+
+    def _merge_alias_skills(self):
+        merged = 0
+        for skill in list(Skill.objects.all()):
+            canonical = canonical_skill_name(skill.name)
+            if canonical == skill.name:
+                continue
+            target, _ = Skill.objects.get_or_create(name=canonical)
+            with transaction.atomic():
+                job_ids = self._move_links(JobSkill, 'job_id', skill, target)
+                freelancer_ids = self._move_links(FreelancerSkill, 'freelancer_id', skill, target)
+                skill.delete()
+            for job in Job.objects.filter(id__in=job_ids):
+                refresh_scores_for_job(job)
+            for profile in FreelancerProfile.objects.filter(id__in=freelancer_ids):
+                refresh_scores_for_freelancer(profile)
+            merged += 1
+        return merged
+
+    def _move_links(self, link_model, owner_field, skill, target):
+        owner_ids = list(link_model.objects.filter(skill=skill).values_list(owner_field, flat=True))
+        already = link_model.objects.filter(skill=target).values(owner_field)
+        link_model.objects.filter(skill=skill).exclude(**{f'{owner_field}__in': already}).update(skill=target)
+        return owner_ids
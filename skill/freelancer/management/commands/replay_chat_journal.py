@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from freelancer.message_buffer import replay_journals
+
+
+class Command(BaseCommand):
+    help = (
+        "Persist chat messages left in write-behind journals by processes that are no "
+        "longer running (CHAT_WRITE_BEHIND_JOURNAL). Journals of live processes are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--journal-dir', help='Defaults to CHAT_WRITE_BEHIND_JOURNAL.')
+
+    def handle(self, *args, **options):
+        journal_dir = options['journal_dir'] or getattr(settings, 'CHAT_WRITE_BEHIND_JOURNAL', None)
+        if not journal_dir:
+            raise CommandError("No journal directory: set CHAT_WRITE_BEHIND_JOURNAL or pass --journal-dir")
+        replayed = replay_journals(journal_dir)
+        self.stdout.write(self.style.SUCCESS(f"replayed {replayed} messages"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from freelancer.models import NotificationFanout
+from freelancer.notifications import resumable_fanout_ids, run_new_job_fanout
+
+
+class Command(BaseCommand):
+    help = (
+        "Pick up new-job notification fan-outs that never started, failed (up to "
+        "NOTIFICATION_FANOUT_MAX_ATTEMPTS runs) or stopped making progress (e.g. the "
+        "process died), and continue each from its last delivered chunk. Run it after "
+        "a deploy/restart and periodically from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list what would be resumed.')
+
+    def handle(self, *args, **options):
+        fanout_ids = resumable_fanout_ids()
+        if options['dry_run']:
+            for fanout in NotificationFanout.objects.filter(id__in=fanout_ids).order_by('id'):
+                self.stdout.write(str(fanout))
+            return
+
+        resumed = 0
+        for fanout_id in fanout_ids:
+            if run_new_job_fanout(fanout_id):
+                resumed += 1
+        finished = NotificationFanout.objects.filter(id__in=fanout_ids)
+        self.stdout.write(
+            f"Resumed {resumed} fan-outs: {finished.filter(status='done').count()} done, "
+            f"{finished.filter(status='failed').count()} failed"
+        )
@@ -0,0 +1,156 @@
+# matching.py
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Skill, FreelancerSkill, JobSkill, JobMatchScore
+from .skills import parse_skills
+
+
+class SkillMatcher:
+    """
+    Exact-token skill matching over the FreelancerSkill / JobSkill index.
+
+    Lookups resolve skill names to ids once and then walk the
+    (skill, owner) indexes, so the cost follows the number of postings
+    for the requested skills rather than the size of the tables.
+    "go" only ever matches the skill "go", never "django".
+
+    A job's requirements are its explicitly listed skills; a freelancer's
+    skills also include those extracted from their bio and resume.
+    """
+
+    @staticmethod
+    def skill_ids(skills):
+        """Accept a comma-separated string or an iterable of names and return Skill ids."""
+        if isinstance(skills, str):
+            names = parse_skills(skills)
+        else:
+            names = parse_skills(','.join(skills))
+        if not names:
+            return []
+        return list(Skill.objects.filter(name__in=names).values_list('id', flat=True))
+
+    @staticmethod
+    def freelancer_ids_for_skills(skills):
+        ids = SkillMatcher.skill_ids(skills)
+        if not ids:
+            return []
+        return list(
+            FreelancerSkill.objects.filter(skill_id__in=ids)
+            .values_list('freelancer_id', flat=True)
+            .distinct()
+        )
+
+    @staticmethod
+    def job_ids_for_skills(skills, status='Open'):
+        ids = SkillMatcher.skill_ids(skills)
+        if not ids:
+            return []
+        links = JobSkill.objects.filter(skill_id__in=ids, source='explicit')
+        if status:
+            links = links.filter(job__status=status)
+        return list(links.values_list('job_id', flat=True).distinct())
+
+    @staticmethod
+    def freelancer_ids_for_job(job):
+        """Freelancers sharing at least one skill with ``job``."""
+        return list(
+            FreelancerSkill.objects.filter(
+                skill_id__in=JobSkill.objects.filter(job=job, source='explicit').values('skill_id')
+            )
+            .values_list('freelancer_id', flat=True)
+            .distinct()
+        )
+
+    @staticmethod
+    def job_ids_for_freelancer(freelancer, status='Open'):
+        """Jobs sharing at least one skill with ``freelancer``."""
+        links = JobSkill.objects.filter(
+            skill_id__in=FreelancerSkill.objects.filter(freelancer=freelancer).values('skill_id'),
+            source='explicit',
+        )
+        if status:
+            links = links.filter(job__status=status)
+        return list(links.values_list('job_id', flat=True).distinct())
+
+    @staticmethod
+    def count_jobs_for_freelancer(freelancer, status='Open'):
+        links = JobSkill.objects.filter(
+            skill_id__in=FreelancerSkill.objects.filter(freelancer=freelancer).values('skill_id'),
+            source='explicit',
+        )
+        if status:
+            links = links.filter(job__status=status)
+        return links.values('job_id').distinct().count()
+
+
+# ---------------------------------------------
+# 📈 Precomputed match scores (JobMatchScore)
+# ---------------------------------------------
+def match_percentage(matched, total):
+    return round(matched / total * 100) if total else 0
+
+
+@transaction.atomic
+def refresh_scores_for_job(job):
+    """Recompute every JobMatchScore row for ``job`` after its skills change."""
+    job_skills = dict(
+        JobSkill.objects.filter(job=job, source='explicit').values_list('skill_id', 'skill__name')
+    )
+    JobMatchScore.objects.filter(job=job).delete()
+    if not job_skills:
+        return 0
+
+    matched = defaultdict(list)
+    for freelancer_id, skill_id in FreelancerSkill.objects.filter(
+        skill_id__in=list(job_skills)
+    ).values_list('freelancer_id', 'skill_id'):
+        matched[freelancer_id].append(job_skills[skill_id])
+
+    JobMatchScore.objects.bulk_create([
+        JobMatchScore(
+            freelancer_id=freelancer_id,
+            job=job,
+            score=match_percentage(len(names), len(job_skills)),
+            matching_skills=sorted(names),
+        )
+        for freelancer_id, names in matched.items()
+    ], batch_size=1000)
+    return len(matched)
+
+
+@transaction.atomic
+def refresh_scores_for_freelancer(freelancer):
+    """Recompute every JobMatchScore row for ``freelancer`` after their skills change."""
+    skill_names = dict(
+        FreelancerSkill.objects.filter(freelancer=freelancer).values_list('skill_id', 'skill__name')
+    )
+    JobMatchScore.objects.filter(freelancer=freelancer).delete()
+    if not skill_names:
+        return 0
+
+    matched = defaultdict(list)
+    for job_id, skill_id in JobSkill.objects.filter(
+        skill_id__in=list(skill_names), source='explicit'
+    ).values_list('job_id', 'skill_id'):
+        matched[job_id].append(skill_names[skill_id])
+
+    totals = dict(
+        JobSkill.objects.filter(
+            job_id__in=JobSkill.objects.filter(skill_id__in=list(skill_names)).values('job_id'),
+            source='explicit',
+        ).values('job_id').annotate(n=Count('id')).values_list('job_id', 'n')
+    )
+
+    JobMatchScore.objects.bulk_create([
+        JobMatchScore(
+            freelancer=freelancer,
+            job_id=job_id,
+            score=match_percentage(len(names), totals[job_id]),
+            matching_skills=sorted(names),
+        )
+        for job_id, names in matched.items()
+    ], batch_size=1000)
+    return len(matched)
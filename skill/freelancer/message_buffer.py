@@ -0,0 +1,348 @@
+# message_buffer.py
+"""
+Write-behind persistence for chat messages (CHAT_WRITE_BEHIND = True).
+
+ChatConsumer broadcasts a message as soon as it arrives and hands it to
+the process-wide MessageBuffer. The buffer writes everything it holds in
+one transaction every CHAT_WRITE_BEHIND_INTERVAL seconds, or as soon as
+CHAT_WRITE_BEHIND_BATCH messages are waiting: a single bulk_create plus
+one UPDATE per room that folds all of the room's unread counter changes
+together. After each flush the room is told the last stored id (for the
+resume protocol) and recipients get their exact unread count. Sockets
+that open a room before its messages are stored get them from
+``pending_for()``.
+
+Durability:
+
+* pending messages are flushed when the process exits normally
+  (atexit, which also covers daphne's SIGTERM shutdown);
+* with CHAT_WRITE_BEHIND_JOURNAL set to a directory, every message is
+  appended to a per-process journal before it is broadcast. Journals
+  left behind by a crashed process are replayed the next time a buffer
+  starts (or by ``manage.py replay_chat_journal``), so a process crash
+  loses nothing. Lines are handed to the OS but not fsynced, so a power
+  loss or kernel crash can still drop the last moments of chat. A crash
+  between commit and journal cleanup replays that one batch again, so
+  delivery after a crash is at-least-once.
+"""
+import asyncio
+import atexit
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ChatRoom, Message
+
+logger = logging.getLogger(__name__)
+
+
+def write_behind_enabled():
+    return getattr(settings, 'CHAT_WRITE_BEHIND', False)
+
+
+class PendingMessage:
+    __slots__ = (
+        'room_id', 'recruiter_id', 'freelancer_id', 'sender_id', 'sender', 'content', 'timestamp',
+        'key',  # tells a socket which live broadcast it already got from pending_for()
+        'id',  # the Message id once stored
+    )
+
+    def __init__(self, room_id, recruiter_id, freelancer_id, sender_id, sender, content, timestamp):
+        self.room_id = room_id
+        self.recruiter_id = recruiter_id
+        self.freelancer_id = freelancer_id
+        self.sender_id = sender_id
+        self.sender = sender
+        self.content = content
+        self.timestamp = timestamp
+        self.key = uuid.uuid4().hex
+        self.id = None
+
+    def to_json(self):
+        return json.dumps({
+            'room_id': self.room_id, 'recruiter_id': self.recruiter_id, 'freelancer_id': self.freelancer_id,
+            'sender_id': self.sender_id, 'sender': self.sender, 'content': self.content,
+            'timestamp': self.timestamp.isoformat(),
+        })
+
+    @classmethod
+    def from_json(cls, line):
+        data = json.loads(line)
+        data['timestamp'] = parse_datetime(data['timestamp'])
+        return cls(**data)
+
+
+def persist(pending):
+    """
+    Store ``pending`` messages in one transaction and return
+    ``{room_id: (last_message_id, recruiter_unread, freelancer_unread, recipient_id)}``.
+    Counter semantics match chat.post_message: each message bumps the
+    recipient's counter; the sender's is left alone. Each entry's ``id``
+    is set to its stored Message id.
+    """
+    if not pending:
+        return {}
+    rooms = {}
+    for entry in pending:
+        room = rooms.setdefault(entry.room_id, {
+            'recruiter_unread_count': 0,  # increments
+            'freelancer_unread_count': 0,
+            'last': entry,
+        })
+        recipient_field = (
+            'freelancer_unread_count' if entry.sender_id == entry.recruiter_id else 'recruiter_unread_count'
+        )
+        room[recipient_field] += 1
+        room['last'] = entry
+
+    try:
+        with transaction.atomic():
+            messages = Message.objects.bulk_create([
+                Message(
+                    chat_room_id=entry.room_id, sender_id=entry.sender_id, content=entry.content,
+                    timestamp=entry.timestamp,
+                )
+                for entry in pending
+            ])
+
+            for room_id, room in rooms.items():
+                counters = {
+                    field: F(field) + room[field]
+                    for field in ('recruiter_unread_count', 'freelancer_unread_count') if room[field]
+                }
+                ChatRoom.objects.filter(id=room_id).update(
+                    last_message=room['last'].content, last_updated=room['last'].timestamp, **counters
+                )
+            unread = {
+                row[0]: row[1:]
+                for row in ChatRoom.objects.filter(id__in=rooms).values_list(
+                    'id', 'recruiter_unread_count', 'freelancer_unread_count'
+                )
+            }
+            # Before commit: a reader that sees the rows also sees their ids here
+            for entry, message in zip(pending, messages):
+                entry.id = message.id
+    except BaseException:
+        for entry in pending:
+            entry.id = None
+        raise
+
+    last_ids = {}
+    for message in messages:
+        last_ids[message.chat_room_id] = max(last_ids.get(message.chat_room_id, 0), message.id)
+    result = {}
+    for room_id, room in rooms.items():
+        last = room['last']
+        recipient_id = last.freelancer_id if last.sender_id == last.recruiter_id else last.recruiter_id
+        result[room_id] = (last_ids.get(room_id), *unread.get(room_id, (0, 0)), recipient_id)
+    return result
+
+
+class MessageBuffer:
+    def __init__(self, interval=None, batch_size=None, journal_dir=None):
+        self.interval = interval if interval is not None else getattr(settings, 'CHAT_WRITE_BEHIND_INTERVAL', 0.01)
+        self.batch_size = batch_size or getattr(settings, 'CHAT_WRITE_BEHIND_BATCH', 200)
+        journal_dir = journal_dir if journal_dir is not None else getattr(settings, 'CHAT_WRITE_BEHIND_JOURNAL', None)
+        self.journal_dir = Path(journal_dir) if journal_dir else None
+        self._lock = threading.Lock()
+        self._pending = []
+        self._inflight = []  # batches taken by a flush and not stored yet
+        self._journal = None
+        self._journal_seq = 0
+        self._unsaved_journals = []  # journals of batches whose flush failed
+        self._flush_handle = None
+        self._flushing = None
+        if self.journal_dir:
+            self.journal_dir.mkdir(parents=True, exist_ok=True)
+            replay_journals(self.journal_dir)
+            self._journal = self._open_journal()
+        atexit.register(self.flush_sync)
+
+    # ---------------- Journal ---------------- #
+
+    def _journal_path(self, suffix):
+        return self.journal_dir / f"journal-{os.getpid()}-{self._journal_seq}.{suffix}"
+
+    def _open_journal(self):
+        return open(self._journal_path('jsonl'), 'a', encoding='utf-8')
+
+    def _rotate_journal(self):
+        """Hand the current journal to the batch being flushed; returns its path."""
+        if self._journal is None:
+            return None
+        self._journal.close()
+        path = self._journal_path('jsonl')
+        flushing = path.with_suffix('.flushing')
+        path.rename(flushing)
+        self._journal_seq += 1
+        self._journal = self._open_journal()
+        return flushing
+
+    # ---------------- Ingest ---------------- #
+
+    def add(self, room, sender_id, content):
+        """Queue a message for ``room`` (a RoomParticipants) and return its PendingMessage."""
+        entry = PendingMessage(
+            room.id, room.recruiter_id, room.freelancer_id, sender_id, room.username(sender_id), content, timezone.now()
+        )
+        with self._lock:
+            if self._journal is not None:
+                self._journal.write(entry.to_json() + '\n')
+                self._journal.flush()
+            self._pending.append(entry)
+            full = len(self._pending) >= self.batch_size
+        self._schedule(immediately=full)
+        return entry
+
+    def _schedule(self, immediately=False):
+        loop = asyncio.get_running_loop()
+        if immediately:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            if self._flushing is None or self._flushing.done():
+                self._flushing = loop.create_task(self.flush())
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.interval, self._timer_fired, loop)
+
+    def _timer_fired(self, loop):
+        self._flush_handle = None
+        if self._flushing is None or self._flushing.done():
+            self._flushing = loop.create_task(self.flush())
+        else:
+            # A flush is running; look again once the interval passes
+            self._flush_handle = loop.call_later(self.interval, self._timer_fired, loop)
+
+    def pending_for(self, room_id):
+        """Messages of ``room_id`` that may not be stored yet, oldest first."""
+        with self._lock:
+            return [
+                entry for batch in (*self._inflight, self._pending) for entry in batch if entry.room_id == room_id
+            ]
+
+    # ---------------- Flush ---------------- #
+
+    def _take(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            journals, self._unsaved_journals = self._unsaved_journals, []
+            if batch:
+                self._inflight.append(batch)
+                if self._journal is not None:
+                    journals.append(self._rotate_journal())
+        return batch, journals
+
+    def _persist_batch(self, batch, journals):
+        result = persist(batch)
+        with self._lock:
+            self._inflight.remove(batch)
+        for journal in journals:
+            journal.unlink(missing_ok=True)
+        return result
+
+    def _put_back(self, batch, journals):
+        with self._lock:
+            self._inflight.remove(batch)
+            self._pending[:0] = batch
+            self._unsaved_journals[:0] = journals
+
+    async def flush(self):
+        while True:
+            batch, journals = self._take()
+            if not batch:
+                return
+            try:
+                stored = await sync_to_async(self._persist_batch)(batch, journals)
+            except Exception:
+                logger.exception("Chat write-behind flush of %s messages failed; retrying", len(batch))
+                self._put_back(batch, journals)
+                await asyncio.sleep(self.interval)
+                continue
+            await self._announce(batch, stored)
+            if len(batch) < self.batch_size:
+                return
+
+    async def _announce(self, batch, stored):
+        channel_layer = get_channel_layer()
+        last_entry = {entry.room_id: entry for entry in batch}
+        for room_id, (last_id, recruiter_unread, freelancer_unread, recipient_id) in stored.items():
+            entry = last_entry[room_id]
+            unread = freelancer_unread if recipient_id == entry.freelancer_id else recruiter_unread
+            try:
+                await channel_layer.group_send(f'chat_{room_id}', {'type': 'chat_persisted', 'room_id': room_id, 'last_id': last_id})
+                await channel_layer.group_send(
+                    f"user_{recipient_id}_notifications",
+                    {
+                        "type": "notify_new_message",
+                        "room_id": room_id,
+                        "sender": entry.sender,
+                        "message": entry.content,
+                        "unread_count": unread,
+                    }
+                )
+            except Exception:
+                logger.exception("Announcing persisted chat messages for room %s failed", room_id)
+
+    def flush_sync(self):
+        """Write whatever is still buffered; used at interpreter exit."""
+        while True:
+            batch, journals = self._take()
+            if not batch:
+                break
+            self._persist_batch(batch, journals)
+        with self._lock:
+            if self._journal is not None and not self._unsaved_journals and not self._pending:
+                # Everything is stored; don't leave an empty journal behind
+                self._journal.close()
+                self._journal_path('jsonl').unlink(missing_ok=True)
+                self._journal = None
+
+
+def replay_journals(journal_dir):
+    """Persist messages from journals whose process is gone; returns how many were replayed."""
+    replayed = 0
+    for path in sorted(Path(journal_dir).glob('journal-*')):
+        pid = int(path.name.split('-')[1])
+        if pid != os.getpid() and _process_alive(pid):
+            continue  # still running; its own buffer will flush it
+        with open(path, encoding='utf-8') as handle:
+            pending = [PendingMessage.from_json(line) for line in handle if line.strip()]
+        persist(pending)
+        path.unlink()
+        replayed += len(pending)
+    if replayed:
+        logger.warning("Replayed %s chat messages from write-behind journals", replayed)
+    return replayed
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = MessageBuffer()
+        return _buffer
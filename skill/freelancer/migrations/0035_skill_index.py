@@ -0,0 +1,92 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _parse(text):
+    names = []
+    for raw in (text or '').split(','):
+        name = ' '.join(raw.split()).lower()[:100]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def backfill_skill_index(apps, schema_editor):
+    Skill = apps.get_model('freelancer', 'Skill')
+    FreelancerProfile = apps.get_model('freelancer', 'FreelancerProfile')
+    FreelancerSkill = apps.get_model('freelancer', 'FreelancerSkill')
+    Job = apps.get_model('freelancer', 'Job')
+    JobSkill = apps.get_model('freelancer', 'JobSkill')
+
+    skill_ids = {}
+
+    def ids_for(names):
+        missing = [n for n in names if n not in skill_ids]
+        if missing:
+            Skill.objects.bulk_create([Skill(name=n) for n in missing], ignore_conflicts=True)
+            skill_ids.update(Skill.objects.filter(name__in=missing).values_list('name', 'id'))
+        return [skill_ids[n] for n in names]
+
+    links = []
+    for pk, text in FreelancerProfile.objects.values_list('id', 'skills').iterator(chunk_size=2000):
+        links.extend(FreelancerSkill(freelancer_id=pk, skill_id=sid) for sid in ids_for(_parse(text)))
+        if len(links) >= 5000:
+            FreelancerSkill.objects.bulk_create(links, ignore_conflicts=True)
+            links = []
+    FreelancerSkill.objects.bulk_create(links, ignore_conflicts=True)
+
+    links = []
+    for pk, text in Job.objects.values_list('id', 'skills_required').iterator(chunk_size=2000):
+        links.extend(JobSkill(job_id=pk, skill_id=sid) for sid in ids_for(_parse(text)))
+        if len(links) >= 5000:
+            JobSkill.objects.bulk_create(links, ignore_conflicts=True)
+            links = []
+    JobSkill.objects.bulk_create(links, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer', '0034_remove_testimonial_client_company_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='freelancer.job')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_links', to='freelancer.skill')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['skill', 'job'], name='jobskill_skill_idx')],
+                'unique_together': {('job', 'skill')},
+            },
+        ),
+        migrations.CreateModel(
+            name='FreelancerSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('freelancer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='freelancer.freelancerprofile')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='freelancer_links', to='freelancer.skill')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['skill', 'freelancer'], name='freelancerskill_skill_idx')],
+                'unique_together': {('freelancer', 'skill')},
+            },
+        ),
+        migrations.RunPython(backfill_skill_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:49
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def backfill_match_scores(apps, schema_editor):
+    JobSkill = apps.get_model('freelancer', 'JobSkill')
+    FreelancerSkill = apps.get_model('freelancer', 'FreelancerSkill')
+    JobMatchScore = apps.get_model('freelancer', 'JobMatchScore')
+
+    freelancers_by_skill = defaultdict(list)
+    for freelancer_id, skill_id in FreelancerSkill.objects.values_list('freelancer_id', 'skill_id').iterator(chunk_size=5000):
+        freelancers_by_skill[skill_id].append(freelancer_id)
+
+    skills_by_job = defaultdict(list)
+    for job_id, skill_id, name in JobSkill.objects.values_list('job_id', 'skill_id', 'skill__name').iterator(chunk_size=5000):
+        skills_by_job[job_id].append((skill_id, name))
+
+    rows = []
+    for job_id, skills in skills_by_job.items():
+        matched = defaultdict(list)
+        for skill_id, name in skills:
+            for freelancer_id in freelancers_by_skill.get(skill_id, ()):
+                matched[freelancer_id].append(name)
+        for freelancer_id, names in matched.items():
+            rows.append(JobMatchScore(
+                job_id=job_id,
+                freelancer_id=freelancer_id,
+                score=round(len(names) / len(skills) * 100),
+                matching_skills=sorted(names),
+            ))
+        if len(rows) >= 5000:
+            JobMatchScore.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    JobMatchScore.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer', '0036_notificationfanout'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobMatchScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField(default=0)),
+                ('matching_skills', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('freelancer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='freelancer.freelancerprofile')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='freelancer.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job', 'freelancer'], name='jobmatchscore_job_idx')],
+                'unique_together': {('freelancer', 'job')},
+            },
+        ),
+        migrations.RunPython(backfill_match_scores, migrations.RunPython.noop),
+    ]
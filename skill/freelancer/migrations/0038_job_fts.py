@@ -0,0 +1,85 @@
+from django.db import migrations
+
+# A frozen copy of the job FTS5 index DDL (freelancer/search.py keeps the
+# live version); migrations must not depend on current app code.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS freelancer_job_fts USING fts5(
+        title, description, skills_required,
+        content='freelancer_job', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS freelancer_job_fts_ai AFTER INSERT ON freelancer_job BEGIN
+        INSERT INTO freelancer_job_fts(rowid, title, description, skills_required)
+        VALUES (new.id, new.title, new.description, new.skills_required);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS freelancer_job_fts_ad AFTER DELETE ON freelancer_job BEGIN
+        INSERT INTO freelancer_job_fts(freelancer_job_fts, rowid, title, description, skills_required)
+        VALUES ('delete', old.id, old.title, old.description, old.skills_required);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS freelancer_job_fts_au
+    AFTER UPDATE OF title, description, skills_required ON freelancer_job BEGIN
+        INSERT INTO freelancer_job_fts(freelancer_job_fts, rowid, title, description, skills_required)
+        VALUES ('delete', old.id, old.title, old.description, old.skills_required);
+        INSERT INTO freelancer_job_fts(rowid, title, description, skills_required)
+        VALUES (new.id, new.title, new.description, new.skills_required);
+    END
+    """,
+    "INSERT INTO freelancer_job_fts(freelancer_job_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS freelancer_job_fts_ai",
+    "DROP TRIGGER IF EXISTS freelancer_job_fts_ad",
+    "DROP TRIGGER IF EXISTS freelancer_job_fts_au",
+    "DROP TABLE IF EXISTS freelancer_job_fts",
+]
+
+
+def supports_fts5(cursor):
+    try:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        cursor.execute("CREATE VIRTUAL TABLE temp.__fts5_probe USING fts5(x)")
+        cursor.execute("DROP TABLE temp.__fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def create_job_fts(apps, schema_editor):
+    # Full-text search is an optional SQLite feature: other backends and
+    # SQLite builds without FTS5 keep using the icontains fallback.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if not supports_fts5(cursor):
+            return
+        for statement in CREATE_SQL:
+            cursor.execute(statement)
+
+
+def drop_job_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in DROP_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer', '0037_jobmatchscore'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_job_fts, drop_job_fts),
+    ]
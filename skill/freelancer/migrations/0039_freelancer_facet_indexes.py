@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer', '0038_job_fts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='freelancerprofile',
+            name='availability_status',
+            field=models.CharField(choices=[('available', 'Available'), ('busy', 'Busy'), ('offline', 'Offline')], db_index=True, default='available', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='freelancerprofile',
+            name='city',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='freelancerprofile',
+            name='experience_level',
+            field=models.CharField(blank=True, choices=[('entry', 'Entry Level (0-2 years)'), ('intermediate', 'Intermediate (2-5 years)'), ('expert', 'Expert (5+ years)')], db_index=True, max_length=50, null=True),
+        ),
+    ]
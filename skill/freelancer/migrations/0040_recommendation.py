@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer', '0039_freelancer_facet_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Recommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('job_for_freelancer', 'Job for freelancer'), ('candidate_for_job', 'Candidate for job')], max_length=20)),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField(auto_now_add=True)),
+                ('freelancer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='freelancer.freelancerprofile')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='freelancer.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['freelancer', 'kind', '-score'], name='recommendation_freelancer_idx'), models.Index(fields=['job', 'kind', '-score'], name='recommendation_job_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer', '0040_recommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='freelancerskill',
+            name='source',
+            field=models.CharField(choices=[('explicit', 'Listed'), ('extracted', 'Extracted from text'), ('resume', 'Extracted from resume')], default='explicit', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='jobskill',
+            name='source',
+            field=models.CharField(choices=[('explicit', 'Listed'), ('extracted', 'Extracted from text'), ('resume', 'Extracted from resume')], default='explicit', max_length=10),
+        ),
+    ]
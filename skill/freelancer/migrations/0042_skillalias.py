@@ -0,0 +1,60 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# canonical skill -> compact alias keys (lower-case, no spaces, dots, hyphens or underscores)
+SEED_ALIASES = {
+    'react': ['reactjs'],
+    'react native': ['reactnative'],
+    'node.js': ['nodejs', 'node'],
+    'vue': ['vuejs'],
+    'next.js': ['nextjs'],
+    'javascript': ['js', 'ecmascript', 'es6'],
+    'typescript': ['ts'],
+    'python': ['python3', 'py'],
+    'go': ['golang'],
+    'postgresql': ['postgres', 'psql'],
+    'mongodb': ['mongo'],
+    'kubernetes': ['k8s'],
+    'machine learning': ['machinelearning', 'ml'],
+    'artificial intelligence': ['artificialintelligence', 'ai'],
+    'aws': ['amazonwebservices'],
+    'c++': ['cpp'],
+    'c#': ['csharp'],
+    'html': ['html5'],
+    'css': ['css3'],
+    'ui/ux': ['uiux', 'uxui'],
+}
+
+
+def seed_aliases(apps, schema_editor):
+    Skill = apps.get_model('freelancer', 'Skill')
+    SkillAlias = apps.get_model('freelancer', 'SkillAlias')
+    for name, aliases in SEED_ALIASES.items():
+        skill, _ = Skill.objects.get_or_create(name=name)
+        for alias in aliases:
+            SkillAlias.objects.get_or_create(alias=alias, defaults={'skill': skill})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer', '0041_skill_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=100, unique=True)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='freelancer.skill')),
+            ],
+            options={
+                'verbose_name_plural': 'skill aliases',
+                'ordering': ['alias'],
+            },
+        ),
+        migrations.RunPython(seed_aliases, migrations.RunPython.noop),
+    ]
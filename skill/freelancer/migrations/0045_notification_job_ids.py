@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer', '0044_notificationarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='job_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
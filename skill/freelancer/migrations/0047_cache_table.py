@@ -0,0 +1,12 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Used to create a DatabaseCache table; the cache is file-based now.
+    # Kept (empty) so the migration graph stays intact.
+
+    dependencies = [
+        ('freelancer', '0046_message_history_index'),
+    ]
+
+    operations = []
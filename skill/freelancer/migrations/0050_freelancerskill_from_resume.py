@@ -0,0 +1,24 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+def flag_resume_rows(apps, schema_editor):
+    FreelancerSkill = apps.get_model('freelancer', 'FreelancerSkill')
+    FreelancerSkill.objects.filter(source='resume').update(from_resume=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer', '0049_notificationfanout_resume'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='freelancerskill',
+            name='from_resume',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(flag_resume_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:17
+
+import re
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copy of the message format summaries used to be parsed from.
+SUMMARY_RE = re.compile(r"^(\d+) older job alerts? \((.+?) – (.+?)\)")
+SUMMARY_DATE_FORMAT = '%b %d, %Y'
+
+
+def fill_summaries(apps, schema_editor):
+    Notification = apps.get_model('freelancer', 'Notification')
+    for notification in Notification.objects.filter(notification_type='summary', summary__isnull=True):
+        match = SUMMARY_RE.match(notification.message)
+        if not match:
+            continue
+        try:
+            first, last = (
+                timezone.make_aware(datetime.strptime(value, SUMMARY_DATE_FORMAT)) for value in match.group(2, 3)
+            )
+        except ValueError:
+            continue
+        notification.summary = {
+            'count': int(match.group(1)), 'first': first.isoformat(), 'last': last.isoformat(),
+        }
+        notification.save(update_fields=['summary'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer', '0051_notification_read_feed_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='summary',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
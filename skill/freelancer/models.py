@@ -1,6 +1,9 @@
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.utils import timezone
+import json
+import zlib
 import pytz
 
 class RecruiterProfile(models.Model):
@@ -23,7 +26,7 @@ class FreelancerProfile(models.Model):
     
     # Location & Timezone
     location = models.CharField(max_length=100, blank=True, null=True)
-    city = models.CharField(max_length=100, blank=True, null=True)  
+    city = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     
     # ADD THESE FIELDS FOR MAP FUNCTIONALITY
     latitude = models.FloatField(blank=True, null=True)
@@ -39,7 +42,7 @@ class FreelancerProfile(models.Model):
             ('intermediate', 'Intermediate (2-5 years)'),
             ('expert', 'Expert (5+ years)')
         ],
-        blank=True, null=True
+        blank=True, null=True, db_index=True
     )
     
     # Availability
@@ -50,7 +53,7 @@ class FreelancerProfile(models.Model):
             ('busy', 'Busy'),
             ('offline', 'Offline')
         ],
-        default='available'
+        default='available', db_index=True
     )
     
     # Social Links
@@ -115,6 +118,143 @@ class Job(models.Model):
         return f"{self.title} ({self.get_job_type_display()})"
 
 
+# ==========================
+# SKILL INDEX
+# ==========================
+
+class Skill(models.Model):
+    """
+    Canonical skill vocabulary. Names are stored lower-cased and trimmed,
+    the same way the views have always compared comma-separated skills.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class SkillAlias(models.Model):
+    """
+    Alternative spelling of a canonical Skill ("reactjs" -> "react").
+    ``alias`` holds the compact lookup key built by ``skills.skill_key``.
+    """
+    alias = models.CharField(max_length=100, unique=True)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='aliases')
+
+    class Meta:
+        ordering = ['alias']
+        verbose_name_plural = 'skill aliases'
+
+    def save(self, *args, **kwargs):
+        from .skills import skill_key
+        self.alias = skill_key(self.alias)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.alias} -> {self.skill}"
+
+
+SKILL_SOURCE_CHOICES = [
+    ('explicit', 'Listed'),
+    ('extracted', 'Extracted from text'),
+    ('resume', 'Extracted from resume'),
+]
+
+
+class FreelancerSkill(models.Model):
+    """Inverted index row: one per (freelancer, skill) pair."""
+    freelancer = models.ForeignKey(
+        FreelancerProfile, on_delete=models.CASCADE, related_name='skill_links'
+    )
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='freelancer_links')
+    source = models.CharField(max_length=10, choices=SKILL_SOURCE_CHOICES, default='explicit')
+    # Also found in the latest resume, whatever the (strongest) source is
+    from_resume = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ('freelancer', 'skill')
+        indexes = [
+            models.Index(fields=['skill', 'freelancer'], name='freelancerskill_skill_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.freelancer} - {self.skill}"
+
+
+class JobSkill(models.Model):
+    """Inverted index row: one per (job, skill) pair."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='skill_links')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='job_links')
+    source = models.CharField(max_length=10, choices=SKILL_SOURCE_CHOICES, default='explicit')
+
+    class Meta:
+        unique_together = ('job', 'skill')
+        indexes = [
+            models.Index(fields=['skill', 'job'], name='jobskill_skill_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job} - {self.skill}"
+
+
+class JobMatchScore(models.Model):
+    """
+    Precomputed skill overlap between a freelancer and a job. Only pairs
+    sharing at least one skill are stored; ``score`` is the percentage of
+    the job's skills the freelancer has.
+    """
+    freelancer = models.ForeignKey(
+        FreelancerProfile, on_delete=models.CASCADE, related_name='match_scores'
+    )
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='match_scores')
+    score = models.PositiveSmallIntegerField(default=0)
+    matching_skills = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('freelancer', 'job')
+        indexes = [
+            models.Index(fields=['job', 'freelancer'], name='jobmatchscore_job_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.freelancer} ↔ {self.job}: {self.score}%"
+
+
+class Recommendation(models.Model):
+    """
+    Offline TF-IDF recommendations, rebuilt by ``manage.py compute_recommendations``.
+    The same table serves both directions, told apart by ``kind``.
+    """
+    JOB_FOR_FREELANCER = 'job_for_freelancer'
+    CANDIDATE_FOR_JOB = 'candidate_for_job'
+    KIND_CHOICES = [
+        (JOB_FOR_FREELANCER, 'Job for freelancer'),
+        (CANDIDATE_FOR_JOB, 'Candidate for job'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    freelancer = models.ForeignKey(
+        FreelancerProfile, on_delete=models.CASCADE, related_name='recommendations'
+    )
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='recommendations')
+    score = models.FloatField()
+    computed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['freelancer', 'kind', '-score'], name='recommendation_freelancer_idx'),
+            models.Index(fields=['job', 'kind', '-score'], name='recommendation_job_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.freelancer} ↔ {self.job} ({self.score:.2f})"
+
+
 class Application(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications', null=True, blank=True)
     freelancer = models.ForeignKey(FreelancerProfile, on_delete=models.CASCADE, related_name='applications', null=True, blank=True)
@@ -149,6 +289,7 @@ class Notification(models.Model):
         ('new_application', 'New Application Received'),  # Added this line
         ('message', 'New Message'),
         ('system', 'System Notification'),
+        ('summary', 'Summary of Older Notifications'),
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
@@ -157,14 +298,92 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     related_job = models.ForeignKey('Job', on_delete=models.CASCADE, null=True, blank=True)
     related_application = models.ForeignKey('Application', on_delete=models.CASCADE, null=True, blank=True)
+    # new_job digests: every job merged into this notification, oldest first
+    job_ids = models.JSONField(default=list, blank=True)
+    # 'summary' notifications: {'count', 'first', 'last'} of the alerts they replaced
+    summary = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the notification center: (created_at, id) per user,
+            # optionally narrowed to one notification_type.
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_feed_idx'),
+            models.Index(fields=['user', 'notification_type', '-created_at', '-id'], name='notification_type_feed_idx'),
+            # The is_read filter (unread/read tabs) and the navbar unread count.
+            models.Index(fields=['user', 'is_read', '-created_at', '-id'], name='notification_read_feed_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.notification_type}"    
 
+    @property
+    def is_digest(self):
+        return len(self.job_ids) > 1
+
+    @property
+    def job_count(self):
+        return len(self.job_ids) or (1 if self.related_job_id else 0)
+
+class NotificationArchive(models.Model):
+    """
+    One batch of expired notifications removed by the retention job,
+    stored as zlib-compressed JSON (see ``retention.py``).
+    """
+    notification_type = models.CharField(max_length=50)
+    row_count = models.PositiveIntegerField()
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    payload = models.BinaryField()
+
+    class Meta:
+        ordering = ['-archived_at']
+
+    def rows(self):
+        return json.loads(zlib.decompress(self.payload))
+
+    def __str__(self):
+        return f"{self.notification_type} x{self.row_count} ({self.archived_at:%Y-%m-%d})"
+
+
+class NotificationFanout(models.Model):
+    """
+    Progress record for the background "new job" notification fan-out
+    started by post_job. ``last_user_id`` is the resume point: recipients
+    are delivered in user id order, so a rerun continues after it.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    job = models.ForeignKey('Job', on_delete=models.CASCADE, related_name='notification_fanouts')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    last_user_id = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Fan-out for {self.job_id}: {self.sent}/{self.total} ({self.status})"
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 100 if self.status == 'done' else 0
+        return int(self.sent * 100 / self.total)
+
 class ChatRoom(models.Model):
     recruiter = models.ForeignKey(
         User, related_name='recruiter_chats', on_delete=models.CASCADE
@@ -196,10 +415,15 @@ class Message(models.Model):
         User, on_delete=models.CASCADE, related_name='sent_messages'
     )
     content = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add, so write-behind can store when a message was sent
+    timestamp = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ('timestamp',)
+        indexes = [
+            # History pages walk a room backwards by (timestamp, id)
+            models.Index(fields=['chat_room', 'timestamp', 'id'], name='message_room_history_idx'),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.username} at {self.timestamp}"
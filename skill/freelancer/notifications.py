@@ -0,0 +1,452 @@
+# notifications.py
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q, Value
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .matching import SkillMatcher
+from .models import FreelancerProfile, Job, Notification, NotificationFanout
+from .presence import get_presence
+from .search import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='notification-fanout')
+
+# ---------------------------------------------
+# 🟢 Event loop serving this process's sockets
+# ---------------------------------------------
+# Coalesced pushes are sent from it (the in-memory channel layer is bound to it).
+_socket_loop = None
+
+
+def bind_socket_loop():
+    """Called by notification sockets on connect."""
+    global _socket_loop
+    _socket_loop = asyncio.get_running_loop()
+
+
+def notification_group(user_id):
+    return f"user_{user_id}_notifications"
+
+
+def read_state(is_read):
+    """
+    ``is_read`` filter value that can seek notification_read_feed_idx: a plain
+    bool compiles to ``NOT is_read``, which SQLite cannot match to an index.
+    """
+    return Value(bool(is_read))
+
+
+# ---------------------------------------------
+# 🔔 Navbar bell: latest notifications + unread count
+# ---------------------------------------------
+NAVBAR_NOTIFICATION_LIMIT = 10
+
+
+def _navbar_cache_key(user_id):
+    return f"notifications:navbar:{user_id}"
+
+
+def navbar_notifications(user_id):
+    """
+    ``{'latest': [...], 'unread': n}`` for the navbar bell, served from a
+    per-user cache entry that is dropped whenever the user's notifications
+    change (see ``invalidate_navbar_notifications``).
+    """
+    key = _navbar_cache_key(user_id)
+    data = cache.get(key)
+    if data is None:
+        data = {
+            'latest': list(
+                Notification.objects.filter(user_id=user_id).order_by('-created_at')[:NAVBAR_NOTIFICATION_LIMIT]
+            ),
+            'unread': Notification.objects.filter(user_id=user_id, is_read=read_state(False)).count(),
+        }
+        cache.set(key, data, getattr(settings, 'NOTIFICATION_NAVBAR_CACHE_SECONDS', 300))
+    return data
+
+
+def invalidate_navbar_notifications(user_ids):
+    """Drop the cached navbar data once the current transaction commits."""
+    keys = [_navbar_cache_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+# ---------------------------------------------
+# 📬 Notification center (keyset pagination)
+# ---------------------------------------------
+NOTIFICATIONS_PER_PAGE = 20
+
+
+def notification_filters_from(params):
+    """Pick the supported filters out of a GET QueryDict."""
+    filters = {}
+    notification_type = params.get('type')
+    if notification_type in dict(Notification.NOTIFICATION_TYPES):
+        filters['notification_type'] = notification_type
+    is_read = params.get('is_read')
+    if is_read in ('true', 'false'):
+        filters['is_read'] = read_state(is_read == 'true')
+    return filters
+
+
+def notification_page(user, filters=None, cursor=None, limit=NOTIFICATIONS_PER_PAGE):
+    """
+    One page of ``user``'s notifications, newest first, as
+    ``{'results', 'next_cursor'}``. The cursor is the (created_at, id) of the
+    last row, so every page is an index range scan regardless of how many
+    notifications the user has.
+    """
+    queryset = Notification.objects.filter(user=user, **(filters or {}))
+    position = decode_cursor(cursor, (str, int))
+    if position:
+        try:
+            created_at, last_id = parse_datetime(position[0]), int(position[1])
+        except (TypeError, ValueError, IndexError):
+            created_at = None
+        if created_at:
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=last_id)
+            )
+
+    rows = list(queryset.select_related('related_job').order_by('-created_at', '-id')[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].created_at.isoformat(), rows[-1].id])
+    return {'results': rows, 'next_cursor': next_cursor}
+
+
+def serialize_notification(notification):
+    return {
+        'id': notification.id,
+        'type': notification.notification_type,
+        'message': notification.message,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+        'related_job_id': notification.related_job_id,
+        'related_job_title': notification.related_job.title if notification.related_job_id else None,
+        'job_count': notification.job_count,
+    }
+
+
+def digest_jobs(notification):
+    """Jobs merged into a new_job digest, newest first (loaded only when a digest is opened)."""
+    job_ids = notification.job_ids or ([notification.related_job_id] if notification.related_job_id else [])
+    jobs = Job.objects.filter(id__in=job_ids).select_related('recruiter').in_bulk()
+    return [jobs[job_id] for job_id in reversed(job_ids) if job_id in jobs]
+
+
+# ---------------------------------------------
+# 📣 New-job fan-out
+# ---------------------------------------------
+def schedule_new_job_fanout(job):
+    """
+    Queue the "new job matches your skills" fan-out for ``job`` and return
+    its NotificationFanout progress record. The work starts once the
+    surrounding transaction commits, so the caller returns immediately.
+    """
+    fanout = NotificationFanout.objects.create(job=job)
+    if getattr(settings, 'NOTIFICATION_FANOUT_ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(_run_in_thread, fanout.id))
+    else:
+        transaction.on_commit(lambda: run_new_job_fanout(fanout.id))
+    return fanout
+
+
+def _run_in_thread(fanout_id):
+    close_old_connections()
+    try:
+        run_new_job_fanout(fanout_id)
+    finally:
+        close_old_connections()
+
+
+def _claimable(now):
+    """Fan-outs a runner may take over: never started, retryable failures, or abandoned."""
+    stale_before = now - timedelta(seconds=getattr(settings, 'NOTIFICATION_FANOUT_STALE_SECONDS', 300))
+    max_attempts = getattr(settings, 'NOTIFICATION_FANOUT_MAX_ATTEMPTS', 5)
+    return (
+        Q(status='pending')
+        | Q(status='failed', attempts__lt=max_attempts)
+        | Q(status='running', heartbeat_at__lt=stale_before)
+    )
+
+
+def resumable_fanout_ids():
+    """Ids of the fan-outs ``run_new_job_fanout`` would pick up right now."""
+    return list(
+        NotificationFanout.objects.filter(_claimable(timezone.now())).order_by('id').values_list('id', flat=True)
+    )
+
+
+def run_new_job_fanout(fanout_id):
+    """
+    Deliver (or resume) one fan-out. The row is claimed with a conditional
+    UPDATE, so a fan-out is only ever worked on by one runner; returns False
+    when someone else has it or it is already finished. Progress
+    (``sent``/``last_user_id``) is saved after every chunk, and a rerun
+    continues from there.
+    """
+    now = timezone.now()
+    claimed = NotificationFanout.objects.filter(_claimable(now), id=fanout_id).update(
+        status='running', heartbeat_at=now, attempts=F('attempts') + 1, error='', finished_at=None
+    )
+    if not claimed:
+        return False
+
+    fanout = NotificationFanout.objects.select_related('job').get(id=fanout_id)
+    job = fanout.job
+    chunk_size = getattr(settings, 'NOTIFICATION_FANOUT_CHUNK_SIZE', 500)
+    message = f"New job posted: {job.title} - matches your skills!"
+
+    try:
+        recipients = FreelancerProfile.objects.filter(id__in=SkillMatcher.freelancer_ids_for_job(job))
+        if fanout.last_user_id is not None:
+            recipients = recipients.filter(user_id__gt=fanout.last_user_id)
+        user_ids = list(recipients.order_by('user_id').values_list('user_id', flat=True))
+        sent = fanout.sent
+        NotificationFanout.objects.filter(id=fanout.id).update(total=sent + len(user_ids))
+
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            _deliver_chunk(job, chunk, message)
+            sent += len(chunk)
+            NotificationFanout.objects.filter(id=fanout.id).update(
+                sent=sent, last_user_id=chunk[-1], heartbeat_at=timezone.now()
+            )
+
+        NotificationFanout.objects.filter(id=fanout.id).update(status='done', finished_at=timezone.now())
+    except Exception as exc:
+        logger.exception("New-job fan-out %s failed", fanout_id)
+        NotificationFanout.objects.filter(id=fanout.id).update(
+            status='failed', error=str(exc), finished_at=timezone.now()
+        )
+    return True
+
+
+def _deliver_chunk(job, user_ids, message):
+    """``deliver_new_job`` is atomic per chunk, so a failed chunk can simply be retried."""
+    retries = getattr(settings, 'NOTIFICATION_FANOUT_RETRIES', 3)
+    for attempt in range(retries + 1):
+        try:
+            return deliver_new_job(job, user_ids, message)
+        except Exception:
+            if attempt == retries:
+                raise
+            logger.warning("New-job fan-out chunk for job %s failed, retrying", job.id, exc_info=True)
+            time.sleep(0.5 * 2 ** attempt)
+
+
+# ---------------------------------------------
+# 🗞️ new_job digests
+# ---------------------------------------------
+def digest_message(count):
+    return f"{count} new jobs match your skills"
+
+
+@contextmanager
+def _write_transaction():
+    """
+    ``transaction.atomic()`` that takes SQLite's write lock up front (BEGIN
+    IMMEDIATE), so concurrent fan-outs queue on the lock instead of merging
+    into digests they read before another fan-out wrote them. Other backends
+    lock the digest rows with select_for_update().
+    """
+    connection = transaction.get_connection()
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic():
+            yield
+        return
+    connection.ensure_connection()
+    mode = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic():
+            connection.transaction_mode = mode
+            yield
+    finally:
+        connection.transaction_mode = mode
+
+
+def deliver_new_job(job, user_ids, message):
+    """
+    Notify ``user_ids`` about ``job``. A user who already has an unread
+    new_job notification younger than NOTIFICATION_DIGEST_WINDOW gets the
+    job merged into it ("12 new jobs match your skills", re-dated to now)
+    instead of a new row; everyone else gets a fresh notification. A
+    "database is locked" error leaves nothing written, so the caller can
+    retry the chunk (see ``_deliver_chunk``).
+    """
+    window = getattr(settings, 'NOTIFICATION_DIGEST_WINDOW', 6 * 3600)
+    with _write_transaction():
+        now = timezone.now()
+        digests = {}
+        if window:
+            for notification in Notification.objects.select_for_update().filter(
+                user_id__in=user_ids,
+                notification_type='new_job',
+                is_read=read_state(False),
+                created_at__gte=now - timedelta(seconds=window),
+            ).order_by('created_at'):
+                digests[notification.user_id] = notification  # latest wins
+
+        for digest in digests.values():
+            job_ids = digest.job_ids or ([digest.related_job_id] if digest.related_job_id else [])
+            digest.job_ids = job_ids + [job.id]
+            digest.message = digest_message(len(digest.job_ids))
+            digest.created_at = now
+        Notification.objects.bulk_update(digests.values(), ['job_ids', 'message', 'created_at'])
+
+        created = Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id,
+                notification_type='new_job',
+                message=message,
+                related_job=job,
+                job_ids=[job.id],
+            )
+            for user_id in user_ids if user_id not in digests
+        ])
+
+        invalidate_navbar_notifications(user_ids)
+        queue_notification_push(created)
+        queue_notification_push(digests.values(), merged=True)
+    return len(created), len(digests)
+
+
+# ---------------------------------------------
+# ⚡ Real-time push of new Notification rows
+# ---------------------------------------------
+_push_lock = threading.Lock()
+_pending_pushes = defaultdict(list)
+_flush_scheduled = False
+
+
+def queue_notification_push(notifications, merged=False):
+    """
+    Push ``notifications`` to their owners' sockets once the current
+    transaction commits. Everything queued for the same user within
+    NOTIFICATION_PUSH_WINDOW seconds goes out as a single frame.
+    ``merged`` marks digests that were already unread, so clients update
+    them in place without bumping the unread count.
+    """
+    payloads = [
+        (
+            n.user_id,
+            {
+                'id': n.id,
+                'type': n.notification_type,
+                'message': n.message,
+                'is_read': n.is_read,
+                'related_job_id': n.related_job_id,
+                'job_count': n.job_count,
+                'merged': merged,
+            },
+        )
+        for n in notifications
+    ]
+    if payloads:
+        transaction.on_commit(lambda: _enqueue_pushes(payloads))
+
+
+def _enqueue_pushes(payloads):
+    """
+    Queue pushes on the loop that sends them (never in the calling request or
+    fan-out thread); they go through the channel layer, which delivers them
+    to whichever process holds the user's sockets.
+    """
+    global _flush_scheduled
+    loop = _push_loop()
+    with _push_lock:
+        for user_id, payload in payloads:
+            _pending_pushes[user_id].append(payload)
+        schedule = not _flush_scheduled
+        _flush_scheduled = True
+    if schedule:
+        window = getattr(settings, 'NOTIFICATION_PUSH_WINDOW', 0.25)
+        loop.call_soon_threadsafe(loop.call_later, window, lambda: loop.create_task(_flush_pushes()))
+
+
+_sender_loop = None
+
+
+def _push_loop():
+    """
+    The socket loop when this process serves sockets, otherwise a background
+    sender loop that follows presence (see ``Presence.watch``).
+    """
+    global _sender_loop
+    loop = _socket_loop
+    if loop is not None and not loop.is_closed():
+        return loop
+    with _push_lock:
+        if _sender_loop is None:
+            _sender_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sender_loop.run_forever, name='notification-push', daemon=True).start()
+            _sender_loop.call_soon_threadsafe(lambda: get_presence().watch())
+            # threading's exit hooks run before executors stop taking work, which the layer needs
+            getattr(threading, '_register_atexit', atexit.register)(_drain_pushes)
+        return _sender_loop
+
+
+def _drain_pushes():
+    """Short-lived processes (management commands) send what is still queued before exiting."""
+    if _pending_pushes and not _sender_loop.is_closed():
+        try:
+            asyncio.run_coroutine_threadsafe(_flush_pushes(), _sender_loop).result(timeout=10)
+        except Exception:
+            logger.exception("Sending queued notification pushes at exit failed")
+
+
+async def _flush_pushes():
+    """Send one coalesced frame per user queued since the last flush."""
+    global _flush_scheduled
+    with _push_lock:
+        pending = dict(_pending_pushes)
+        _pending_pushes.clear()
+        _flush_scheduled = False
+    presence = get_presence()
+    if presence.knows_online():
+        # Users without a notification socket anywhere would get nothing from the send
+        online = presence.online_user_ids()
+        pending = {user_id: items for user_id, items in pending.items() if user_id in online}
+    await _send_pushes(pending)
+
+
+async def _send_pushes(pending):
+    batch_size = getattr(settings, 'NOTIFICATION_PUSH_BATCH_SIZE', 100)
+    users = list(pending.items())
+    for start in range(0, len(users), batch_size):
+        await asyncio.gather(*(_send_push(user_id, items) for user_id, items in users[start:start + batch_size]))
+
+
+async def _send_push(user_id, items):
+    max_items = getattr(settings, 'NOTIFICATION_PUSH_MAX_ITEMS', 20)
+    try:
+        await get_channel_layer().group_send(
+            notification_group(user_id),
+            {
+                "type": "notify_notifications",
+                "notifications": items[-max_items:],
+                "count": len(items),
+                "unread_delta": sum(1 for item in items if not item['is_read'] and not item['merged']),
+            }
+        )
+    except Exception:
+        logger.exception("Notification push to user %s failed", user_id)
@@ -0,0 +1,254 @@
+# presence.py
+"""
+Who is online, fed by websocket heartbeats.
+
+Sockets that carry presence (NotificationConsumer and UserSocketConsumer)
+register here on connect. Clients send ``{"command": "heartbeat"}`` every
+25 seconds, and any other frame counts as activity too. Each process keeps
+its own online set in memory. Every PRESENCE_FLUSH_INTERVAL seconds it:
+
+* closes sockets that have been silent for PRESENCE_IDLE_TIMEOUT. These are
+  dead connections TCP hasn't noticed yet, or suspended tabs; closing them
+  frees their consumers;
+* publishes its online set to the "presence" group of the channel layer,
+  so every worker also sees users connected to the others. A worker that
+  stops publishing drops out after three intervals;
+* on one worker only (the lowest process id heard from), writes the derived
+  FreelancerProfile.availability_status. Users who came online since the
+  last flush go from offline to available, and users who left go from
+  available to offline. "busy" is the user's own choice and is left alone.
+  A process's first flush as the writer compares against every "available"
+  profile instead, so users a crashed process left available go offline.
+  It waits until it has heard every other worker's snapshot.
+
+Connects and disconnects cost no queries, and a reconnect that happens
+between two flushes is never written.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from channels.exceptions import ChannelFull
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+from .models import FreelancerProfile
+from .search import bump_freelancer_facets
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_GROUP = 'presence'
+# Close code sent to sockets reaped for silence; clients may reconnect.
+IDLE_CLOSE_CODE = 4008
+_WRITE_CHUNK = 500
+
+
+def write_availability(came_online, went_offline):
+    """Apply presence transitions to availability_status; returns the rows changed."""
+    changed = 0
+    with transaction.atomic():
+        for user_ids, old, new in ((came_online, 'offline', 'available'), (went_offline, 'available', 'offline')):
+            user_ids = list(user_ids)
+            for start in range(0, len(user_ids), _WRITE_CHUNK):
+                changed += FreelancerProfile.objects.filter(
+                    user_id__in=user_ids[start:start + _WRITE_CHUNK], availability_status=old,
+                ).update(availability_status=new)
+    if changed:
+        # update() skips post_save, which normally invalidates the facets
+        bump_freelancer_facets()
+    return changed
+
+
+def available_user_ids():
+    return set(FreelancerProfile.objects.filter(availability_status='available').values_list('user_id', flat=True))
+
+
+class Presence:
+    def __init__(self, flush_interval=None, idle_timeout=None):
+        self.flush_interval = flush_interval or getattr(settings, 'PRESENCE_FLUSH_INTERVAL', 10)
+        self.idle_timeout = idle_timeout or getattr(settings, 'PRESENCE_IDLE_TIMEOUT', 90)
+        self.process_id = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        self._sockets = {}  # channel_name -> [user_id, last seen]
+        self._users = Counter()
+        self._remote = {}  # process_id -> (heard at, user ids)
+        self._flushed = None  # online set last written; None until this process has flushed as the writer
+        self._loop = None
+        self._tasks = []
+        self._channel = None
+        self._listening_since = None
+        atexit.register(self.shutdown)
+
+    # ---------------- Sockets ---------------- #
+
+    def connected(self, user_id, channel_name):
+        with self._lock:
+            self._sockets[channel_name] = [user_id, time.monotonic()]
+            self._users[user_id] += 1
+        self._ensure_running()
+
+    def seen(self, channel_name):
+        entry = self._sockets.get(channel_name)
+        if entry is not None:
+            entry[1] = time.monotonic()
+
+    def disconnected(self, channel_name):
+        with self._lock:
+            entry = self._sockets.pop(channel_name, None)
+            if entry is None:
+                return
+            self._users[entry[0]] -= 1
+            if self._users[entry[0]] <= 0:
+                del self._users[entry[0]]
+
+    # ---------------- Online sets ---------------- #
+
+    def local_user_ids(self):
+        with self._lock:
+            return set(self._users)
+
+    def _remote_user_ids(self):
+        fresh = time.monotonic() - 3 * self.flush_interval
+        online = set()
+        for heard, user_ids in list(self._remote.values()):
+            if heard >= fresh:
+                online |= user_ids
+        return online
+
+    def online_user_ids(self):
+        """Users with a presence socket on any worker heard from recently."""
+        return self.local_user_ids() | self._remote_user_ids()
+
+    def is_online(self, user_id):
+        return user_id in self.online_user_ids()
+
+    # ---------------- Background tasks ---------------- #
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and len(self._tasks) == 2 and all(not task.done() for task in self._tasks):
+            return
+        # A new event loop (e.g. tests) gets fresh tasks bound to it.
+        self._start(loop, self._listen(), self._run())
+
+    def watch(self):
+        """
+        Follow the other workers' snapshots without serving sockets, so a
+        process that only sends notification pushes knows who is online.
+        """
+        if self._tasks and all(not task.done() for task in self._tasks):
+            return
+        self._start(asyncio.get_running_loop(), self._listen())
+
+    def _start(self, loop, *coroutines):
+        for task in self._tasks:
+            if not task.done() and not task.get_loop().is_closed():
+                task.get_loop().call_soon_threadsafe(task.cancel)
+        self._loop = loop
+        self._channel = None
+        self._listening_since = None
+        self._tasks = [loop.create_task(coroutine) for coroutine in coroutines]
+
+    def knows_online(self):
+        """Whether ``online_user_ids()`` can be trusted yet (every worker has been heard)."""
+        return self._heard_everyone()
+
+    async def _listen(self):
+        """Collect the online sets other workers publish."""
+        layer = get_channel_layer()
+        self._channel = await layer.new_channel()
+        await layer.group_add(PRESENCE_GROUP, self._channel)
+        self._listening_since = time.monotonic()
+        while True:
+            event = await layer.receive(self._channel)
+            if event.get('process') != self.process_id:
+                self._remote[event['process']] = (time.monotonic(), frozenset(event['users']))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Presence tick failed")
+
+    async def tick(self):
+        await self._reap()
+        await self._publish()
+        if not self._is_writer():
+            self._flushed = None
+        elif self._heard_everyone():
+            await self._flush()
+
+    async def _reap(self):
+        now = time.monotonic()
+        layer = get_channel_layer()
+        for channel_name, (user_id, last_seen) in list(self._sockets.items()):
+            idle = now - last_seen
+            if idle > 2 * self.idle_timeout:
+                # Its consumer never answered the reap; forget the socket anyway
+                self.disconnected(channel_name)
+            elif idle > self.idle_timeout:
+                try:
+                    await layer.send(channel_name, {'type': 'presence_reap'})
+                except ChannelFull:
+                    pass
+
+    async def _publish(self):
+        layer = get_channel_layer()
+        if self._channel is not None:
+            # Keep the membership fresh on layers that expire groups
+            await layer.group_add(PRESENCE_GROUP, self._channel)
+        await layer.group_send(PRESENCE_GROUP, {
+            'type': 'presence.snapshot',
+            'process': self.process_id,
+            'users': sorted(self.local_user_ids()),
+        })
+
+    def _heard_everyone(self):
+        # Every worker publishes once per interval
+        listening_since = self._listening_since
+        return listening_since is not None and time.monotonic() - listening_since > 1.5 * self.flush_interval
+
+    def _is_writer(self):
+        fresh = time.monotonic() - 3 * self.flush_interval
+        others = [process for process, (heard, _) in list(self._remote.items()) if heard >= fresh]
+        return self.process_id <= min(others, default=self.process_id)
+
+    async def _flush(self):
+        online = self.online_user_ids()
+        previous = self._flushed
+        if previous is None:
+            # New writer: reconcile with the table, not with what this process last wrote
+            previous = await sync_to_async(available_user_ids)()
+        came_online, went_offline = online - previous, previous - online
+        if came_online or went_offline:
+            await sync_to_async(write_availability)(came_online, went_offline)
+        self._flushed = online
+
+    def shutdown(self):
+        """At exit the writer marks users who were only connected here offline."""
+        if not self._flushed:
+            return
+        try:
+            write_availability((), self._flushed - self._remote_user_ids())
+        except Exception:
+            logger.exception("Writing presence at exit failed")
+
+
+_presence = None
+_presence_lock = threading.Lock()
+
+
+def get_presence():
+    global _presence
+    with _presence_lock:
+        if _presence is None:
+            _presence = Presence()
+        return _presence
@@ -0,0 +1,196 @@
+# recommendations.py
+"""
+Offline job <-> freelancer recommendations.
+
+Documents are turned into sparse TF-IDF vectors with a local hashing
+vectorizer (no vocabulary to fit or download), L2-normalised, and scored
+by cosine similarity. Top-k is computed in batches by multiplying a batch
+of query vectors against an inverted index (feature -> postings) of the
+other side, which is a sparse matrix product that only touches features
+the two sides share.
+"""
+import heapq
+import math
+import re
+import zlib
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import FreelancerProfile, Job, Recommendation
+from .skills import parse_skills
+
+N_FEATURES = 2 ** 20
+SKILL_WEIGHT = 3.0
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+STOP_WORDS = frozenset("""
+a an and are as at be by for from has have i in is it of on or our the this to we will with you your
+""".split())
+
+
+def _feature(token):
+    # crc32 is stable across processes, unlike hash().
+    return zlib.crc32(token.encode()) % N_FEATURES
+
+
+def term_frequencies(text, skills_text=''):
+    """Hashed term counts for free text plus boosted whole-skill features."""
+    counts = defaultdict(float)
+    for token in _TOKEN_RE.findall((text or '').lower()):
+        if token not in STOP_WORDS:
+            counts[_feature(token)] += 1.0
+    for skill in parse_skills(skills_text):
+        counts[_feature('skill:' + skill)] += SKILL_WEIGHT
+        for token in _TOKEN_RE.findall(skill):
+            counts[_feature(token)] += 1.0
+    return counts
+
+
+def job_document(job):
+    return term_frequencies(f"{job['title']} {job['description']}", job['skills_required'])
+
+
+def freelancer_document(profile):
+    return term_frequencies(
+        f"{profile['professional_title'] or ''} {profile['bio'] or ''}", profile['skills']
+    )
+
+
+def tfidf_vectors(documents, document_frequency, n_documents):
+    """Apply sublinear tf, smoothed idf and L2 normalisation in place."""
+    for vector in documents:
+        norm = 0.0
+        for feature, tf in vector.items():
+            weight = (1.0 + math.log(tf)) * (
+                math.log((1 + n_documents) / (1 + document_frequency[feature])) + 1.0
+            )
+            vector[feature] = weight
+            norm += weight * weight
+        norm = math.sqrt(norm) or 1.0
+        for feature in vector:
+            vector[feature] /= norm
+    return documents
+
+
+def build_postings(vectors):
+    postings = defaultdict(list)
+    for index, vector in enumerate(vectors):
+        for feature, weight in vector.items():
+            postings[feature].append((index, weight))
+    return postings
+
+
+def top_k(query_vectors, postings, k, min_score=0.0, batch_size=500):
+    """
+    Yield ``(query_index, [(target_index, score), ...])`` with the ``k`` best
+    cosine matches for every query vector.
+
+    Queries are scored a block of ``batch_size`` at a time: the block's
+    features are grouped first, so each postings list is looked up and
+    walked once per block (for all the block's queries that use the feature)
+    instead of once per query, and only the block's score tables are alive
+    at any time.
+    """
+    for start in range(0, len(query_vectors), batch_size):
+        block = query_vectors[start:start + batch_size]
+        block_features = defaultdict(list)
+        for offset, vector in enumerate(block):
+            for feature, weight in vector.items():
+                block_features[feature].append((offset, weight))
+
+        scores = [defaultdict(float) for _ in block]
+        for feature, queries in block_features.items():
+            targets = postings.get(feature)
+            if not targets:
+                continue
+            for offset, weight in queries:
+                accumulator = scores[offset]
+                for target, target_weight in targets:
+                    accumulator[target] += weight * target_weight
+
+        for offset, query_scores in enumerate(scores):
+            best = heapq.nlargest(k, query_scores.items(), key=lambda item: item[1])
+            yield start + offset, [(t, s) for t, s in best if s > min_score]
+
+
+def compute_recommendations(top_k_count=10, min_score=0.05, batch_size=500, write_batch=200):
+    """
+    Recompute both recommendation directions for all open jobs and profiles.
+    Rows are swapped in ``write_batch`` owners (freelancers, then jobs) per
+    transaction, so readers never see an owner half-written and the SQLite
+    write lock is only held briefly.
+    """
+    jobs = list(Job.objects.filter(status='Open').values('id', 'title', 'description', 'skills_required'))
+    profiles = list(FreelancerProfile.objects.values('id', 'professional_title', 'bio', 'skills'))
+
+    job_vectors = [job_document(job) for job in jobs]
+    profile_vectors = [freelancer_document(profile) for profile in profiles]
+
+    document_frequency = defaultdict(int)
+    for vector in job_vectors + profile_vectors:
+        for feature in vector:
+            document_frequency[feature] += 1
+    n_documents = len(job_vectors) + len(profile_vectors)
+    tfidf_vectors(job_vectors, document_frequency, n_documents)
+    tfidf_vectors(profile_vectors, document_frequency, n_documents)
+
+    jobs_for = {profile['id']: [] for profile in profiles}
+    for p_index, matches in top_k(profile_vectors, build_postings(job_vectors), top_k_count, min_score, batch_size):
+        jobs_for[profiles[p_index]['id']].extend(
+            Recommendation(
+                kind=Recommendation.JOB_FOR_FREELANCER,
+                freelancer_id=profiles[p_index]['id'],
+                job_id=jobs[j_index]['id'],
+                score=score,
+            )
+            for j_index, score in matches
+        )
+    candidates_for = {job['id']: [] for job in jobs}
+    for j_index, matches in top_k(job_vectors, build_postings(profile_vectors), top_k_count, min_score, batch_size):
+        candidates_for[jobs[j_index]['id']].extend(
+            Recommendation(
+                kind=Recommendation.CANDIDATE_FOR_JOB,
+                freelancer_id=profiles[p_index]['id'],
+                job_id=jobs[j_index]['id'],
+                score=score,
+            )
+            for p_index, score in matches
+        )
+
+    written = _swap_rows(Recommendation.JOB_FOR_FREELANCER, 'freelancer_id', jobs_for, write_batch)
+    written += _swap_rows(Recommendation.CANDIDATE_FOR_JOB, 'job_id', candidates_for, write_batch)
+    # Jobs closed since the last run have no owner entry above
+    Recommendation.objects.filter(kind=Recommendation.CANDIDATE_FOR_JOB).exclude(job__status='Open').delete()
+    return {'jobs': len(jobs), 'freelancers': len(profiles), 'recommendations': written}
+
+
+def _swap_rows(kind, owner_field, rows_by_owner, write_batch):
+    owners = list(rows_by_owner)
+    written = 0
+    for start in range(0, len(owners), write_batch):
+        chunk = owners[start:start + write_batch]
+        rows = [row for owner in chunk for row in rows_by_owner[owner]]
+        with transaction.atomic():
+            Recommendation.objects.filter(kind=kind, **{f'{owner_field}__in': chunk}).delete()
+            Recommendation.objects.bulk_create(rows, batch_size=2000)
+        written += len(rows)
+    return written
+
+
+def jobs_for_freelancer(freelancer, limit=5):
+    return (
+        Recommendation.objects.filter(
+            freelancer=freelancer, kind=Recommendation.JOB_FOR_FREELANCER, job__status='Open',
+        )
+        .select_related('job__recruiter')
+        .order_by('-score')[:limit]
+    )
+
+
+def candidates_for_job(job, limit=5):
+    return (
+        Recommendation.objects.filter(job=job, kind=Recommendation.CANDIDATE_FOR_JOB)
+        .select_related('freelancer__user')
+        .order_by('-score')[:limit]
+    )
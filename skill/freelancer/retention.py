@@ -0,0 +1,223 @@
+# retention.py
+"""
+Notification retention.
+
+``prune_notifications()`` is the scheduler hook (cron, Celery beat, ...);
+``manage.py prune_notifications`` wraps it. Rows older than the per-type
+NOTIFICATION_RETENTION_DAYS are processed in small id-ordered batches,
+each in its own short transaction so SQLite is never locked for long:
+
+* read ``new_job`` alerts are collapsed into one "summary" notification
+  per user (the count and date range are kept in its ``summary`` field,
+  the rows are dropped). Later runs fold into the same summary, which is
+  dated by the newest alert it covers and is written with update() so it
+  fires no push;
+* everything else is archived, either into NotificationArchive as
+  zlib-compressed JSON or appended to a JSONL file, and then deleted.
+"""
+import gzip
+import json
+import time
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Notification, NotificationArchive
+from .notifications import invalidate_navbar_notifications
+
+SUMMARY_DATE_FORMAT = '%b %d, %Y'
+
+ARCHIVE_FIELDS = (
+    'id', 'user_id', 'notification_type', 'message', 'is_read',
+    'related_job_id', 'related_application_id', 'job_ids', 'summary', 'created_at',
+)
+
+
+def retention_days():
+    """Days to keep each notification type, from NOTIFICATION_RETENTION_DAYS (None: forever)."""
+    days = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', {})
+    return {
+        notification_type: days.get(notification_type, days.get('default'))
+        for notification_type, _ in Notification.NOTIFICATION_TYPES
+    }
+
+
+def prune_notifications(batch_size=1000, archive_file=None, pause=0.0, now=None, stdout=None):
+    """
+    Enforce retention for every notification type and return a stats dict:
+    ``{'collapsed', 'archived', 'summaries', 'batches', 'by_type'}``.
+    """
+    now = now or timezone.now()
+    stats = {'collapsed': 0, 'archived': 0, 'summaries': 0, 'batches': 0, 'by_type': {}}
+    summaries = {}
+    archive = _open_archive_file(archive_file) if archive_file else None
+    try:
+        for notification_type, days in retention_days().items():
+            if days is None:
+                continue
+            cutoff = now - timedelta(days=days)
+            expired = Notification.objects.filter(notification_type=notification_type, created_at__lt=cutoff)
+            removed = 0
+            if notification_type == 'new_job':
+                for batch in _batches(expired.filter(is_read=True), batch_size):
+                    removed += _collapse_batch(batch, summaries)
+                    stats['batches'] += 1
+                    time.sleep(pause)
+                stats['collapsed'] += removed
+            archived = 0
+            for batch in _batches(expired, batch_size):
+                archived += _archive_batch(batch, notification_type, archive)
+                stats['batches'] += 1
+                time.sleep(pause)
+            stats['archived'] += archived
+            if removed or archived:
+                stats['by_type'][notification_type] = removed + archived
+                if stdout:
+                    stdout.write(f"{notification_type}: {removed} collapsed, {archived} archived (older than {days} days)")
+    finally:
+        if archive:
+            archive.close()
+    stats['summaries'] = len(summaries)
+    return stats
+
+
+def _batches(queryset, batch_size):
+    """Yield lists of expired rows, oldest id first, until none are left."""
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not batch:
+            return
+        last_id = batch[-1].id
+        yield batch
+
+
+def _summary_message(first, last, count):
+    return (
+        f"{count} older job alert{'s' if count != 1 else ''} "
+        f"({first:{SUMMARY_DATE_FORMAT}} – {last:{SUMMARY_DATE_FORMAT}}) were cleaned up."
+    )
+
+
+def _summary_state(summary):
+    """(first, last, count) from a summary's ``summary`` field, or None."""
+    try:
+        first, last = parse_datetime(summary['first']), parse_datetime(summary['last'])
+        count = int(summary['count'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if first is None or last is None:
+        return None
+    return first, last, count
+
+
+def _load_summaries(user_ids, summaries):
+    """
+    Pick up the summaries earlier runs left for ``user_ids``. Extra summaries
+    for the same user are folded into the oldest one and returned for deletion.
+    """
+    duplicates = []
+    rows = Notification.objects.filter(
+        user_id__in=[user_id for user_id in user_ids if user_id not in summaries], notification_type='summary',
+    ).order_by('id')
+    for row_id, user_id, summary in rows.values_list('id', 'user_id', 'summary'):
+        state = _summary_state(summary)
+        if state is None:
+            continue
+        if user_id in summaries:
+            summary_id, first, last, count = summaries[user_id]
+            summaries[user_id] = (summary_id, min(first, state[0]), max(last, state[1]), count + state[2])
+            duplicates.append(row_id)
+        else:
+            summaries[user_id] = (row_id,) + state
+    return duplicates
+
+
+def _collapse_batch(batch, summaries):
+    """Fold read new_job alerts into one summary notification per user."""
+    per_user = {}
+    for notification in batch:
+        first, last, count = per_user.get(notification.user_id, (notification.created_at, notification.created_at, 0))
+        per_user[notification.user_id] = (
+            min(first, notification.created_at), max(last, notification.created_at),
+            count + max(notification.job_count, 1),  # a digest stands for several alerts
+        )
+
+    with transaction.atomic():
+        stale = _load_summaries(per_user, summaries)
+        for user_id, (first, last, count) in per_user.items():
+            summary_id = None
+            if user_id in summaries:
+                summary_id, old_first, old_last, old_count = summaries[user_id]
+                first, last, count = min(first, old_first), max(last, old_last), count + old_count
+            if summary_id is None:
+                # bulk_create() and update() send no post_save, so no push goes out
+                summary_id = Notification.objects.bulk_create([
+                    Notification(user_id=user_id, notification_type='summary', is_read=True)
+                ])[0].id
+            Notification.objects.filter(id=summary_id).update(
+                message=_summary_message(first, last, count),
+                summary={'count': count, 'first': first.isoformat(), 'last': last.isoformat()},
+                created_at=last,
+            )
+            summaries[user_id] = (summary_id, first, last, count)
+        Notification.objects.filter(id__in=[n.id for n in batch] + stale).delete()
+        invalidate_navbar_notifications(per_user)
+    return len(batch)
+
+
+def _archive_batch(batch, notification_type, archive):
+    rows = [
+        {field: _jsonable(getattr(notification, field)) for field in ARCHIVE_FIELDS}
+        for notification in batch
+    ]
+    with transaction.atomic():
+        if archive:
+            for row in rows:
+                archive.write(json.dumps(row) + '\n')
+            archive.flush()
+        else:
+            NotificationArchive.objects.create(
+                notification_type=notification_type,
+                row_count=len(rows),
+                first_created_at=min(n.created_at for n in batch),
+                last_created_at=max(n.created_at for n in batch),
+                payload=zlib.compress(json.dumps(rows).encode(), 9),
+            )
+        Notification.objects.filter(id__in=[n.id for n in batch]).delete()
+        invalidate_navbar_notifications(n.user_id for n in batch)
+    return len(batch)
+
+
+def _jsonable(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _open_archive_file(path):
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'at', encoding='utf-8')
+    return open(path, 'a', encoding='utf-8')
+
+
+def database_size():
+    """Bytes used by the SQLite database file (0 on other backends)."""
+    if connection.vendor != 'sqlite':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA page_count')
+        page_count = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        return page_count * cursor.fetchone()[0]
+
+
+def vacuum():
+    """Rebuild the SQLite file to return freed pages to the filesystem."""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+    return True
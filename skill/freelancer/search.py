@@ -0,0 +1,342 @@
+# search.py
+import base64
+import hashlib
+import html
+import json
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q
+from django.urls import reverse
+
+from .matching import SkillMatcher
+from .models import FreelancerProfile, FreelancerSkill, Job
+
+JOB_FTS_TABLE = 'freelancer_job_fts'
+
+# External-content FTS5 index over freelancer_job, kept in sync by triggers so
+# bulk_create/update() paths are covered as well as Model.save(). Migration
+# 0038 creates it from a frozen copy of these statements.
+JOB_FTS_CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {JOB_FTS_TABLE} USING fts5(
+        title, description, skills_required,
+        content='freelancer_job', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {JOB_FTS_TABLE}_ai AFTER INSERT ON freelancer_job BEGIN
+        INSERT INTO {JOB_FTS_TABLE}(rowid, title, description, skills_required)
+        VALUES (new.id, new.title, new.description, new.skills_required);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {JOB_FTS_TABLE}_ad AFTER DELETE ON freelancer_job BEGIN
+        INSERT INTO {JOB_FTS_TABLE}({JOB_FTS_TABLE}, rowid, title, description, skills_required)
+        VALUES ('delete', old.id, old.title, old.description, old.skills_required);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {JOB_FTS_TABLE}_au
+    AFTER UPDATE OF title, description, skills_required ON freelancer_job BEGIN
+        INSERT INTO {JOB_FTS_TABLE}({JOB_FTS_TABLE}, rowid, title, description, skills_required)
+        VALUES ('delete', old.id, old.title, old.description, old.skills_required);
+        INSERT INTO {JOB_FTS_TABLE}(rowid, title, description, skills_required)
+        VALUES (new.id, new.title, new.description, new.skills_required);
+    END
+    """,
+    f"INSERT INTO {JOB_FTS_TABLE}({JOB_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+# Title matches weigh most, then skills, then the description body.
+BM25_WEIGHTS = (10.0, 1.0, 5.0)
+
+_MARK_START, _MARK_END = '\x02', '\x03'
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_fts5_ready = None
+
+
+def sqlite_supports_fts5(cursor):
+    """True if the SQLite library behind ``cursor`` was compiled with FTS5."""
+    try:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        cursor.execute("CREATE VIRTUAL TABLE temp.__fts5_probe USING fts5(x)")
+        cursor.execute("DROP TABLE temp.__fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def fts5_available():
+    """True once the job FTS5 index exists on the default database (cached per process)."""
+    global _fts5_ready
+    if _fts5_ready is None:
+        if connection.vendor != 'sqlite':
+            _fts5_ready = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [JOB_FTS_TABLE]
+                )
+                _fts5_ready = cursor.fetchone() is not None
+    return _fts5_ready
+
+
+def query_terms(query):
+    return [t.lower() for t in _TOKEN_RE.findall(query or '')][:10]
+
+
+def _fts_match_expression(terms):
+    # Every term must appear; the last one also matches as a prefix so
+    # results show up while the user is still typing.
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _render_marks(text):
+    """HTML-escape ``text`` and turn the private highlight markers into <mark> tags."""
+    return (
+        html.escape(text or '')
+        .replace(_MARK_START, '<mark>')
+        .replace(_MARK_END, '</mark>')
+    )
+
+
+def _highlight_terms(text, terms, limit=None):
+    text = text or ''
+    if limit and len(text) > limit:
+        text = text[:limit].rsplit(' ', 1)[0] + '…'
+    if terms:
+        pattern = re.compile('|'.join(re.escape(t) for t in terms), re.IGNORECASE)
+        text = pattern.sub(lambda m: _MARK_START + m.group(0) + _MARK_END, text)
+    return _render_marks(text)
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, shape):
+    """
+    The values packed by encode_cursor(), or None unless they are a list
+    matching ``shape``, a tuple of types (``float`` also accepts ints).
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(shape):
+        return None
+    for value, kind in zip(values, shape):
+        if isinstance(value, bool) or not isinstance(value, (int, float) if kind is float else kind):
+            return None
+    return values
+
+
+def search_jobs(query, cursor=None, limit=20, status='Open'):
+    """
+    Ranked keyword search over open jobs.
+
+    Returns ``{'engine', 'results', 'next_cursor'}``. Uses the FTS5 index with
+    BM25 ranking when available and falls back to ``icontains`` filtering
+    (newest first) otherwise. Cursors are opaque strings from a previous call.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return {'engine': 'none', 'results': [], 'next_cursor': None}
+    if fts5_available():
+        return _search_jobs_fts(terms, decode_cursor(cursor, (float, int)), limit, status)
+    return _search_jobs_icontains(terms, decode_cursor(cursor, (int,)), limit, status)
+
+
+def _search_jobs_fts(terms, cursor, limit, status):
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    params = [_fts_match_expression(terms)]
+    where = ["j.status = %s"]
+    params_outer = [status]
+    if cursor:
+        where.append("(m.rank > %s OR (m.rank = %s AND m.id > %s))")
+        params_outer += [cursor[0], cursor[0], cursor[1]]
+
+    sql = f"""
+        SELECT m.id, m.rank, m.title_hl, m.snippet, j.skills_required, j.job_type,
+               j.created_at, r.company_name
+        FROM (
+            SELECT rowid AS id,
+                   bm25({JOB_FTS_TABLE}, {weights}) AS rank,
+                   highlight({JOB_FTS_TABLE}, 0, %s, %s) AS title_hl,
+                   snippet({JOB_FTS_TABLE}, 1, %s, %s, '…', 24) AS snippet
+            FROM {JOB_FTS_TABLE}
+            WHERE {JOB_FTS_TABLE} MATCH %s
+        ) AS m
+        JOIN freelancer_job AS j ON j.id = m.id
+        JOIN freelancer_recruiterprofile AS r ON r.id = j.recruiter_id
+        WHERE {' AND '.join(where)}
+        ORDER BY m.rank, m.id
+        LIMIT %s
+    """
+    marks = [_MARK_START, _MARK_END]
+    with connection.cursor() as c:
+        c.execute(sql, marks + marks + params + params_outer + [limit + 1])
+        rows = c.fetchall()
+
+    results = [
+        {
+            'id': row[0],
+            'score': round(-row[1], 4),
+            'title_html': _render_marks(row[2]),
+            'snippet_html': _render_marks(row[3]),
+            'skills_required': row[4],
+            'job_type': row[5],
+            'company': row[7],
+            'url': reverse('apply_job', args=[row[0]]),
+        }
+        for row in rows[:limit]
+    ]
+    next_cursor = encode_cursor([rows[limit - 1][1], rows[limit - 1][0]]) if len(rows) > limit else None
+    return {'engine': 'fts5', 'results': results, 'next_cursor': next_cursor}
+
+
+def _search_jobs_icontains(terms, cursor, limit, status):
+    jobs = Job.objects.filter(status=status).select_related('recruiter')
+    for term in terms:
+        jobs = jobs.filter(
+            Q(title__icontains=term) | Q(description__icontains=term) | Q(skills_required__icontains=term)
+        )
+    if cursor:
+        jobs = jobs.filter(id__lt=cursor[0])
+    rows = list(jobs.order_by('-id')[:limit + 1])
+
+    results = [
+        {
+            'id': job.id,
+            'score': None,
+            'title_html': _highlight_terms(job.title, terms),
+            'snippet_html': _highlight_terms(job.description, terms, limit=200),
+            'skills_required': job.skills_required,
+            'job_type': job.job_type,
+            'company': job.recruiter.company_name,
+            'url': reverse('apply_job', args=[job.id]),
+        }
+        for job in rows[:limit]
+    ]
+    next_cursor = encode_cursor([rows[limit - 1].id]) if len(rows) > limit else None
+    return {'engine': 'icontains', 'results': results, 'next_cursor': next_cursor}
+
+
+# ---------------------------------------------
+# 🔎 Recruiter freelancer search + facets
+# ---------------------------------------------
+FREELANCER_FACET_FIELDS = ('experience_level', 'availability_status', 'city')
+FREELANCER_FILTER_FIELDS = ('q', 'experience_level', 'availability_status', 'city', 'skills')
+_FACET_VERSION_KEY = 'freelancer_facets:version'
+
+
+def freelancer_filters_from(params):
+    """Pick the supported, non-empty search filters out of a QueryDict/dict."""
+    return {
+        name: params.get(name, '').strip()
+        for name in FREELANCER_FILTER_FIELDS
+        if params.get(name, '').strip()
+    }
+
+
+def filtered_freelancers(filters):
+    profiles = FreelancerProfile.objects.all()
+    if filters.get('q'):
+        profiles = profiles.filter(
+            Q(full_name__icontains=filters['q']) | Q(professional_title__icontains=filters['q'])
+        )
+    for field in ('experience_level', 'availability_status'):
+        if filters.get(field):
+            profiles = profiles.filter(**{field: filters[field]})
+    if filters.get('city'):
+        profiles = profiles.filter(city__iexact=filters['city'])
+    if filters.get('skills'):
+        skill_ids = SkillMatcher.skill_ids(filters['skills'])
+        if not skill_ids:
+            return profiles.none()
+        # Every requested skill must be present.
+        for skill_id in skill_ids:
+            profiles = profiles.filter(
+                id__in=FreelancerSkill.objects.filter(skill_id=skill_id).values('freelancer_id')
+            )
+    return profiles
+
+
+def bump_freelancer_facets():
+    """Invalidate every cached facet result (called when faceted data changes)."""
+    try:
+        cache.incr(_FACET_VERSION_KEY)
+    except ValueError:
+        cache.set(_FACET_VERSION_KEY, 2, None)
+
+
+def freelancer_facets(filters):
+    """
+    Facet counts for the current filter set, served from the cache. Entries
+    are keyed by a version number that changes whenever a profile's faceted
+    fields or skills change, so stale counts are never returned.
+    """
+    version = cache.get_or_set(_FACET_VERSION_KEY, 1, None)
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+    key = f'freelancer_facets:{version}:{digest}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = _compute_freelancer_facets(filters)
+        cache.set(key, facets, getattr(settings, 'FREELANCER_FACET_CACHE_SECONDS', 300))
+    return facets
+
+
+def _compute_freelancer_facets(filters):
+    profiles = filtered_freelancers(filters)
+    facets = {}
+    for field in FREELANCER_FACET_FIELDS:
+        rows = (
+            profiles.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+            .values(field).annotate(count=Count('id')).order_by('-count', field)
+        )
+        facets[field] = [{'value': row[field], 'count': row['count']} for row in rows[:20]]
+    skill_links = FreelancerSkill.objects.all()
+    if filters:
+        skill_links = skill_links.filter(freelancer__in=profiles.values('id'))
+    skill_rows = (
+        skill_links.values('skill__name').annotate(count=Count('id')).order_by('-count', 'skill__name')[:15]
+    )
+    facets['skills'] = [{'value': row['skill__name'], 'count': row['count']} for row in skill_rows]
+    return facets
+
+
+def search_freelancers(filters, cursor=None, limit=20):
+    """Newest-first freelancer hits for ``filters`` with an id keyset cursor."""
+    profiles = filtered_freelancers(filters).select_related('user')
+    position = decode_cursor(cursor, (int,))
+    if position:
+        profiles = profiles.filter(id__lt=position[0])
+    rows = list(profiles.order_by('-id')[:limit + 1])
+
+    results = [
+        {
+            'id': profile.id,
+            'name': profile.full_name or profile.user.username,
+            'professional_title': profile.professional_title or '',
+            'city': profile.city or '',
+            'experience_level': profile.experience_level or '',
+            'availability_status': profile.availability_status,
+            'skills': profile.get_skills_list(),
+            'profile_url': reverse('view_freelancer_profile', args=[profile.id]),
+            'profile_picture': profile.profile_picture.url if profile.profile_picture else None,
+        }
+        for profile in rows[:limit]
+    ]
+    next_cursor = encode_cursor([rows[limit - 1].id]) if len(rows) > limit else None
+    return {'results': results, 'next_cursor': next_cursor}
@@ -99,3 +99,96 @@ def calculate_profile_completion(freelancer):
     filled = sum(1 for field in fields if field)
     return int((filled / len(fields)) * 100)
 
+
+
+# ---------------------------------------------
+# 🧩 Keep the skill index in sync with the text fields
+# ---------------------------------------------
+from django.db.models.signals import post_delete
+from .models import Job
+from .skills import sync_freelancer_skills, sync_job_skills
+from .matching import refresh_scores_for_freelancer, refresh_scores_for_job
+
+
+def _skills_touched(update_fields, *field_names):
+    return update_fields is None or bool(set(field_names) & set(update_fields))
+
+
+@receiver(post_save, sender=FreelancerProfile)
+def index_freelancer_skills(sender, instance, update_fields=None, **kwargs):
+    if _skills_touched(update_fields, 'skills', 'bio'):
+        if sync_freelancer_skills(instance):
+            refresh_scores_for_freelancer(instance)
+
+
+@receiver(post_save, sender=Job)
+def index_job_skills(sender, instance, update_fields=None, **kwargs):
+    if _skills_touched(update_fields, 'skills_required', 'description'):
+        if sync_job_skills(instance):
+            refresh_scores_for_job(instance)
+
+
+from .models import Skill
+from .skill_extractor import invalidate_automaton
+
+
+@receiver(post_save, sender=Skill)
+def rebuild_skill_automaton_on_save(sender, instance, created, **kwargs):
+    # A new skill has no explicit uses yet, so it cannot be in the vocabulary;
+    # an edit may be a rename of one that is.
+    if not created:
+        invalidate_automaton()
+
+
+@receiver(post_delete, sender=Skill)
+def rebuild_skill_automaton_on_delete(sender, instance, **kwargs):
+    invalidate_automaton(instance.name)
+
+
+from .models import SkillAlias
+from .skills import clear_alias_cache
+
+
+@receiver(post_save, sender=SkillAlias)
+@receiver(post_delete, sender=SkillAlias)
+def reset_skill_aliases(sender, **kwargs):
+    clear_alias_cache()
+
+
+# ---------------------------------------------
+# 🔎 Invalidate cached freelancer search facets
+# ---------------------------------------------
+from .search import bump_freelancer_facets
+
+_FACETED_FIELDS = {'experience_level', 'availability_status', 'city', 'skills', 'bio'}
+
+
+@receiver(post_save, sender=FreelancerProfile)
+def invalidate_facets_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or _FACETED_FIELDS & set(update_fields):
+        bump_freelancer_facets()
+
+
+@receiver(post_delete, sender=FreelancerProfile)
+def invalidate_facets_on_delete(sender, instance, **kwargs):
+    bump_freelancer_facets()
+
+
+# ---------------------------------------------
+# 🔔 Keep the cached navbar notifications fresh
+# ---------------------------------------------
+from .models import Notification
+from .notifications import invalidate_navbar_notifications, queue_notification_push
+
+
+# No post_delete receiver: it would turn every bulk delete into per-row
+# deletes, so code that deletes notifications invalidates once per user.
+@receiver(post_save, sender=Notification)
+def invalidate_navbar_on_change(sender, instance, **kwargs):
+    invalidate_navbar_notifications([instance.user_id])
+
+
+@receiver(post_save, sender=Notification)
+def push_new_notification(sender, instance, created, **kwargs):
+    if created:
+        queue_notification_push([instance])
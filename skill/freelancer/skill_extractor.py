@@ -0,0 +1,155 @@
+# skill_extractor.py
+"""
+Aho–Corasick skill extraction.
+
+The automaton is compiled once per process from the canonical skill
+vocabulary and scans a text in a single linear pass, reporting every
+vocabulary skill that appears as a whole word ("java" does not fire
+inside "javascript", "go" does not fire inside "django").
+"""
+import bisect
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.db.models import Count
+
+from .models import FreelancerSkill, JobSkill, Skill
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+class SkillAutomaton:
+    __slots__ = ('goto', 'fail', 'output', 'patterns')
+
+    def __init__(self, patterns):
+        self.patterns = sorted({p.lower() for p in patterns if p})
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                state = nxt
+            self.output[state] = self.output[state] + (index,)
+
+        # Breadth-first construction of failure links; outputs are merged
+        # along them so a match never needs to walk the fail chain.
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def __contains__(self, name):
+        name = (name or '').lower()
+        index = bisect.bisect_left(self.patterns, name)
+        return index < len(self.patterns) and self.patterns[index] == name
+
+    def iter_matches(self, text):
+        """Yield ``(start, end, pattern)`` for each whole-word occurrence in ``text``."""
+        text = text.lower()
+        goto, fail, output, patterns = self.goto, self.fail, self.output, self.patterns
+        length = len(text)
+        state = 0
+        for position, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not output[state]:
+                continue
+            end = position + 1
+            for index in output[state]:
+                pattern = patterns[index]
+                start = end - len(pattern)
+                if (
+                    (start == 0 or not (_is_word_char(pattern[0]) and _is_word_char(text[start - 1])))
+                    and (end == length or not (_is_word_char(pattern[-1]) and _is_word_char(text[end])))
+                ):
+                    yield start, end, pattern
+
+    def extract(self, text):
+        """
+        Unique skills found in ``text``, in order of first appearance. A match
+        lying inside a longer one ("c" in "c++", "react" in "react native")
+        is dropped.
+        """
+        if not text or not self.patterns:
+            return []
+        matches = sorted(self.iter_matches(text), key=lambda m: (m[0], -m[1]))
+        found = {}
+        covered_until = 0
+        for start, end, pattern in matches:
+            if end <= covered_until:
+                continue
+            covered_until = end
+            found.setdefault(pattern, None)
+        return list(found)
+
+
+# ---------------------------------------------
+# 🧠 Process-local automaton cache
+# ---------------------------------------------
+_lock = threading.Lock()
+_automaton = None
+_built_at = 0.0
+
+
+def skill_vocabulary():
+    """
+    Skills worth extracting: names that appear as an explicit skill on at
+    least SKILL_EXTRACTOR_MIN_USES profiles or jobs, which keeps one-off
+    typos out of the automaton.
+    """
+    min_uses = getattr(settings, 'SKILL_EXTRACTOR_MIN_USES', 2)
+    # One GROUP BY per link table; joining both onto Skill multiplies the rows
+    uses = Counter()
+    for link_model in (FreelancerSkill, JobSkill):
+        uses.update(dict(
+            link_model.objects.filter(source='explicit')
+            .values('skill_id').annotate(uses=Count('skill_id')).values_list('skill_id', 'uses')
+        ))
+    return [name for skill_id, name in Skill.objects.values_list('id', 'name') if uses[skill_id] >= min_uses]
+
+
+def get_automaton():
+    """Return the compiled automaton, rebuilding it when invalidated or stale."""
+    global _automaton, _built_at
+    max_age = getattr(settings, 'SKILL_EXTRACTOR_MAX_AGE', 300)
+    with _lock:
+        if _automaton is None or time.monotonic() - _built_at > max_age:
+            _automaton = SkillAutomaton(skill_vocabulary())
+            _built_at = time.monotonic()
+        return _automaton
+
+
+def invalidate_automaton(name=None):
+    """
+    Drop the compiled automaton. With ``name``, only when that skill is part
+    of it; skills that newly reach SKILL_EXTRACTOR_MIN_USES are picked up
+    by SKILL_EXTRACTOR_MAX_AGE instead.
+    """
+    global _automaton
+    with _lock:
+        if name is None or (_automaton is not None and name in _automaton):
+            _automaton = None
+
+
+def extract_skills(text):
+    return get_automaton().extract(text or '')
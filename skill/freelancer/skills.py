@@ -0,0 +1,193 @@
+# skills.py
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+
+from .models import Skill, SkillAlias, FreelancerSkill, JobSkill
+
+_KEY_STRIP_RE = re.compile(r"[\s.\-_]+")
+
+
+def normalize_skill_name(raw):
+    """NFKC-normalise, case-fold and collapse whitespace."""
+    return ' '.join(unicodedata.normalize('NFKC', raw).casefold().split())[:100]
+
+
+def skill_key(raw):
+    """Compact alias lookup key: "React.JS", "react-js" and "React JS" all give "reactjs"."""
+    return _KEY_STRIP_RE.sub('', normalize_skill_name(raw))
+
+
+_alias_loaded_at = 0.0
+
+
+@lru_cache(maxsize=1)
+def _alias_table():
+    global _alias_loaded_at
+    _alias_loaded_at = time.monotonic()
+    return dict(SkillAlias.objects.values_list('alias', 'skill__name'))
+
+
+@lru_cache(maxsize=8192)
+def _canonical_skill_name(raw):
+    name = normalize_skill_name(raw)
+    return _alias_table().get(skill_key(name), name)
+
+
+def canonical_skill_name(raw):
+    """
+    Resolve a user-typed skill to its canonical name. Cached per process;
+    saving or deleting a SkillAlias clears this process's caches, and other
+    processes reload the aliases after SKILL_ALIAS_MAX_AGE seconds.
+    """
+    if time.monotonic() - _alias_loaded_at > getattr(settings, 'SKILL_ALIAS_MAX_AGE', 300):
+        clear_alias_cache()
+    return _canonical_skill_name(raw)
+
+
+def clear_alias_cache():
+    _alias_table.cache_clear()
+    _canonical_skill_name.cache_clear()
+
+
+def parse_skills(text):
+    """
+    Split a comma-separated skills string into unique canonical names.
+    Order of first appearance is kept.
+    """
+    if not text:
+        return []
+    names = []
+    seen = set()
+    for raw in text.split(','):
+        name = canonical_skill_name(raw)
+        if name and name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def get_or_create_skills(names):
+    """Return a {name: Skill} dict, creating any missing vocabulary rows in bulk."""
+    if not names:
+        return {}
+    skills = {s.name: s for s in Skill.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in skills]
+    if missing:
+        Skill.objects.bulk_create([Skill(name=name) for name in missing], ignore_conflicts=True)
+        skills.update({s.name: s for s in Skill.objects.filter(name__in=missing)})
+    return skills
+
+
+# Lower rank wins when the same skill is found by more than one source.
+SOURCE_RANK = {'explicit': 0, 'resume': 1, 'extracted': 2}
+
+
+def _strongest(*sources):
+    sources = [source for source in sources if source]
+    return min(sources, key=SOURCE_RANK.__getitem__) if sources else None
+
+
+def _sync_links(link_model, owner_field, owner, text, free_text='', tracks_resume=False):
+    """
+    Make the join rows for ``owner`` match the parsed ``text`` (explicit
+    skills) plus vocabulary skills extracted from ``free_text``. Each row
+    keeps its strongest source; with ``tracks_resume`` a row the resume
+    vouches for (``from_resume``) falls back to 'resume' instead of being
+    deleted, so only rows this sync owns are ever removed.
+    """
+    from .skill_extractor import extract_skills
+
+    wanted = {}
+    for name in extract_skills(free_text):
+        wanted[canonical_skill_name(name)] = 'extracted'
+    for name in parse_skills(text):
+        wanted[name] = 'explicit'
+    skills = get_or_create_skills(list(wanted))
+    wanted_sources = {skills[name].id: source for name, source in wanted.items() if name in skills}
+    rows = link_model.objects.filter(**{owner_field: owner})
+    if tracks_resume:
+        current = {skill_id: (source, from_resume)
+                   for skill_id, source, from_resume in rows.values_list('skill_id', 'source', 'from_resume')}
+    else:
+        current = {skill_id: (source, False) for skill_id, source in rows.values_list('skill_id', 'source')}
+
+    stale, moves = [], defaultdict(list)
+    for skill_id, (source, from_resume) in current.items():
+        target = _strongest(wanted_sources.get(skill_id), 'resume' if from_resume or source == 'resume' else None)
+        if target is None:
+            stale.append(skill_id)
+        elif target != source:
+            moves[target].append(skill_id)
+    if stale:
+        link_model.objects.filter(**{owner_field: owner, 'skill_id__in': stale}).delete()
+    for source, ids in moves.items():
+        link_model.objects.filter(**{owner_field: owner, 'skill_id__in': ids}).update(source=source)
+
+    new = [skill_id for skill_id in wanted_sources if skill_id not in current]
+    if new:
+        link_model.objects.bulk_create(
+            [link_model(**{owner_field: owner, 'skill_id': skill_id, 'source': wanted_sources[skill_id]})
+             for skill_id in new],
+            ignore_conflicts=True,
+        )
+    return bool(stale or moves or new)
+
+
+def sync_freelancer_skills(freelancer):
+    """Rebuild FreelancerSkill rows from ``FreelancerProfile.skills`` and ``bio``."""
+    return _sync_links(
+        FreelancerSkill, 'freelancer', freelancer, freelancer.skills, freelancer.bio, tracks_resume=True
+    )
+
+
+def sync_job_skills(job):
+    """Rebuild JobSkill rows from ``Job.skills_required`` and ``description``."""
+    return _sync_links(JobSkill, 'job', job, job.skills_required, job.description)
+
+
+def record_resume_skills(freelancer, names):
+    """
+    Store skills detected in an uploaded resume. Every row the resume
+    vouches for is flagged ``from_resume``; skills the freelancer already
+    lists keep their stronger source, and rows only the previous resume
+    vouched for are dropped.
+    """
+    skills = get_or_create_skills(list(dict.fromkeys(canonical_skill_name(n) for n in names)))
+    wanted_ids = {skill.id for skill in skills.values()}
+    current = {
+        skill_id: (source, from_resume)
+        for skill_id, source, from_resume in FreelancerSkill.objects.filter(freelancer=freelancer)
+        .values_list('skill_id', 'source', 'from_resume')
+    }
+    links = FreelancerSkill.objects.filter(freelancer=freelancer)
+
+    stale = [skill_id for skill_id, (source, _) in current.items()
+             if source == 'resume' and skill_id not in wanted_ids]
+    unflag = [skill_id for skill_id, (source, from_resume) in current.items()
+              if from_resume and source != 'resume' and skill_id not in wanted_ids]
+    flag = [skill_id for skill_id, (_, from_resume) in current.items()
+            if skill_id in wanted_ids and not from_resume]
+    upgrade = [skill_id for skill_id, (source, _) in current.items()
+               if skill_id in wanted_ids and _strongest(source, 'resume') != source]
+    if stale:
+        links.filter(skill_id__in=stale).delete()
+    if unflag:
+        links.filter(skill_id__in=unflag).update(from_resume=False)
+    if flag:
+        links.filter(skill_id__in=flag).update(from_resume=True)
+    if upgrade:
+        links.filter(skill_id__in=upgrade).update(source='resume')
+
+    new = wanted_ids - set(current)
+    if new:
+        FreelancerSkill.objects.bulk_create(
+            [FreelancerSkill(freelancer=freelancer, skill_id=skill_id, source='resume', from_resume=True)
+             for skill_id in new],
+            ignore_conflicts=True,
+        )
+    return bool(stale or upgrade or new)
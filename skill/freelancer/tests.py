@@ -1,3 +1,259 @@
-from django.test import TestCase
+import asyncio
+import atexit
+import json
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.exceptions import ChannelFull
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.db import close_old_connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .channel_layer import SQLiteChannelLayer
+from . import message_buffer
+from .chat import load_participants, mark_room_read, post_message
+from .consumers import ChatConsumer
+from .message_buffer import MessageBuffer, PendingMessage, persist, replay_journals
+from .models import ChatRoom, Message
+
+
+class ChatUnreadCounterConcurrencyTests(TransactionTestCase):
+    """Unread counters stay exact when many senders post to one room at once."""
+
+    SENDERS = 8
+    MESSAGES = 25
+
+    def setUp(self):
+        self.recruiter = User.objects.create_user('counter-recruiter')
+        self.freelancer = User.objects.create_user('counter-freelancer')
+        self.room = ChatRoom.objects.create(recruiter=self.recruiter, freelancer=self.freelancer)
+
+    def assertCounters(self, expected):
+        self.room.refresh_from_db()
+        self.assertEqual(Message.objects.filter(chat_room=self.room).count(), expected)
+        self.assertEqual(self.room.recruiter_unread_count, expected)
+        self.assertEqual(self.room.freelancer_unread_count, 0)
+
+    def test_post_message_from_threads(self):
+        def send(_):
+            close_old_connections()
+            try:
+                for i in range(self.MESSAGES):
+                    post_message(self.room, self.freelancer.id, f'thread ping {i}')
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=self.SENDERS) as pool:
+            list(pool.map(send, range(self.SENDERS)))
+        self.assertCounters(self.SENDERS * self.MESSAGES)
+
+        mark_room_read(self.room, self.recruiter.id)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.recruiter_unread_count, 0)
+
+    def test_sender_counter_untouched(self):
+        ChatRoom.objects.filter(id=self.room.id).update(freelancer_unread_count=3)
+        post_message(self.room, self.freelancer.id, 'direct')
+        persist([
+            PendingMessage(self.room.id, self.recruiter.id, self.freelancer.id, self.freelancer.id,
+                           self.freelancer.username, 'buffered', timezone.now()),
+        ])
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.recruiter_unread_count, 2)
+        self.assertEqual(self.room.freelancer_unread_count, 3)
+
+    def test_chat_consumer_senders(self):
+        async_to_sync(self._send_from_sockets)()
+        self.assertCounters(self.SENDERS * self.MESSAGES)
+
+    async def _send_from_sockets(self):
+        sockets = []
+        for _ in range(self.SENDERS):
+            communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/{self.room.id}/")
+            communicator.scope['user'] = self.freelancer
+            communicator.scope['url_route'] = {'kwargs': {'room_id': str(self.room.id)}}
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await communicator.receive_from()  # history frame
+            sockets.append(communicator)
+
+        async def send(communicator):
+            for i in range(self.MESSAGES):
+                await communicator.send_to(text_data=json.dumps({'message': f'ping {i}'}))
+
+        await asyncio.gather(*(send(communicator) for communicator in sockets))
+        # send_to() only queues the frame; wait until every message is stored
+        stored = database_sync_to_async(Message.objects.filter(chat_room=self.room).count)
+        for _ in range(600):
+            if await stored() >= self.SENDERS * self.MESSAGES:
+                break
+            await asyncio.sleep(0.05)
+        for communicator in sockets:
+            await communicator.disconnect()
+
+
+class MessageBufferTests(TransactionTestCase):
+    """Write-behind: crash replay from the journal and serving unstored messages."""
+
+    def setUp(self):
+        self.recruiter = User.objects.create_user('buffer-recruiter')
+        self.freelancer = User.objects.create_user('buffer-freelancer')
+        self.room = ChatRoom.objects.create(recruiter=self.recruiter, freelancer=self.freelancer)
+        self.participants = load_participants(self.room.id)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def buffer(self, **options):
+        buffer = MessageBuffer(interval=3600, **options)  # only flushes when told to
+        self.addCleanup(self.kill, buffer)
+        return buffer
+
+    def kill(self, buffer):
+        # What a crash leaves behind: no atexit flush, journal files as they are
+        atexit.unregister(buffer.flush_sync)
+        if buffer._flush_handle is not None:
+            buffer._flush_handle.cancel()
+        if buffer._journal is not None:
+            buffer._journal.close()
+
+    def test_replay_after_kill_mid_batch(self):
+        buffer = self.buffer(journal_dir=self.directory.name)
+
+        async def post():
+            for i in range(3):
+                buffer.add(self.participants, self.freelancer.id, f'batch {i}')
+            batch, journals = buffer._take()  # a flush took the batch but never stored it
+            self.assertEqual([path.suffix for path in journals], ['.flushing'])
+            for i in range(2):
+                buffer.add(self.participants, self.freelancer.id, f'pending {i}')
+
+        async_to_sync(post)()
+        self.kill(buffer)
+        self.assertFalse(Message.objects.exists())
+
+        self.assertEqual(replay_journals(self.directory.name), 5)
+        self.assertEqual(os.listdir(self.directory.name), [])
+        self.assertEqual(
+            list(Message.objects.filter(chat_room=self.room).order_by('id').values_list('content', flat=True)),
+            ['batch 0', 'batch 1', 'batch 2', 'pending 0', 'pending 1'],
+        )
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.recruiter_unread_count, 5)
+        self.assertEqual(self.room.freelancer_unread_count, 0)
+
+    @override_settings(CHAT_WRITE_BEHIND=True)
+    def test_open_room_serves_unstored_messages(self):
+        buffer = self.buffer()
+        self.addCleanup(setattr, message_buffer, '_buffer', message_buffer._buffer)
+        message_buffer._buffer = buffer
+        async_to_sync(self._open_while_buffered)(buffer)
+
+    async def _connect(self, user):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/{self.room.id}/")
+        communicator.scope['user'] = user
+        communicator.scope['url_route'] = {'kwargs': {'room_id': str(self.room.id)}}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def _open_while_buffered(self, buffer):
+        sender = await self._connect(self.freelancer)
+        self.assertEqual(json.loads(await sender.receive_from())['type'], 'history')
+        await sender.send_to(text_data=json.dumps({'message': 'not stored yet'}))
+        self.assertEqual(json.loads(await sender.receive_from())['type'], 'new_message')
+
+        reader = await self._connect(self.recruiter)
+        self.assertEqual(json.loads(await reader.receive_from())['messages'], [])
+        resume = json.loads(await reader.receive_from())
+        self.assertEqual(resume['type'], 'resume')
+        self.assertEqual([(m['id'], m['message']) for m in resume['messages']], [(None, 'not stored yet')])
+
+        await buffer.flush()
+        stored = await database_sync_to_async(Message.objects.get)(chat_room=self.room)
+        self.assertEqual(json.loads(await reader.receive_from()), {'type': 'persisted', 'last_id': stored.id})
+        self.assertTrue(await reader.receive_nothing())
+        await sender.disconnect()
+        await reader.disconnect()
+
+
+class SQLiteChannelLayerTests(SimpleTestCase):
+    """Capacity, expiry and cross-process delivery of the shared SQLite layer."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'channels.sqlite3')
+        self.layers = []
+
+    def tearDown(self):
+        for layer in self.layers:
+            async_to_sync(layer.close)()
+            layer._executor.shutdown()
+            if layer._connection is not None:
+                layer._connection.close()
+        self.directory.cleanup()
+
+    def layer(self, **config):
+        # Every instance acts as its own process: separate poller and client prefix
+        layer = SQLiteChannelLayer(path=self.path, **config)
+        self.layers.append(layer)
+        return layer
+
+    async def group_members(self, layer, group):
+        rows = await layer._run(
+            lambda: layer._db().execute('SELECT channel FROM channel_groups WHERE group_name = ?', (group,)).fetchall()
+        )
+        return {row[0] for row in rows}
+
+    async def test_capacity(self):
+        layer = self.layer(capacity=3)
+        for i in range(3):
+            await layer.send('chat.direct', {'type': 'ping', 'n': i})
+        with self.assertRaises(ChannelFull):
+            await layer.send('chat.direct', {'type': 'ping', 'n': 3})
+        # group_send skips the full channel instead of raising
+        await layer.group_add('room', 'chat.direct')
+        await layer.group_send('room', {'type': 'ping', 'n': 4})
+        self.assertEqual((await layer.receive('chat.direct'))['n'], 0)
+        await layer.send('chat.direct', {'type': 'ping', 'n': 5})
+
+    async def test_expiry_removes_channel_from_groups(self):
+        layer = self.layer(expiry=0.2)
+        reader, dead = await layer.new_channel(), await layer.new_channel()
+        await layer.group_add('room', reader)
+        await layer.group_add('room', dead)
+        await layer.group_send('room', {'type': 'ping'})
+        self.assertEqual(await asyncio.wait_for(layer.receive(reader), 2), {'type': 'ping'})
+        await asyncio.sleep(0.3)
+        await layer._run(layer._transaction, layer._clean_expired)
+        self.assertEqual(await self.group_members(layer, 'room'), {reader})
+
+    async def test_group_send_across_processes(self):
+        sender, receiver = self.layer(), self.layer()
+        channels = [await receiver.new_channel() for _ in range(3)]
+        for channel in channels:
+            await receiver.group_add('room', channel)
+        await sender.group_send('room', {'type': 'chat.message', 'text': 'hello', 'blob': b'\x00\x01'})
+        for channel in channels:
+            message = await asyncio.wait_for(receiver.receive(channel), 2)
+            self.assertEqual(message, {'type': 'chat.message', 'text': 'hello', 'blob': b'\x00\x01'})
+        await sender.group_discard('room', channels[0])
+        self.assertEqual(await self.group_members(sender, 'room'), set(channels[1:]))
+
+    async def test_poll_reads_without_write_lock(self):
+        layer = self.layer()
+        channel = await layer.new_channel()
+        await layer.send(channel, {'type': 'ping'})
+        writer = sqlite3.connect(self.path, isolation_level=None)
+        writer.execute('BEGIN IMMEDIATE')
+        try:
+            # Nothing received yet, so the poll is a plain read that another writer can't block
+            self.assertEqual(await asyncio.wait_for(layer.receive(channel), 2), {'type': 'ping'})
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
@@ -14,6 +14,7 @@ urlpatterns =[
     path("freelancer-map/", freelancer_map, name="freelancer_map"),
     path('api/candidate-location/<int:freelancer_id>/', get_candidate_location, name='get_candidate_location'), 
     path("api/freelancers/", get_freelancer_data, name="get_freelancer_data"),   
+    path("api/freelancers/search/", search_freelancers_api, name="search_freelancers_api"),
     path("profile/view/", view_profile, name="view_profile"),
     path("profile/edit/", edit_profile, name="edit_profile"),
     path("profile/create/", create_profile, name="create_profile"),
@@ -29,10 +30,12 @@ urlpatterns =[
     path('job/<int:job_id>/close/',close_job, name='close_job'),
     path('job/<int:job_id>/edit/', edit_job, name='edit_job'),
     path('job/<int:job_id>/applications/', view_applications, name='view_job'),
+    path('api/jobs/<int:job_id>/fanout/', job_fanout_status, name='job_fanout_status'),
     path('application/<int:app_id>/status/<str:status>/', update_application_status, name='update_application_status'),
     path('freelancer/<int:freelancer_id>/', view_freelancer_profile, name='view_freelancer_profile'),
     path('freelancer/jobs/', jobs_page, name='jobs_page'),
     path('freelancer/jobs/<int:job_id>/apply/', apply_job, name='apply_job'),
+    path('api/jobs/search/', search_jobs_api, name='search_jobs_api'),
     path('freelancer/applications/', freelancer_applications, name='freelancer_applications'),
     path('jobs/save/<int:job_id>/', toggle_save_job, name='toggle_save_job'),
     path('freelancer/saved-jobs/', saved_jobs_page, name='saved_jobs'),
@@ -44,6 +47,8 @@ urlpatterns =[
     path('notifications/<int:notification_id>/mark-read/', mark_notification_read, name='mark_notification_read'),
     path('notifications/mark-all-read/', mark_all_notifications_read, name='mark_all_notifications_read'),
     path('notifications/', view_all_notifications, name='view_all_notifications'),
+    path('api/notifications/', notifications_api, name='notifications_api'),
+    path('api/notifications/<int:notification_id>/jobs/', notification_jobs_api, name='notification_jobs_api'),
     path('freelancer/analytics/', freelancer_analytics, name='freelancer_analytics'),
     path("analytics/", recruiter_analytics, name="recruiter_analytics"),
     path('freelancer_discussions/',freelancer_discussions,name="freelancer_discussions"),
@@ -5,8 +5,21 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .models import *
 from .forms import *
+from .matching import SkillMatcher, refresh_scores_for_freelancer
+from .skills import parse_skills, canonical_skill_name, record_resume_skills
+from .skill_extractor import extract_skills
+from .chat import post_message
+from .recommendations import jobs_for_freelancer, candidates_for_job
+from .search import search_jobs, search_freelancers, freelancer_facets, freelancer_filters_from
+from .notifications import (
+    schedule_new_job_fanout, invalidate_navbar_notifications,
+    NOTIFICATIONS_PER_PAGE, notification_filters_from, notification_page, serialize_notification, digest_jobs,
+    read_state,
+)
 from decimal import Decimal
-from django.db.models import Count, Q, F
+from django.db.models import Count, Q, F, Sum, Exists, OuterRef, FilteredRelation
+from django.db.models.functions import Coalesce
+from django.core.paginator import Paginator
 from django.core.mail import send_mail
 from django.conf import settings
 from django.http import JsonResponse
@@ -21,6 +34,21 @@ from datetime import timedelta
 from .models import *
 from datetime import date
 
+JOBS_PER_PAGE = 20
+
+def with_match_info(jobs, freelancer):
+    """
+    Annotate a Job queryset with the freelancer's precomputed
+    skill_match_percentage / matching_skills and an ``applied`` flag.
+    """
+    return jobs.select_related('recruiter').annotate(
+        my_match=FilteredRelation('match_scores', condition=Q(match_scores__freelancer=freelancer)),
+    ).annotate(
+        skill_match_percentage=Coalesce(F('my_match__score'), 0),
+        matching_skills=F('my_match__matching_skills'),
+        applied=Exists(Application.objects.filter(job=OuterRef('pk'), freelancer=freelancer)),
+    )
+
 def calculate_login_streak(freelancer):
     """Simple streak logic - can be improved with a login history model."""
     user = freelancer.user
@@ -138,23 +166,11 @@ def admin_dashboard(request):
     total_applications = Application.objects.filter(job__recruiter=recruiter).count()
     accepted_candidates = Application.objects.filter(job__recruiter=recruiter, status='Accepted').count()
     
-    # Notifications for recruiter - new applications and other recruiter-specific notifications
-    notifications = Notification.objects.filter(
-        user=request.user
-    ).order_by('-created_at')[:10]
-    
-    unread_notifications_count = Notification.objects.filter(
-        user=request.user, 
-        is_read=False
-    ).count()
-
     context = {
         'total_jobs': total_jobs,
         'open_jobs': open_jobs,
         'total_applications': total_applications,
         'accepted_candidates': accepted_candidates,
-        'notifications': notifications,
-        'unread_notifications_count': unread_notifications_count,
     }
 
     return render(request, 'recruiter/dash.html', context)
@@ -278,18 +294,11 @@ def freelancer_dashboard(request):
             date_str = application.applied_at.strftime('%Y-%m-%d')
             application_dates.append(date_str)
     
-    # Jobs matching skills
-    freelancer_skills = [skill.strip().lower() for skill in freelancer.skills.split(",") if skill]
-    if freelancer_skills:
-        jobs_matching_skills = Job.objects.filter(
-            status='Open'
-        ).filter(
-            Q(skills_required__iregex=r'(' + '|'.join(freelancer_skills) + ')')
-        ).distinct()
+    # Jobs matching skills (exact tokens, served from the skill index)
+    if freelancer.skill_links.exists():
+        my_interests_count = SkillMatcher.count_jobs_for_freelancer(freelancer)
     else:
-        jobs_matching_skills = Job.objects.filter(status='Open')
-    
-    my_interests_count = jobs_matching_skills.count()
+        my_interests_count = Job.objects.filter(status='Open').count()
 
     # Latest 5 jobs notifications
     jobs_notifications = Job.objects.filter(status='Open').order_by('-created_at')[:5]
@@ -302,11 +311,10 @@ def freelancer_dashboard(request):
 
     # Saved jobs count
     saved_jobs_count = freelancer.saved_jobs.count()
-    
-    # Notifications
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:10]
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
 
+    # Offline TF-IDF recommendations ("jobs for you")
+    jobs_for_you = jobs_for_freelancer(freelancer)
+    
     ai_history = AIRequestLog.objects.filter(user=request.user)[:20] 
     ai_history = json.dumps(list(ai_history.values('prompt', 'response')), cls=DjangoJSONEncoder) # latest 20
 
@@ -401,9 +409,8 @@ def freelancer_dashboard(request):
         "applications_accepted_count": applications_accepted_count,
         "my_interests_count": my_interests_count,
         "jobs_notifications": jobs_notifications,
+        "jobs_for_you": jobs_for_you,
         "saved_jobs_count": saved_jobs_count,
-        "notifications": notifications,
-        "unread_notifications_count": unread_notifications_count,
         "ai_history": ai_history,
         "application_dates": json.dumps(application_dates),  # Add application dates for calendar
         'badges': badges,
@@ -445,10 +452,6 @@ def view_profile(request):
     applications_accepted_count = applications.filter(status='Accepted').count()
     saved_jobs_count = profile.saved_jobs.count()
     
-    # Notifications for the profile page
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
-    
     profile = FreelancerProfile.objects.get(user=request.user)
 
     today = date.today()
@@ -531,8 +534,6 @@ def view_profile(request):
         "saved_jobs_count": saved_jobs_count,
         "applications_accepted_count": applications_accepted_count,
         "posts": posts,
-        "notifications": notifications,
-        "unread_notifications_count": unread_notifications_count,
         "badges":badges,
     })
 
@@ -625,20 +626,9 @@ def post_job(request):
             job.recruiter = recruiter
             job.save()
             
-            # Create notifications for freelancers with matching skills
+            # Notify freelancers with matching skills in the background
             if job.skills_required:
-                job_skills = [skill.strip().lower() for skill in job.skills_required.split(",") if skill.strip()]
-                matching_freelancers = FreelancerProfile.objects.filter(
-                    Q(skills__iregex=r'(' + '|'.join(job_skills) + ')')
-                )
-                
-                for freelancer in matching_freelancers:
-                    Notification.objects.create(
-                        user=freelancer.user,
-                        notification_type='new_job',
-                        message=f"New job posted: {job.title} - matches your skills!",
-                        related_job=job
-                    )
+                schedule_new_job_fanout(job)
             
             messages.success(request, "Job posted successfully!")
             return redirect('my_jobs')
@@ -647,19 +637,27 @@ def post_job(request):
 
     return render(request, 'recruiter/post_job.html', {'form': form})
 
+@login_required
+def job_fanout_status(request, job_id):
+    """Progress of the new-job notification fan-out for one of the recruiter's jobs"""
+    job = get_object_or_404(Job, id=job_id, recruiter__user=request.user)
+    fanout = job.notification_fanouts.first()
+    if fanout is None:
+        return JsonResponse({'status': 'none', 'total': 0, 'sent': 0, 'progress': 0})
+    return JsonResponse({
+        'status': fanout.status,
+        'total': fanout.total,
+        'sent': fanout.sent,
+        'progress': fanout.progress,
+    })
+
 @login_required
 def my_jobs(request):
     recruiter = RecruiterProfile.objects.get(user=request.user)
     jobs = Job.objects.filter(recruiter=recruiter)
     
-    # Notifications for recruiter
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
-    
     return render(request, 'recruiter/my_jobs.html', {
         'jobs': jobs,
-        'notifications': notifications,
-        'unread_notifications_count': unread_notifications_count,
     })
 
 @login_required
@@ -692,16 +690,12 @@ def view_applications(request, job_id):
     recruiter = RecruiterProfile.objects.get(user=request.user)
     job = get_object_or_404(Job, id=job_id, recruiter=recruiter)
     applications = job.applications.all()
-    
-    # Notifications for recruiter
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
+    suggested_candidates = candidates_for_job(job)
     
     return render(request, 'recruiter/job_applications.html', {
         'job': job, 
         'applications': applications,
-        'notifications': notifications,
-        'unread_notifications_count': unread_notifications_count,
+        'suggested_candidates': suggested_candidates,
     })
 
 @login_required
@@ -743,19 +737,14 @@ Best regards,
                 freelancer=freelancer_user
             )
 
-            # Auto-send a welcome message
-            Message.objects.create(
-                chat_room=chat_room,
-                sender=recruiter_user,
-                content=f"Hi {freelancer_user.first_name}, congratulations! I accepted your application for '{application.job.title}'. Let's discuss further here."
+            # Auto-send a welcome message (freelancer gets an unread message)
+            post_message(
+                chat_room,
+                recruiter_user.id,
+                f"Hi {freelancer_user.first_name}, congratulations! I accepted your application for '{application.job.title}'. Let's discuss further here.",
+                preview=f"Hi {freelancer_user.first_name}, congratulations! I accepted your application.",
             )
 
-            # Update last message field
-            chat_room.last_message = f"Hi {freelancer_user.first_name}, congratulations! I accepted your application."
-            chat_room.recruiter_unread_count = 0
-            chat_room.freelancer_unread_count += 1  # freelancer has unread message
-            chat_room.save()
-
             # =========================
             # AUTO-CREATE PROJECT
             # =========================
@@ -819,14 +808,8 @@ def recruiter_profile(request):
     else:
         form = RecruiterProfileForm(instance=recruiter)
         
-    # Notifications for recruiter
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
-
     return render(request, 'recruiter/profile.html', {
         'form': form,
-        'notifications': notifications,
-        'unread_notifications_count': unread_notifications_count,
     })
 
 
@@ -904,53 +887,58 @@ def view_freelancer_profile(request, freelancer_id):
 def jobs_page(request):
     freelancer = get_object_or_404(FreelancerProfile, user=request.user)
     
-    # Only Full-time and Part-time jobs (exclude Internships)
-    jobs = Job.objects.filter(status='Open').exclude(job_type='internship')
+    # Only Full-time and Part-time jobs (exclude Internships), best matches first.
+    # Match scores are precomputed in JobMatchScore, so the page is a fixed
+    # number of queries regardless of how many jobs are open.
+    jobs = with_match_info(
+        Job.objects.filter(status='Open').exclude(job_type='internship'),
+        freelancer,
+    ).order_by('-skill_match_percentage', '-created_at', '-id')
+    page_obj = Paginator(jobs, JOBS_PER_PAGE).get_page(request.GET.get('page'))
     
     # Get freelancer skills
-    freelancer_skills = []
-    if freelancer.skills:
-        freelancer_skills = [skill.strip().lower() for skill in freelancer.skills.split(",") if skill.strip()]
-    
-    # Calculate skill matching percentage for each job
-    for job in jobs:
-        job.applied = job.applications.filter(freelancer=freelancer).exists()
-        
-        # Calculate skill match percentage
-        if freelancer_skills and job.skills_required:
-            job_skills = [skill.strip().lower() for skill in job.skills_required.split(",") if skill.strip()]
-            
-            # Calculate matching skills
-            matching_skills = set(freelancer_skills) & set(job_skills)
-            
-            # Calculate percentage
-            if job_skills:
-                match_percentage = (len(matching_skills) / len(job_skills)) * 100
-                job.skill_match_percentage = round(match_percentage)
-                job.matching_skills = list(matching_skills)
-            else:
-                job.skill_match_percentage = 0
-                job.matching_skills = []
-        else:
-            job.skill_match_percentage = 0
-            job.matching_skills = []
+    freelancer_skills = parse_skills(freelancer.skills)
     
     # Freshly get saved jobs
     saved_jobs = freelancer.saved_jobs.all().values_list('job_id', flat=True)
     
-    # Notifications for the jobs page
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
-
     return render(request, 'freelancer/jobs_page.html', {
-        'jobs': jobs,
+        'jobs': page_obj,
+        'page_obj': page_obj,
         'saved_jobs': saved_jobs,
-        'notifications': notifications,
-        'unread_notifications_count': unread_notifications_count,
         'freelancer_skills': freelancer_skills,
     })
 
 
+@login_required
+def search_jobs_api(request):
+    """Ranked keyword search over open jobs with cursor pagination"""
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 50)
+    except ValueError:
+        limit = 20
+    return JsonResponse(search_jobs(
+        request.GET.get('q', ''),
+        cursor=request.GET.get('cursor'),
+        limit=limit,
+    ))
+
+
+@login_required
+def search_freelancers_api(request):
+    """Recruiter talent search: paginated hits plus cached facet counts"""
+    if not hasattr(request.user, 'recruiterprofile'):
+        return JsonResponse({'error': 'Only recruiters can search freelancers'}, status=403)
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 50)
+    except ValueError:
+        limit = 20
+    filters = freelancer_filters_from(request.GET)
+    response = search_freelancers(filters, cursor=request.GET.get('cursor'), limit=limit)
+    response['facets'] = freelancer_facets(filters)
+    return JsonResponse(response)
+
+
 @login_required
 def apply_job(request, job_id):
     freelancer = get_object_or_404(FreelancerProfile, user=request.user)
@@ -1007,14 +995,8 @@ def freelancer_applications(request):
     # Get all applications of this freelancer, latest first
     applications = Application.objects.filter(freelancer=freelancer).order_by('-applied_at')
     
-    # Notifications for the applications page
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
-
     return render(request, 'freelancer/freelancer_applications.html', {
         'applications': applications,
-        'notifications': notifications,
-        'unread_notifications_count': unread_notifications_count,
     })
 
 @login_required
@@ -1039,41 +1021,30 @@ def saved_jobs_page(request):
     freelancer = get_object_or_404(FreelancerProfile, user=request.user)
     saved_jobs = SavedJob.objects.filter(freelancer=freelancer).select_related('job')
     
-    # Notifications for the saved jobs page
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
-    
     return render(request, 'freelancer/saved_jobs.html', {
         'saved_jobs': saved_jobs,
-        'notifications': notifications,
-        'unread_notifications_count': unread_notifications_count,
     })
 
 @login_required
 def internship_page(request):
     freelancer = FreelancerProfile.objects.get(user=request.user)
     
-    # Only open internships
-    internships = Job.objects.filter(status='Open', job_type='internship').order_by('-created_at')
-    
-    # Flag if the freelancer has already applied
-    for job in internships:
-        job.applied = job.applications.filter(freelancer=freelancer).exists()
+    # Only open internships, with the applied flag and match score joined in
+    internships = with_match_info(
+        Job.objects.filter(status='Open', job_type='internship'),
+        freelancer,
+    ).order_by('-created_at', '-id')
+    page_obj = Paginator(internships, JOBS_PER_PAGE).get_page(request.GET.get('page'))
     
     saved_jobs = freelancer.saved_jobs.all().values_list('job_id', flat=True)
 
-    # Notifications for the internship page
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
-    
     # Get freelancer skills as a string
     freelancer_skills = freelancer.skills or ""
     
     return render(request, 'freelancer/internship_page.html', {
-        'internships': internships,
+        'internships': page_obj,
+        'page_obj': page_obj,
         'saved_jobs': saved_jobs,
-        'notifications': notifications,
-        'unread_notifications_count': unread_notifications_count,
         'freelancer_skills': freelancer_skills,  # Pass freelancer skills to template
     })
 
@@ -1132,15 +1103,9 @@ def freelancer_map(request):
     total_freelancers = freelancers.count()
     available_freelancers = freelancers.filter(availability_status='available').count()
     
-    # Notifications for recruiter
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
-    
     context = {
         'total_freelancers': total_freelancers,
         'available_freelancers': available_freelancers,
-        'notifications': notifications,
-        'unread_notifications_count': unread_notifications_count,
     }
     
     return render(request, 'recruiter/freelancer_map.html', context)
@@ -1424,18 +1389,58 @@ def mark_notification_read(request, notification_id):
 @login_required
 def mark_all_notifications_read(request):
     """Mark all notifications as read for the current user"""
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    Notification.objects.filter(user=request.user, is_read=read_state(False)).update(is_read=True)
+    invalidate_navbar_notifications([request.user.id])
     return JsonResponse({'success': True})
 
 @login_required
 def view_all_notifications(request):
-    """View all notifications page"""
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
+    """Notification center: first page, further pages come from notifications_api"""
+    filters = notification_filters_from(request.GET)
+    page = notification_page(request.user, filters)
     
     return render(request, 'freelancer/all_notifications.html', {
-        'notifications': notifications,
-        'unread_notifications_count': unread_notifications_count,
+        'page_notifications': page['results'],
+        'next_cursor': page['next_cursor'],
+        'notification_types': Notification.NOTIFICATION_TYPES,
+        'selected_type': filters.get('notification_type', ''),
+        'selected_is_read': request.GET.get('is_read', ''),
+    })
+
+@login_required
+def notifications_api(request):
+    """Infinite-scroll JSON feed for the notification center"""
+    try:
+        limit = min(max(int(request.GET.get('limit', NOTIFICATIONS_PER_PAGE)), 1), 50)
+    except ValueError:
+        limit = NOTIFICATIONS_PER_PAGE
+    page = notification_page(
+        request.user,
+        notification_filters_from(request.GET),
+        cursor=request.GET.get('cursor'),
+        limit=limit,
+    )
+    return JsonResponse({
+        'results': [serialize_notification(n) for n in page['results']],
+        'next_cursor': page['next_cursor'],
+    })
+
+@login_required
+def notification_jobs_api(request, notification_id):
+    """Expand a new_job digest into the jobs it stands for"""
+    notification = get_object_or_404(Notification, id=notification_id, user=request.user)
+    return JsonResponse({
+        'jobs': [
+            {
+                'id': job.id,
+                'title': job.title,
+                'company': job.recruiter.company_name,
+                'job_type': job.job_type,
+                'status': job.status,
+                'created_at': job.created_at.isoformat(),
+            }
+            for job in digest_jobs(notification)
+        ],
     })
 
 @login_required
@@ -1443,6 +1448,7 @@ def delete_notification(request, notification_id):
     """Delete a specific notification"""
     notification = get_object_or_404(Notification, id=notification_id, user=request.user)
     notification.delete()
+    invalidate_navbar_notifications([request.user.id])
     messages.success(request, "Notification deleted successfully!")
     return redirect('view_all_notifications')
 
@@ -1450,6 +1456,7 @@ def delete_notification(request, notification_id):
 def clear_all_notifications(request):
     """Clear all notifications for the current user"""
     Notification.objects.filter(user=request.user).delete()
+    invalidate_navbar_notifications([request.user.id])
     messages.success(request, "All notifications cleared successfully!")
     return redirect('view_all_notifications')
 
@@ -1631,6 +1638,12 @@ def ask_ai_resume(request):
         else:
             return JsonResponse({"reply": "Only PDF and DOCX resumes are supported."})
 
+        # Detect known skills locally; no API call needed for this part
+        detected_skills = extract_skills(resume_text)
+        freelancer = FreelancerProfile.objects.filter(user=request.user).first()
+        if freelancer and record_resume_skills(freelancer, detected_skills):
+            refresh_scores_for_freelancer(freelancer)
+
         # Create AI prompt
         prompt = f"Review this freelancer's resume and give a short rating (1-100) and actionable tips:\n\n{resume_text}"
 
@@ -1656,7 +1669,7 @@ def ask_ai_resume(request):
             total_tokens=response.usage.total_tokens
         )
 
-        return JsonResponse({"reply": reply_text})
+        return JsonResponse({"reply": reply_text, "detected_skills": detected_skills})
 
 @csrf_exempt
 @login_required
@@ -1717,9 +1730,7 @@ def skill_trends(request):
     trending_skills = get_enhanced_trending_skills(all_jobs)
     
     # Get freelancer's skills for comparison
-    freelancer_skills = []
-    if freelancer.skills:
-        freelancer_skills = [skill.strip().lower() for skill in freelancer.skills.split(',')]
+    freelancer_skills = parse_skills(freelancer.skills)
     
     # Enhanced categorization with better logic
     rising_skills = {}
@@ -1771,10 +1782,6 @@ def skill_trends(request):
     total_jobs_analyzed = all_jobs.count()
     total_skills_tracked = len(trending_skills)
     
-    # Notifications
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
-    
     context = {
         'trending_skills': trending_skills,
         'rising_skills': rising_skills,
@@ -1789,8 +1796,6 @@ def skill_trends(request):
         'industry_insights': industry_insights,
         'total_jobs_analyzed': total_jobs_analyzed,
         'total_skills_tracked': total_skills_tracked,
-        'notifications': notifications,
-        'unread_notifications_count': unread_notifications_count,
     }
     
     return render(request, 'freelancer/skill_trends.html', context)
@@ -1840,23 +1845,24 @@ def get_enhanced_trending_skills(all_jobs):
         'scala': {'trend': 'stable', 'growth': 8, 'demand': 'low', 'jobs_count': 250, 'avg_salary': 125000},
     }
     
-    # Enhance with real data from job postings
-    skill_analysis = {}
-    for job in all_jobs:
-        if job.skills_required:
-            skills = [skill.strip().lower() for skill in job.skills_required.split(',') if skill.strip()]
-            for skill in skills:
-                if skill in skill_analysis:
-                    skill_analysis[skill]['count'] += 1
-                    if job.salary:
-                        skill_analysis[skill]['salary_sum'] += job.salary
-                        skill_analysis[skill]['salary_count'] += 1
-                else:
-                    skill_analysis[skill] = {
-                        'count': 1,
-                        'salary_sum': job.salary or 0,
-                        'salary_count': 1 if job.salary else 0,
-                    }
+    # Enhance with real data from job postings (aggregated over the JobSkill index)
+    skill_rows = (
+        JobSkill.objects.filter(job__in=all_jobs)
+        .values('skill__name')
+        .annotate(
+            count=Count('job'),
+            salary_sum=Sum('job__salary'),
+            salary_count=Count('job__salary', filter=Q(job__salary__gt=0)),
+        )
+    )
+    skill_analysis = {
+        row['skill__name']: {
+            'count': row['count'],
+            'salary_sum': row['salary_sum'] or 0,
+            'salary_count': row['salary_count'],
+        }
+        for row in skill_rows
+    }
     
     # Update base data with real insights
     for skill, data in skill_analysis.items():
@@ -1990,11 +1996,14 @@ def add_skill_to_profile(request):
     if request.method == 'POST' and request.headers.get('x-requested-with') == 'XMLHttpRequest':
         try:
             data = json.loads(request.body)
-            skill_to_add = data.get('skill', '').strip().lower()
+            skill_to_add = data.get('skill', '').strip()
             
             if not skill_to_add:
                 return JsonResponse({'success': False, 'error': 'No skill provided'})
             
+            # "ReactJS" and "React" are the same skill
+            skill_to_add = canonical_skill_name(skill_to_add)
+            
             freelancer = FreelancerProfile.objects.get(user=request.user)
             
             # Get current skills
@@ -2003,7 +2012,7 @@ def add_skill_to_profile(request):
                 current_skills = [skill.strip() for skill in freelancer.skills.split(',')]
             
             # Add new skill if not already present
-            if skill_to_add not in [s.lower() for s in current_skills]:
+            if skill_to_add not in parse_skills(freelancer.skills):
                 if current_skills:
                     current_skills.append(skill_to_add.title())
                 else:
@@ -2051,15 +2060,9 @@ def map(request):
     total_freelancers = freelancers.count()
     available_freelancers = freelancers.filter(availability_status='available').count()
     
-    # Notifications for recruiter
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    unread_notifications_count = Notification.objects.filter(user=request.user, is_read=False).count()
-    
     context = {
         'total_freelancers': total_freelancers,
         'available_freelancers': available_freelancers,
-        'notifications': notifications,
-        'unread_notifications_count': unread_notifications_count,
     }
     
     return render(request, 'freelancer/map.html', context)
@@ -2100,12 +2103,7 @@ def create_task(request, project_id):
         )
 
         msg_content = f"📝 New Task Assigned: '{task.title}' — Please review the details and start working on it."
-        Message.objects.create(chat_room=chat_room, sender=recruiter_user, content=msg_content)
-
-        chat_room.last_message = msg_content
-        chat_room.recruiter_unread_count = 0
-        chat_room.freelancer_unread_count += 1
-        chat_room.save()
+        post_message(chat_room, recruiter_user.id, msg_content)
 
         return redirect('project_tasks', project_id=project.id)
 
@@ -2175,12 +2173,7 @@ def approve_task(request, task_id):
         )
 
         msg_content = f"✅ Task Approved: Great job on '{task.title}'! Your work has been accepted."
-        Message.objects.create(chat_room=chat_room, sender=recruiter_user, content=msg_content)
-
-        chat_room.last_message = msg_content
-        chat_room.recruiter_unread_count = 0
-        chat_room.freelancer_unread_count += 1
-        chat_room.save()
+        post_message(chat_room, recruiter_user.id, msg_content)
 
         # Check if all tasks are approved
         if task.project.is_completed():
@@ -2215,12 +2208,7 @@ def disapprove_task(request, task_id):
         )
 
         msg_content = f"❌ Task Disapproved: '{task.title}' needs some revisions. Please review and re-upload."
-        Message.objects.create(chat_room=chat_room, sender=recruiter_user, content=msg_content)
-
-        chat_room.last_message = msg_content
-        chat_room.recruiter_unread_count = 0
-        chat_room.freelancer_unread_count += 1
-        chat_room.save()
+        post_message(chat_room, recruiter_user.id, msg_content)
 
     return redirect('project_tasks', project_id=task.project.id)
 
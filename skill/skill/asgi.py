@@ -1,18 +1,21 @@
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-import freelancer.routing
 
 # Set DJANGO_SETTINGS_MODULE before importing anything that touches models
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skill.settings')
+# Sets Django up; the routing below imports consumers and models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.auth import AuthMiddlewareStack
+import freelancer.routing
 
 # ASGI application
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
         URLRouter(
             freelancer.routing.websocket_urlpatterns
         )
     ),
-})
\ No newline at end of file
+})
@@ -64,6 +64,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'freelancer.context_processors.notifications',
             ],
         },
     },
@@ -78,15 +79,102 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file, not the in-memory default: concurrent writers in freelancer/tests.py
+        # must wait on SQLite's lock, which shared-cache memory databases don't do
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Channel layer: 'memory' only reaches sockets inside one process (dev/test);
+# 'sqlite' shares groups between several daphne workers on one host (see freelancer/channel_layer.py)
+CHANNEL_LAYER = 'memory'
+CHANNEL_LAYER_BACKENDS = {
+    'memory': {
+        "BACKEND": "channels.layers.InMemoryChannelLayer",
+    },
+    'sqlite': {
+        "BACKEND": "freelancer.channel_layer.SQLiteChannelLayer",
+        "CONFIG": {
+            "path": BASE_DIR / "channels.sqlite3",
+            "capacity": 100,
+            "expiry": 60,
+        },
+    },
+}
 CHANNEL_LAYERS = {
+    "default": CHANNEL_LAYER_BACKENDS[CHANNEL_LAYER],
+}
+
+# Shared by every worker process, so invalidating the navbar and facet caches
+# takes effect everywhere; files, so cache writes never wait on db.sqlite3's write lock
+CACHES = {
     "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",  # for dev/test
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
     },
 }
 
+# Recruiter freelancer search facet cache lifetime (seconds)
+FREELANCER_FACET_CACHE_SECONDS = 300
+
+# New-job notification fan-out (see freelancer/notifications.py)
+NOTIFICATION_FANOUT_ASYNC = True
+NOTIFICATION_FANOUT_CHUNK_SIZE = 500
+# Retries per failed chunk, runs per fan-out, and how long (seconds) a 'running'
+# fan-out may go without progress before resume_notification_fanouts takes it over
+NOTIFICATION_FANOUT_RETRIES = 3
+NOTIFICATION_FANOUT_MAX_ATTEMPTS = 5
+NOTIFICATION_FANOUT_STALE_SECONDS = 300
+# Unread new_job alerts younger than this (seconds) absorb further jobs as a digest; 0 disables
+NOTIFICATION_DIGEST_WINDOW = 6 * 3600
+
+# Real-time notification push: frames per user are coalesced over this window (seconds)
+NOTIFICATION_PUSH_WINDOW = 0.25
+NOTIFICATION_PUSH_MAX_ITEMS = 20
+# Users whose pushes are sent concurrently; a flush goes out batch by batch
+NOTIFICATION_PUSH_BATCH_SIZE = 100
+
+# Navbar notifications / unread count cache lifetime (seconds)
+NOTIFICATION_NAVBAR_CACHE_SECONDS = 300
+
+# Days to keep notifications per type before prune_notifications removes them
+# (None keeps them forever; types not listed use 'default')
+NOTIFICATION_RETENTION_DAYS = {
+    'new_job': 30,
+    'message': 90,
+    'system': 90,
+    'summary': None,
+    'default': 180,
+}
+
+# Chat messages sent on connect and per load_older page (see freelancer/chat.py)
+CHAT_HISTORY_PAGE_SIZE = 50
+# Reconnects that missed more than this many messages get a gap marker instead of the delta
+CHAT_RESUME_MAX_MESSAGES = 200
+# Write-behind chat persistence (see freelancer/message_buffer.py): messages are broadcast
+# immediately and stored in batches every INTERVAL seconds or BATCH messages.
+# JOURNAL is a directory for crash-recovery journals (None: flush on exit only).
+CHAT_WRITE_BEHIND = False
+CHAT_WRITE_BEHIND_INTERVAL = 0.01
+CHAT_WRITE_BEHIND_BATCH = 200
+CHAT_WRITE_BEHIND_JOURNAL = None
+# Sockets on the chat.compact / chat.msgpack subprotocols (see freelancer/chat_protocol.py) get
+# live messages arriving within this many seconds in one frame (0: a frame per message)
+CHAT_COALESCE_WINDOW = 0.005
+# Chat rooms one multiplexed socket (ws/socket/, UserSocketConsumer) may subscribe to at once
+SOCKET_MAX_ROOMS = 50
+# Presence (see freelancer/presence.py): sockets silent for IDLE_TIMEOUT seconds are closed;
+# derived availability_status is written at most once every FLUSH_INTERVAL seconds.
+PRESENCE_IDLE_TIMEOUT = 90
+PRESENCE_FLUSH_INTERVAL = 10
+
+# Skill extraction from job descriptions, bios and resumes (see freelancer/skill_extractor.py)
+SKILL_EXTRACTOR_MIN_USES = 2
+SKILL_EXTRACTOR_MAX_AGE = 300
+# Seconds a process keeps its skill alias map before reloading it (see freelancer/skills.py)
+SKILL_ALIAS_MAX_AGE = 300
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 